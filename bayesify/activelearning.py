@@ -0,0 +1,224 @@
+import numpy as np
+from scipy.stats import norm
+
+ACQUISITIONS = ("variance", "ei", "information")
+
+
+def predictive_moments(X, mean, cov_factor):
+    """Return the predictive mean and variance of each row of ``X``.
+
+    ``mean`` and ``cov_factor`` describe the posterior of the weights
+    ``(base, *coefs)`` of a linear model, where ``cov_factor @ cov_factor.T``
+    is their covariance. The variance is the one of the model's mean, without
+    noise. Both are computed in the precision of ``X``, so a float32 ``X``
+    takes about a third of the time of a float64 one.
+    """
+    y_mean = X @ mean[1:].astype(X.dtype) + mean[0]
+    projected = X @ cov_factor[1:].astype(X.dtype)
+    projected += cov_factor[0].astype(X.dtype)
+    y_var = np.einsum("ij,ij->i", projected, projected)
+    return (
+        np.asarray(y_mean, dtype=float).ravel(),
+        np.asarray(y_var, dtype=float).ravel(),
+    )
+
+
+def acquisition_scores(acquisition, y_mean, y_var, noise_var, best=None):
+    """Score candidates for measurement; higher scores are more useful.
+
+    - ``"variance"``: the predictive variance,
+    - ``"ei"``: the expected improvement over the lowest measured performance
+      ``best``, as lower performance values are better,
+    - ``"information"``: the information gain about the model from measuring
+      the candidate, ``log(1 + var / noise_var) / 2``.
+    """
+    if acquisition == "variance":
+        return y_var
+    if acquisition == "information":
+        return 0.5 * np.log1p(y_var / noise_var)
+    if acquisition == "ei":
+        if best is None:
+            raise ValueError("Expected improvement needs the best measured value")
+        y_std = np.sqrt(np.maximum(y_var, 0))
+        improvement = best - y_mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = improvement / y_std
+            scores = improvement * norm.cdf(z) + y_std * norm.pdf(z)
+        return np.where(y_std > 0, scores, np.maximum(improvement, 0))
+    raise ValueError("Unknown acquisition function {}".format(acquisition))
+
+
+class ActiveLearner:
+    """Choose configurations to measure from a candidate pool by the posterior.
+
+    Each step scores all unmeasured candidates of ``pool`` in one vectorized
+    pass over blocks of ``block_size`` rows, using the posterior mean and
+    covariance of the regressor's weights instead of predictive samples;
+    variances are computed in single precision there. A
+    batch is then chosen greedily from the ``shortlist_size`` best candidates:
+    after each pick, the posterior covariance is updated as if the pick was
+    measured at its predicted mean, so candidates that are correlated with
+    the picks lose variance and the batch spreads over the space.
+
+    ``oracle`` measures a list of configuration tuples and returns their
+    performance values; ``ConfigSysProxy.eval`` serves as a local stand-in.
+    With ``preprocessing``, e.g. a :class:`~bayesify.pairwise.P4Preprocessing`,
+    new measurements update its feature selection by ``partial_fit`` and the
+    regressor is fitted on its output. As long as the selected terms do not
+    change, the regressor is refitted incrementally by ``reg.refit``.
+    """
+
+    def __init__(
+        self,
+        reg,
+        oracle,
+        pool,
+        acquisition="ei",
+        preprocessing=None,
+        feature_names=None,
+        block_size=65536,
+        shortlist_size=None,
+        seed=None,
+    ):
+        if acquisition not in ACQUISITIONS:
+            raise ValueError("Unknown acquisition function {}".format(acquisition))
+        self.reg = reg
+        self.oracle = oracle
+        self.pool = pool
+        self.acquisition = acquisition
+        self.preprocessing = preprocessing
+        self.feature_names = feature_names
+        self.block_size = block_size
+        self.shortlist_size = shortlist_size
+        self.rndg = np.random.RandomState(seed)
+        self.measured = np.zeros(len(pool), dtype=bool)
+        self.measured_ids = []
+        self.ys = []
+        self.n_preprocessed = 0
+        self.term_names = None
+        self.is_fitted = False
+
+    def get_design(self, configs, dtype=float):
+        configs = np.asarray(configs, dtype=dtype)
+        if self.preprocessing is None:
+            return configs
+        return self.preprocessing.transform(configs)
+
+    def measure(self, ids):
+        """Measure the pool rows ``ids`` with the oracle and return the values."""
+        ids = np.asarray(ids, dtype=int)
+        configs = [tuple(config) for config in np.asarray(self.pool[ids]).tolist()]
+        ys = np.asarray(self.oracle(configs), dtype=float)
+        self.measured[ids] = True
+        self.measured_ids.extend(ids.tolist())
+        self.ys.extend(ys.tolist())
+        return ys
+
+    def fit(self):
+        """Fit the regressor to all measurements, incrementally where possible."""
+        configs = np.asarray(self.pool[np.array(self.measured_ids)], dtype=float)
+        ys = np.array(self.ys)
+        term_names = None
+        if self.feature_names is not None:
+            term_names = [(name,) for name in self.feature_names]
+        if self.preprocessing is not None:
+            new = slice(self.n_preprocessed, None)
+            self.preprocessing.partial_fit(
+                configs[new], ys[new], feature_names=self.feature_names
+            )
+            self.n_preprocessed = len(ys)
+            term_names = list(self.preprocessing.feature_names_out)
+        design = self.get_design(configs)
+        if self.is_fitted and term_names == self.term_names:
+            self.reg.refit(design, ys, random_key=len(ys))
+        else:
+            self.reg.fit(design, ys, random_key=len(ys), feature_names=term_names)
+        self.term_names = term_names
+        self.is_fitted = True
+
+    def get_posterior(self):
+        mean, cov, noise_var = self.reg.get_posterior_moments()
+        # the covariance of MCMC samples may be singular, e.g. for few samples
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        cov_factor = eigenvectors * np.sqrt(np.maximum(eigenvalues, 0))
+        return mean, cov, cov_factor, noise_var
+
+    def score(self):
+        """Return the acquisition score of each pool row, -inf for measured rows."""
+        mean, _, cov_factor, noise_var = self.get_posterior()
+        best = min(self.ys) if self.ys else None
+        scores = np.empty(len(self.pool))
+        for start in range(0, len(self.pool), self.block_size):
+            block = self.get_design(
+                self.pool[start : start + self.block_size], dtype=np.float32
+            )
+            y_mean, y_var = predictive_moments(block, mean, cov_factor)
+            scores[start : start + len(y_mean)] = acquisition_scores(
+                self.acquisition, y_mean, y_var, noise_var, best
+            )
+        scores[self.measured] = -np.inf
+        return scores
+
+    def select_batch(self, batch_size):
+        """Choose ``batch_size`` unmeasured pool rows to measure next."""
+        scores = self.score()
+        n_candidates = int(np.sum(~self.measured))
+        batch_size = min(batch_size, n_candidates)
+        if batch_size == 0:
+            return np.array([], dtype=int)
+        shortlist_size = min(
+            n_candidates, self.shortlist_size or max(20 * batch_size, 1000)
+        )
+        shortlist = np.argpartition(-scores, shortlist_size - 1)[:shortlist_size]
+        shortlist = np.sort(shortlist)
+        mean, cov, cov_factor, noise_var = self.get_posterior()
+        design = self.get_design(self.pool[shortlist])
+        if hasattr(design, "toarray"):
+            design = design.toarray()
+        design = np.column_stack([np.ones(len(shortlist)), design])
+        # ties in random order
+        order = self.rndg.permutation(len(shortlist))
+        shortlist, design = shortlist[order], design[order]
+        y_mean = design @ mean
+        projected = design @ cov_factor
+        y_var = np.einsum("ij,ij->i", projected, projected)
+        best = min(self.ys) if self.ys else None
+        available = np.ones(len(shortlist), dtype=bool)
+        batch = []
+        for _ in range(batch_size):
+            scores = acquisition_scores(
+                self.acquisition, y_mean, y_var, noise_var, best
+            )
+            pick = int(np.argmax(np.where(available, scores, -np.inf)))
+            batch.append(shortlist[pick])
+            available[pick] = False
+            # condition on a fantasized measurement at the predicted mean, which
+            # keeps the means and shrinks the covariance
+            cov_pick = cov @ design[pick]
+            gain = cov_pick / (design[pick] @ cov_pick + noise_var)
+            cov = cov - np.outer(gain, cov_pick)
+            y_var = np.maximum(y_var - (design @ cov_pick) * (design @ gain), 0)
+        return np.array(batch, dtype=int)
+
+    def step(self, batch_size=10):
+        """Select a batch, measure it and refit; returns the measured pool rows."""
+        ids = self.select_batch(batch_size)
+        if len(ids):
+            self.measure(ids)
+            self.fit()
+        return ids
+
+    def run(self, n_steps, batch_size=10, initial_size=None):
+        """Run ``n_steps`` steps, starting with a random sample if none is measured.
+
+        ``initial_size`` defaults to ``batch_size``. Returns the measured pool
+        rows and their performance values.
+        """
+        if not self.measured_ids:
+            initial_size = min(initial_size or batch_size, len(self.pool))
+            self.measure(self.rndg.choice(len(self.pool), initial_size, replace=False))
+            self.fit()
+        for _ in range(n_steps):
+            if len(self.step(batch_size)) == 0:
+                break
+        return np.array(self.measured_ids), np.array(self.ys)
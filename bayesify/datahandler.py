@@ -1,17 +1,623 @@
+import hashlib
+import heapq
+import itertools
+import json
 import os
+import re
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from xml.etree import ElementTree as ET
 import numpy as np
 import pandas as pd
 import networkx as nx
-from statsmodels.stats.outliers_influence import variance_inflation_factor
+from bayesify.diagnostics import (
+    get_correlation_eigen,
+    get_gram_statistics,
+    get_vifs,
+)
+from bayesify.featuremodel import FeatureModel
+from bayesify.optimize import PseudoBooleanModel, find_optimum
 
 DEFAULT_ATTRIBUTES = ["performance", "energy", "runtime", "run-time", "time"]
 
+# pyarrow is optional; it provides a multithreaded CSV parser to pandas
+
+
+# number of set bits for every byte value
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+# position of the lowest set bit for every byte value, -1 for 0
+LOWEST_BIT = np.array([(byte & -byte).bit_length() - 1 for byte in range(256)])
+
+
+def write_atomically(path, write, mode="wb"):
+    """Write ``path`` through a temporary file in its folder and a rename.
+
+    ``write`` is called with the open temporary file. Readers see either the
+    previous or the complete new file, never a partial one.
+    """
+    folder, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=folder or ".", prefix="." + name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def draw_distinct(rndg, n_population, size):
+    """Draw ``size`` distinct integers below ``n_population`` in draw order.
+
+    Unlike ``choice(..., replace=False)``, this does not permute the whole
+    population, which pays off for samples much smaller than it.
+    """
+    ids = np.zeros(0, dtype=np.int64)
+    while len(ids) < size:
+        draws = rndg.randint(0, n_population, size=size - len(ids))
+        ids = np.concatenate([ids, draws])
+        _, first_ids = np.unique(ids, return_index=True)
+        ids = ids[np.sort(first_ids)]
+    return ids
+
+
+def mix_bits(words):
+    """Scramble ``uint64`` words with the splitmix64 finalizer."""
+    words = (words ^ (words >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    words = (words ^ (words >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return words ^ (words >> np.uint64(31))
+
+
+class BitmapIndex:
+    """Per-option bitmap index over the rows of a configuration matrix.
+
+    For each column and each of its values, the rows holding the value are
+    kept as a bitset packed into bytes. A partial assignment is answered by
+    intersecting the bitsets of its constraints; row ids are only unpacked for
+    the non-empty bytes of the result.
+    """
+
+    def __init__(self, configs):
+        self.n_rows = len(configs)
+        self.all_rows = np.packbits(np.ones(self.n_rows, dtype=bool), bitorder="little")
+        self.bitsets = []
+        for col_id in range(configs.shape[1]):
+            column = np.asarray(configs[:, col_id])
+            self.bitsets.append(
+                {
+                    float(value): np.packbits(column == value, bitorder="little")
+                    for value in np.unique(column)
+                }
+            )
+
+    def match(self, constraints, out=None):
+        """Return the bitset of rows that satisfy all ``(column id, value)`` pairs."""
+        if out is None:
+            out = np.empty_like(self.all_rows)
+        out[:] = self.all_rows
+        for col_id, value in constraints:
+            value_bits = self.bitsets[col_id].get(float(value))
+            if value_bits is None:
+                out[:] = 0
+                break
+            np.bitwise_and(out, value_bits, out=out)
+        return out
+
+    @staticmethod
+    def count(bits):
+        return int(POPCOUNT[bits].sum())
+
+    @staticmethod
+    def row_ids(bits):
+        """Return the ids of the rows set in ``bits`` in ascending order."""
+        byte_ids = np.flatnonzero(bits)
+        set_bits = np.unpackbits(bits[byte_ids, None], axis=1, bitorder="little")
+        nonzero_byte_ids, bit_ids = np.nonzero(set_bits)
+        return byte_ids[nonzero_byte_ids] * 8 + bit_ids
+
+
+class PriorityBitsets:
+    """Option and distance bitsets over rows arranged in a priority order.
+
+    Bit ``k`` of each bitset stands for row ``priority[k]``, so the first set
+    bit of a combination of bitsets is the matching row of highest priority;
+    finding it takes one pass over the packed bytes. The distance of a row is
+    its number of selected options. Sampled rows are removed from
+    ``available``.
+    """
+
+    def __init__(self, configs, priority, distances, block_size=65536):
+        self.priority = priority
+        n_bytes = (len(priority) + 7) // 8
+        packed = np.empty((n_bytes, configs.shape[1]), dtype=np.uint8)
+        block_size -= block_size % 8
+        for start in range(0, len(priority), block_size):
+            rows = configs[priority[start : start + block_size]]
+            packed[start // 8 : (start + len(rows) + 7) // 8] = np.packbits(
+                rows != 0, axis=0, bitorder="little"
+            )
+        self.options = np.ascontiguousarray(packed.T)
+        ordered_distances = distances[priority]
+        self.distances = {
+            int(d): np.packbits(ordered_distances == d, bitorder="little")
+            for d in np.unique(ordered_distances)
+        }
+        self.available = np.packbits(
+            np.ones(len(priority), dtype=bool), bitorder="little"
+        )
+
+    @staticmethod
+    def first_position(bits):
+        """Return the position of the first set bit or None if none is set."""
+        byte_id = int(np.argmax(bits != 0))
+        if bits[byte_id] == 0:
+            return None
+        return byte_id * 8 + int(LOWEST_BIT[bits[byte_id]])
+
+    def take(self, position):
+        """Remove the row at ``position`` from ``available`` and return its id."""
+        self.available[position // 8] &= np.uint8(0xFF ^ (1 << position % 8))
+        return int(self.priority[position])
+
+
+class ConfigStore:
+    """Columnar storage of measured configurations.
+
+    Keeps one contiguous configuration matrix, the vector of performance values
+    and a hash index that resolves configurations to row ids. The index holds
+    a 64 bit hash per row, sorted for binary search, and is built on first
+    use. Memory-mapped arrays of matching dtype are used as
+    they are, without copying them into memory.
+    """
+
+    def __init__(self, configs, ys):
+        self.configs = np.require(configs, dtype=float, requirements="C")
+        self.ys = np.asanyarray(ys, dtype=float)
+        self.hash_index = None
+        self.bitmap_index = None
+        self.gram_statistics = None
+        self.distances = None
+
+    @classmethod
+    def open(cls, configs_file, ys_file, mmap_mode="r"):
+        """Create a store from ``.npy`` files, memory-mapped by default."""
+        configs = np.load(configs_file, mmap_mode=mmap_mode)
+        ys = np.load(ys_file, mmap_mode=mmap_mode)
+        return cls(configs, ys)
+
+    @classmethod
+    def from_mapping(cls, performance_map, n_features):
+        """Create a store from a ``{config tuple: performance}`` dict."""
+        configs = np.array(list(performance_map.keys()), dtype=float)
+        configs = configs.reshape((len(performance_map), n_features))
+        ys = np.array(list(performance_map.values()), dtype=float)
+        return cls(configs, ys)
+
+    @classmethod
+    def from_measurements(cls, configs, ys):
+        """Create a store from row-wise measurements.
+
+        Repeated configurations are merged as inserting them into a dict
+        would: a configuration keeps the position of its first occurrence and
+        the performance of its last one.
+        """
+        configs = np.ascontiguousarray(configs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        packed_rows = cls.pack_rows(configs)
+        _, first_ids = np.unique(packed_rows, return_index=True)
+        if len(first_ids) == len(ys):
+            return cls(configs, ys)
+        _, last_ids_reversed = np.unique(packed_rows[::-1], return_index=True)
+        last_ids = len(ys) - 1 - last_ids_reversed
+        order = np.argsort(first_ids)
+        return cls(configs[first_ids[order]], ys[last_ids[order]])
+
+    @staticmethod
+    def pack_rows(configs):
+        """Return one packed, sortable and hashable scalar per row."""
+        # adding 0.0 maps -0.0 to 0.0 so that equal configurations pack equally
+        configs = np.ascontiguousarray(configs, dtype=float) + 0.0
+        row_dtype = np.dtype((np.void, configs.itemsize * configs.shape[1]))
+        return configs.view(row_dtype).ravel()
+
+    @staticmethod
+    def hash_rows(configs):
+        """Return a ``uint64`` hash of each row of ``configs``."""
+        words = (np.ascontiguousarray(configs, dtype=float) + 0.0).view(np.uint64)
+        column_keys = mix_bits(np.arange(1, words.shape[1] + 1, dtype=np.uint64))
+        return (mix_bits(words) * (column_keys | np.uint64(1))).sum(
+            axis=1, dtype=np.uint64
+        )
+
+    def get_hash_index(self, block_size=65536):
+        """Return the sorted row hashes and the row ids in that order."""
+        if self.hash_index is None:
+            hashes = np.empty(len(self), dtype=np.uint64)
+            for start in range(0, len(self), block_size):
+                block = self.configs[start : start + block_size]
+                hashes[start : start + len(block)] = self.hash_rows(block)
+            order = np.argsort(hashes, kind="stable")
+            self.hash_index = hashes[order], order
+        return self.hash_index
+
+    def lookup_rows(self, configs):
+        """Return the row id of each configuration, or -1 if it was not measured.
+
+        ``configs`` must have shape ``(n, n_features)``. Rows are resolved by
+        binary search on their hashes and then compared to the stored rows.
+        """
+        configs = np.asarray(configs, dtype=float)
+        row_ids = np.full(len(configs), -1)
+        if len(self) == 0 or len(configs) == 0:
+            return row_ids
+        sorted_hashes, order = self.get_hash_index()
+        hashes = self.hash_rows(configs)
+        positions = np.minimum(
+            np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1
+        )
+        hash_found = sorted_hashes[positions] == hashes
+        candidates = order[positions]
+        matched = hash_found & np.all(self.configs[candidates] == configs, axis=1)
+        row_ids[matched] = candidates[matched]
+        # distinct rows with equal hashes: check the remaining rows of the run
+        for i in np.flatnonzero(hash_found & ~matched):
+            run_end = np.searchsorted(sorted_hashes, hashes[i], side="right")
+            for position in range(positions[i] + 1, run_end):
+                if np.all(self.configs[order[position]] == configs[i]):
+                    row_ids[i] = order[position]
+                    break
+        return row_ids
+
+    def get_gram_statistics(self):
+        if self.gram_statistics is None:
+            self.gram_statistics = get_gram_statistics(self.configs)
+        return self.gram_statistics
+
+    def get_bitmap_index(self):
+        if self.bitmap_index is None:
+            self.bitmap_index = BitmapIndex(self.configs)
+        return self.bitmap_index
+
+    def get_distances(self, block_size=65536):
+        """Return the number of selected options of each row."""
+        if self.distances is None:
+            self.distances = np.empty(len(self), dtype=np.int64)
+            for start in range(0, len(self), block_size):
+                block = self.configs[start : start + block_size]
+                self.distances[start : start + len(block)] = np.count_nonzero(
+                    block, axis=1
+                )
+        return self.distances
+
+    def lookup(self, config):
+        """Return the row id of ``config`` or None if it was not measured."""
+        config = np.asarray(config, dtype=float).ravel()
+        if len(config) != self.n_features:
+            return None
+        row_id = self.lookup_rows(config[None, :])[0]
+        return None if row_id < 0 else int(row_id)
+
+    def iter_blocks(self, block_size=10000):
+        """Yield ``(configs, ys)`` views of consecutive row blocks."""
+        for start in range(0, len(self), block_size):
+            stop = start + block_size
+            yield self.configs[start:stop], self.ys[start:stop]
+
+    @property
+    def is_memory_mapped(self):
+        return isinstance(self.configs, np.memmap)
+
+    def keep_columns(self, column_ids):
+        """Return a store restricted to the given configuration columns."""
+        return ConfigStore(self.configs[:, column_ids], self.ys)
+
+    @property
+    def n_features(self):
+        return self.configs.shape[1]
+
+    def __len__(self):
+        return len(self.ys)
+
+
+class ConfigMappingView(Mapping):
+    """Read-only ``{config tuple: performance}`` view of a :class:`ConfigStore`."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, config):
+        row_id = None if np.isscalar(config) else self.store.lookup(config)
+        if row_id is None:
+            raise KeyError(config)
+        return self.store.ys[row_id]
+
+    def __contains__(self, config):
+        return not np.isscalar(config) and self.store.lookup(config) is not None
+
+    def __iter__(self):
+        for row in self.store.configs.tolist():
+            yield tuple(row)
+
+    def __len__(self):
+        return len(self.store)
+
+    def values(self):
+        return self.store.ys.tolist()
+
+    def items(self):
+        return zip(self, self.store.ys.tolist())
+
+
+def find_constant_columns(configs, block_size=65536):
+    """Return a boolean mask of the columns that hold a single value."""
+    if len(configs) == 0:
+        return np.zeros(configs.shape[1], dtype=bool)
+    col_min = np.full(configs.shape[1], np.inf)
+    col_max = np.full(configs.shape[1], -np.inf)
+    for start in range(0, len(configs), block_size):
+        block = configs[start : start + block_size]
+        np.minimum(col_min, block.min(axis=0), out=col_min)
+        np.maximum(col_max, block.max(axis=0), out=col_max)
+    return col_min == col_max
+
+
+def get_exclusive_pairs(configs, column_ids=None, block_size=65536):
+    """Return a boolean matrix marking mutually exclusive pairs of options.
+
+    Options ``i`` and ``j`` exclude each other if each of them is selected
+    (equal to 1) in some configuration and the other one is 0 in all
+    configurations in which it is selected. Co-occurrences are counted with
+    one matrix product per block of rows. ``column_ids`` restricts the
+    options to these columns of ``configs``.
+    """
+    if column_ids is None:
+        column_ids = np.arange(configs.shape[1])
+    n_features = len(column_ids)
+    co_occurrences = np.zeros((n_features, n_features))
+    selected_counts = np.zeros(n_features)
+    for start in range(0, len(configs), block_size):
+        block = np.asarray(configs[start : start + block_size])[:, column_ids]
+        selected = (block == 1).astype(float)
+        co_occurrences += selected.T @ (block != 0).astype(float)
+        selected_counts += selected.sum(axis=0)
+    excludes = (co_occurrences == 0) & (selected_counts > 0)[:, None]
+    np.fill_diagonal(excludes, False)
+    return excludes & excludes.T
+
+
+def has_one_selected_per_row(configs, groups, block_size=65536):
+    """Check for each group of column ids whether its values sum to 1 in all rows."""
+    membership = np.zeros((configs.shape[1], len(groups)))
+    for group_id, column_ids in enumerate(groups):
+        membership[column_ids, group_id] = 1.0
+    valid = np.full(len(groups), len(configs) > 0)
+    for start in range(0, len(configs), block_size):
+        row_sums = np.asarray(configs[start : start + block_size]) @ membership
+        valid &= np.all(row_sums == 1.0, axis=0)
+    return valid
+
+
+def find_alternative_features(configs, ft_names, column_ids=None):
+    """Find options that are implied by the other members of an alternative group.
+
+    Alternative groups are maximal cliques of mutually exclusive options of
+    which exactly one is selected in every configuration. Cliques are visited
+    in the sorted order of their column positions, so the result does not
+    depend on the hash seed. Per group, the alphabetically first option is
+    returned for removal, in the order in which the groups are found.
+    ``ft_names`` name the columns of ``configs`` or, if given, its columns
+    ``column_ids``.
+    """
+    if column_ids is None:
+        column_ids = np.arange(len(ft_names))
+    exclusive = get_exclusive_pairs(configs, column_ids)
+    # nodes are positions in ft_names
+    G = nx.Graph()
+    G.add_edges_from((int(i), int(j)) for i, j in zip(*np.nonzero(exclusive)))
+    cliques = sorted(tuple(sorted(clique)) for clique in nx.find_cliques(G))
+    valid = has_one_selected_per_row(
+        configs, [[column_ids[node] for node in clique] for clique in cliques]
+    )
+    is_group = dict(zip(cliques, valid))
+
+    alternative_ft_names = []
+    while True:
+        group = next((clique for clique in cliques if is_group[clique]), None)
+        if group is None:
+            break
+        alternative_ft_names.append(min(ft_names[node] for node in group))
+        G.remove_nodes_from(group)
+        # cliques apart from the group stay maximal, the others lose the
+        # group's nodes and are dropped once another node extends the rest
+        removed = set(group)
+        kept = []
+        shrunk = set()
+        for clique in cliques:
+            if removed.isdisjoint(clique):
+                kept.append(clique)
+                continue
+            rest = tuple(node for node in clique if node not in removed)
+            if rest and not set.intersection(*(set(G.adj[node]) for node in rest)):
+                shrunk.add(rest)
+        for clique in shrunk - is_group.keys():
+            ids = [column_ids[node] for node in clique]
+            is_group[clique] = has_one_selected_per_row(configs, [ids])[0]
+        cliques = list(heapq.merge(kept, sorted(shrunk)))
+    return alternative_ft_names
+
+
+class MeasurementCache:
+    """Binary cache of cleaned measurements, stored next to the source files.
+
+    The cleaned configuration matrix and performance vector are kept as
+    ``.npy`` files, the position map and the removed features in a JSON
+    manifest. Cached data are used while every source file keeps its size and
+    content hash and the same attribute is requested. Content hashes are only
+    recomputed for files whose size or mtime changed.
+    """
+
+    VERSION = 1
+    FOLDER_NAME = ".bayesify-cache"
+    MANIFEST_NAME = "manifest.json"
+    CONFIGS_NAME = "configs.npy"
+    YS_NAME = "ys.npy"
+
+    def __init__(self, folder, sources, attribute=None):
+        self.folder = os.path.join(folder, self.FOLDER_NAME)
+        self.sources = sources
+        self.attribute = attribute
+
+    @staticmethod
+    def file_hash(path, block_size=2**20):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def describe_source(self, path, known=None):
+        """Return name, size, mtime and hash of ``path``.
+
+        The hash of ``known`` is reused if size and mtime did not change.
+        """
+        stat = os.stat(path)
+        source = {
+            "name": os.path.basename(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if known is not None and all(
+            known.get(key) == source[key] for key in ("name", "size", "mtime_ns")
+        ):
+            source["hash"] = known["hash"]
+        else:
+            source["hash"] = self.file_hash(path)
+        return source
+
+    def get_path(self, name):
+        return os.path.join(self.folder, name)
+
+    def read_manifest(self):
+        try:
+            with open(self.get_path(self.MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_manifest(self, manifest):
+        write_atomically(
+            self.get_path(self.MANIFEST_NAME),
+            lambda f: f.write(json.dumps(manifest).encode()),
+        )
+
+    def load(self, mmap_mode=None):
+        """Return ``(manifest, store)`` or None if the cache is stale.
+
+        With ``mmap_mode``, the store memory-maps the cached arrays.
+        """
+        manifest = self.read_manifest()
+        if (
+            manifest is None
+            or manifest.get("version") != self.VERSION
+            or manifest.get("attribute") != self.attribute
+            or len(manifest.get("sources", [])) != len(self.sources)
+        ):
+            return None
+        sources = []
+        for path, known in zip(self.sources, manifest["sources"]):
+            if not os.path.isfile(path):
+                return None
+            source = self.describe_source(path, known)
+            if any(source[key] != known[key] for key in ("name", "size", "hash")):
+                return None
+            sources.append(source)
+        try:
+            store = ConfigStore.open(
+                self.get_path(self.CONFIGS_NAME),
+                self.get_path(self.YS_NAME),
+                mmap_mode=mmap_mode,
+            )
+        except (OSError, ValueError):
+            return None
+        if sources != manifest["sources"]:
+            # only mtimes changed, keep them to skip hashing next time
+            manifest["sources"] = sources
+            try:
+                self.write_manifest(manifest)
+            except OSError:
+                # e.g. a read-only corpus, the cached data are still valid
+                pass
+        return manifest, store
+
+    def store(self, configs, ys, **state):
+        """Write ``configs``, ``ys`` and the JSON-serializable ``state``."""
+        os.makedirs(self.folder, exist_ok=True)
+        write_atomically(
+            self.get_path(self.CONFIGS_NAME), lambda f: np.save(f, configs)
+        )
+        write_atomically(self.get_path(self.YS_NAME), lambda f: np.save(f, ys))
+        manifest = {
+            "version": self.VERSION,
+            "attribute": self.attribute,
+            "sources": [self.describe_source(path) for path in self.sources],
+        }
+        manifest.update(state)
+        self.write_manifest(manifest)
+
 
 class ConfigSysProxy:
     """Utility for loading and querying configuration measurements."""
-    def __init__(self, folder, attribute=None, val_set_size=0, val_set_rnd_seed=None):
-        """Read configuration data from ``folder`` and prepare it for modeling."""
+    EXPORT_FORMATS = ("csv", "npz")
+    SAMPLING_STRATEGIES = ("random", "distance", "diversified", "t-wise")
+
+    def __init__(
+        self,
+        folder,
+        attribute=None,
+        val_set_size=0,
+        val_set_rnd_seed=None,
+        use_cache=False,
+        mmap_mode=None,
+        export=None,
+        cache_root=None,
+        fallback_cache_root=None,
+        csv_engine="c",
+    ):
+        """Read configuration data from ``folder`` and prepare it for modeling.
+
+        Measurements are held in ``self.store``, a :class:`ConfigStore`;
+        ``self.all_configs`` offers the same data as a read-only dict view.
+        Nothing is written by default. With ``use_cache``, the cleaned
+        measurements are kept in a :class:`MeasurementCache` next to the
+        source files, or under ``cache_root``, and reused as long as these do
+        not change.
+
+        With ``mmap_mode`` (e.g. ``"r"``), the configuration matrix and the
+        performance values are memory-mapped from that cache, so processes
+        loading the same system share one copy through the page cache.
+
+        ``cache_root`` keeps the cache in that folder instead of ``folder``.
+        ``fallback_cache_root`` is used if that cache is not valid and cannot
+        be written, e.g. for read-only measurement folders: its cache is read
+        before parsing and written if the first one fails. ``self.is_cached``
+        tells whether the measurements were loaded from or stored to a cache,
+        and ``self.cache_root`` is then the root of that cache, None for
+        ``folder``.
+
+        ``export`` selects the format in which the cleaned measurements are
+        exported next to the sources (see :meth:`export_measurements`); None,
+        the default, writes no export.
+
+        ``csv_engine`` is the ``pd.read_csv`` engine used for CSV measurement
+        files (see :meth:`parse_configs_csv`).
+        """
+        if mmap_mode is not None and not use_cache:
+            raise ValueError("Memory-mapping measurements requires use_cache")
         self.fm_name = "featuremodel.xml"
         self.measurements_file_name = "measurements.xml"
         self.measurements_file_name_csv = "measurements.csv"
@@ -19,16 +625,38 @@ class ConfigSysProxy:
         self.position_map = None
         self.folder = folder
         self.attribute = attribute
+        self.csv_engine = csv_engine
         self.redundant_ft_names = []
         self.alternative_ft_names = []
-        self.position_map = self.parse_fm()
-        self.all_configs = self.parse_configs()
-        self.redundant_ft, self.redundant_ft_names = self.remove_constant_features()
-        (
-            self.alternative_ft,
-            self.alternative_ft_names,
-        ) = self.remove_alternative_features()
-        self.store_csv()
+        self.mmap_mode = mmap_mode
+        self.cache_root = cache_root
+        self.cache_folder = None
+        self.is_cached = False
+        self.export_thread = None
+        cache_roots = [cache_root]
+        if fallback_cache_root is not None:
+            cache_roots.append(fallback_cache_root)
+        # caches by root, in the order in which they are tried
+        caches = {}
+        if use_cache:
+            for root in cache_roots:
+                cache = self.get_measurement_cache(root)
+                if cache is not None:
+                    caches[root] = cache
+        if not any(self.load_cached_measurements(cache) for cache in caches.values()):
+            self.position_map = self.parse_fm()
+            self.store = self.parse_configs()
+            self.clean_measurements()
+            for cache in caches.values():
+                if self.store_cached_measurements(cache):
+                    if mmap_mode is not None:
+                        self.load_cached_measurements(cache)
+                    break
+        for root, cache in caches.items():
+            if cache.folder == self.cache_folder:
+                self.cache_root = root
+        if export is not None:
+            self.export_measurements(export)
         print("Finished reading measurements")
         self.global_opt = None
         self.get_global_opt()
@@ -41,27 +669,31 @@ class ConfigSysProxy:
         else:
             self.validation_set = []
 
+    @property
+    def all_configs(self):
+        return ConfigMappingView(self.store)
+
     def get_all_configs(self):
         return self.all_configs
 
-    def get_VIF_for_features(self, x_np=None):
+    def get_gram_statistics(self, x_np=None):
         if x_np is None:
-            x_np = np.array(list(self.all_configs.keys()))
-        vifs = [variance_inflation_factor(x_np, i) for i in range(x_np.shape[1])]
-        return vifs
+            return self.store.get_gram_statistics()
+        return get_gram_statistics(x_np)
+
+    def get_VIF_for_features(self, x_np=None):
+        vifs = get_vifs(self.get_gram_statistics(x_np))
+        return vifs.tolist()
 
     def get_corr_eigen_fts(self, x_np=None, eigen_thresh=0.01, return_inner=False):
-        if x_np is None:
-            x_np = np.array(list(self.all_configs.keys()))
-        corr_mat = np.corrcoef(x_np, rowvar=0)
-        w, v = np.linalg.eig(corr_mat)
-        eigen_ids = np.nonzero(w < eigen_thresh)
-        if len(eigen_ids) < 1:
+        w, v = get_correlation_eigen(self.get_gram_statistics(x_np))
+        small_eigenvalues = w < eigen_thresh
+        if not small_eigenvalues.any():
             component_ft_of_eigencevtors, w, v = [None] * 3
         else:
-            eigenvectors = v[eigen_ids]
+            eigenvectors = v[:, small_eigenvalues].T
             component_ft_of_eigencevtors = np.nonzero(
-                np.abs(eigenvectors > eigen_thresh)
+                np.abs(eigenvectors) > eigen_thresh
             )
         if return_inner:
             return component_ft_of_eigencevtors, w, v
@@ -69,20 +701,12 @@ class ConfigSysProxy:
             return component_ft_of_eigencevtors
 
     def may_ft_occur_together(self, ft_names):
-        np_cfgs = np.array(list(self.all_configs.keys()))
-        masks = []
-        for ft in ft_names:
-            i = self.position_map[ft]
-            mask = np_cfgs[:, i] == 1.0
-            masks.append(mask)
-        all_occur = np.all(np.array(masks), axis=0)
-        num_occur = np.count_nonzero(all_occur)
-        r = num_occur > 0
-        return r
+        return self.count({ft: 1.0 for ft in ft_names}) > 0
 
     def generate_val_set(self, size, seed, exclude_samples=None):
-        samples = self.get_random_points(size, seed=seed)
-        ys = self.eval(samples)
+        idx = self.get_random_ids(size, seed=seed)
+        samples = [tuple(row) for row in self.store.configs[idx].tolist()]
+        ys = self.store.ys[idx].tolist()
         v_set = samples, ys
         return v_set
 
@@ -96,47 +720,222 @@ class ConfigSysProxy:
         conf = self.get_random_points(1)[0]
         return conf
 
-    def get_random_points(self, n, seed=None):
-        num_configs = len(self.all_configs.keys())
+    def get_random_ids(self, n, seed=None, by_rejection=False):
+        """Draw the row ids of ``n`` distinct measured configurations.
+
+        By default, the ids are drawn with ``choice(..., replace=False)``,
+        which permutes all rows. With ``by_rejection``, they are drawn with
+        :func:`draw_distinct` instead, which is much faster for samples far
+        smaller than the store but draws other ids for the same ``seed``.
+        """
+        num_configs = len(self.store)
         size = min(num_configs, n)
-        if seed:
-            rndg = np.random.RandomState(seed)
-            idx = rndg.choice(num_configs, size, replace=False)
-        else:
-            idx = np.random.choice(num_configs, size, replace=False)
-        conf_arr = np.array(list(self.all_configs.keys()))[idx]
-        confs = list(tuple(tpl) for tpl in conf_arr)
+        rndg = np.random.RandomState(seed) if seed else np.random
+        if by_rejection:
+            return draw_distinct(rndg, num_configs, size)
+        return rndg.choice(num_configs, size, replace=False)
+
+    def get_sample_ids(self, n, strategy="random", seed=None, t=2):
+        """Draw the row ids of up to ``n`` measured configurations.
+
+        Strategies are
+
+        - ``"random"``: uniformly random configurations,
+        - ``"distance"``: distance-based sampling. A distance, i.e. a number of
+          selected options, is drawn uniformly among the distances of the
+          configurations not sampled yet, then a configuration at that
+          distance,
+        - ``"diversified"``: distance-based sampling that prefers
+          configurations selecting the option that is least frequent in the
+          sample so far,
+        - ``"t-wise"``: covers the combinations of ``t`` selected options,
+          see :meth:`get_t_wise_ids`.
+
+        All strategies are deterministic for a given ``seed``.
+        """
+        if strategy == "random":
+            return self.get_random_ids(n, seed=seed)
+        if strategy in ("distance", "diversified"):
+            return self.get_distance_based_ids(
+                n, seed=seed, diversified=strategy == "diversified"
+            )
+        if strategy == "t-wise":
+            return self.get_t_wise_ids(t=t, n=n, seed=seed)
+        raise ValueError("Unknown sampling strategy {}".format(strategy))
+
+    def get_distance_based_ids(self, n, seed=None, diversified=False):
+        """Draw row ids by distance-based or diversified distance-based sampling.
+
+        Rows are visited in a random order on bitsets of the options and
+        distances, so each draw takes a pass over ``len(store) / 8`` bytes.
+        """
+        rndg = np.random.RandomState(seed)
+        distances = self.store.get_distances()
+        bitsets = PriorityBitsets(
+            self.store.configs, rndg.permutation(len(self.store)), distances
+        )
+        remaining = {
+            d: BitmapIndex.count(bits) for d, bits in bitsets.distances.items()
+        }
+        frequencies = np.zeros(self.store.n_features)
+        ids = []
+        while len(ids) < n and remaining:
+            distance = sorted(remaining)[rndg.randint(len(remaining))]
+            candidates = bitsets.distances[distance] & bitsets.available
+            position = None
+            if diversified and distance > 0:
+                # least frequent options first, ties in random order
+                options = np.lexsort((rndg.rand(len(frequencies)), frequencies))
+                for option in options:
+                    position = bitsets.first_position(
+                        candidates & bitsets.options[option]
+                    )
+                    if position is not None:
+                        break
+            if position is None:
+                position = bitsets.first_position(candidates)
+            row = bitsets.take(position)
+            ids.append(row)
+            frequencies += self.store.configs[row] != 0
+            remaining[distance] -= 1
+            if remaining[distance] == 0:
+                del remaining[distance]
+        return np.array(ids, dtype=int)
+
+    def get_t_wise_ids(self, t=2, n=None, seed=None):
+        """Draw row ids that cover all t-wise combinations of selected options.
+
+        For each combination of ``t`` options that is selected together in
+        some measured configuration but not yet in the sample, the
+        configuration with the fewest selected options among those selecting
+        it is added, as the t-wise heuristic of SPL Conqueror does; ties are
+        broken randomly. At most ``n`` row ids are returned if given.
+
+        All ``C(p, t)`` combinations of the ``p`` selected options are
+        visited. Those covered already are skipped by a set lookup, every
+        other one intersects ``t`` bitsets of ``len(store) / 8`` bytes, so the
+        run time grows with ``C(p, t) * len(store) / 8`` in the worst case.
+        """
+        rndg = np.random.RandomState(seed)
+        distances = self.store.get_distances()
+        priority = np.lexsort((rndg.rand(len(distances)), distances))
+        bitsets = PriorityBitsets(self.store.configs, priority, distances)
+        options = [o for o in range(self.store.n_features) if bitsets.options[o].any()]
+        covered = set()
+        ids = []
+        for combination in itertools.combinations(options, t):
+            if combination in covered:
+                continue
+            bits = np.bitwise_and.reduce(bitsets.options[list(combination)], axis=0)
+            position = bitsets.first_position(bits)
+            if position is None:
+                continue
+            row = bitsets.take(position)
+            ids.append(row)
+            selected = np.flatnonzero(self.store.configs[row]).tolist()
+            covered.update(itertools.combinations(selected, t))
+            if n is not None and len(ids) >= n:
+                break
+        return np.array(ids, dtype=int)
+
+    def get_random_samples(self, n, seed=None, strategy="random"):
+        """Return configurations and performances of ``n`` sampled rows as arrays.
+
+        ``strategy`` is one of the strategies of :meth:`get_sample_ids`. Only
+        the drawn rows are read, also from memory-mapped stores.
+        """
+        idx = self.get_sample_ids(n, strategy=strategy, seed=seed)
+        return self.store.configs[idx], self.store.ys[idx]
+
+    def get_random_points(self, n, seed=None, strategy="random"):
+        idx = self.get_sample_ids(n, strategy=strategy, seed=seed)
+        conf_arr = self.store.configs[idx]
+        confs = list(tuple(tpl) for tpl in conf_arr.tolist())
         return confs
 
     def get_global_opt(self):
         if self.global_opt is None:
-            perfs = list(self.all_configs.values())
-            confs = list(self.all_configs.keys())
-            best_idx = int(np.argmin(perfs))
-            best_perf = perfs[best_idx]
-            best_conf = confs[best_idx]
+            best_idx = int(np.argmin(self.store.ys))
+            best_perf = self.store.ys[best_idx]
+            best_conf = tuple(self.store.configs[best_idx].tolist())
             self.global_opt = best_perf, best_conf
         return self.global_opt
 
+    def find_optimum(
+        self, reg, term_names=None, quantile=None, fixed=None, max_nodes=100000
+    ):
+        """Find the valid configuration with the lowest prediction of ``reg``.
+
+        Searches the whole space of the feature model, not only the measured
+        configurations, with :func:`~bayesify.optimize.find_optimum`, starting
+        from the best measured configuration. The objective is the posterior
+        mean of the model or, with ``quantile``, that quantile of it.
+        ``term_names`` and ``fixed`` are described in
+        :meth:`PseudoBooleanModel.from_regressor` and
+        :meth:`FeatureModel.get_space`.
+
+        Returns
+        -------
+        value, config, is_optimal : the objective, the configuration with the
+        columns of ``position_map`` and whether it is proven to be optimal
+        """
+        fm = self.get_feature_model()
+        space = fm.get_space(fixed=fixed)
+        model = PseudoBooleanModel.from_regressor(
+            reg, fm.names, term_names=term_names, quantile=quantile
+        )
+        measured_opt = dict(zip(self.position_map, self.get_global_opt()[1]))
+        start_space = fm.get_space(fixed={**(fixed or {}), **measured_opt})
+        starts = start_space.unrank([0]) if start_space.count() else None
+        value, config, is_optimal = find_optimum(
+            model, space, starts=starts, max_nodes=max_nodes
+        )
+        columns = space.get_column_ids(list(self.position_map))
+        return value, tuple(config[columns].tolist()), is_optimal
+
     def get_n_samples(self, n):
-        samples = []
-        points = self.get_random_points(n)
-        for x in points:
-            # x = self.get_random_point()
-            y = self.eval(x)
-            samples.append((x, y))
+        configs, ys = self.get_random_samples(n)
+        samples = [(tuple(x), y) for x, y in zip(configs.tolist(), ys.tolist())]
         return samples
 
     def eval(self, X):
         if type(X) is list:
-            result = [self._eval(x) for x in X]
+            if len(X) == 0:
+                return []
+            ys, unknown = self.eval_batch(X)
+            if unknown.any():
+                raise ValueError(
+                    "{} appears not to be a valid configuration".format(
+                        X[np.argmax(unknown)]
+                    )
+                )
+            result = ys.tolist()
         else:
             result = self._eval(X)
         return result
 
+    def eval_batch(self, X):
+        """Look up the performance of each row of ``X``.
+
+        Returns an array of performance values and a boolean mask of the rows
+        that were not measured; their performance is NaN.
+        """
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] != len(self.prototype_config):
+            raise ValueError(
+                "Argument of shape {} is unlike configuration shape: {}".format(
+                    X.shape, np.array(self.prototype_config).shape
+                )
+            )
+        row_ids = self.store.lookup_rows(X)
+        unknown = row_ids < 0
+        ys = self.store.ys[row_ids]
+        ys[unknown] = np.nan
+        return ys, unknown
+
     def _eval(self, x):
-        x_tuple = self.validate_conf(x)
-        perf = self.all_configs[x_tuple]
+        self.validate_conf(x)
+        perf = self.store.ys[self.store.lookup(x)]
         return perf
 
     def eval_precisely(self, x):
@@ -150,21 +949,81 @@ class ConfigSysProxy:
                     x, np.array(self.prototype_config).shape, self.prototype_config
                 )
             )
-        if np.isscalar(x) or tuple(x) not in self.all_configs:
+        if np.isscalar(x) or self.store.lookup(x) is None:
             raise ValueError("{} appears not to be a valid configuration".format(x))
         x_tuple = tuple(x)
 
         return x_tuple
 
+    def get_measurement_cache(self, cache_root=None):
+        """Return the cache under ``cache_root``, by default ``self.folder``.
+
+        Returns None without source files.
+        """
+        fm_file = self.find_fm_file()
+        measurements_file = self.find_measurements_file()
+        if fm_file is None or measurements_file is None:
+            return None
+        return MeasurementCache(
+            cache_root or self.folder,
+            [fm_file, measurements_file],
+            self.attribute,
+        )
+
+    def load_cached_measurements(self, cache):
+        cached = cache.load(mmap_mode=self.mmap_mode)
+        if cached is None:
+            return False
+        manifest, self.store = cached
+        self.position_map = manifest["position_map"]
+        self.update_prototype()
+        self.redundant_ft = manifest["redundant_ft"]
+        self.redundant_ft_names = manifest["redundant_ft_names"]
+        self.alternative_ft = manifest["alternative_ft"]
+        self.alternative_ft_names = manifest["alternative_ft_names"]
+        self.cache_folder = cache.folder
+        self.is_cached = True
+        print("Loaded cached measurements from", cache.folder)
+        return True
+
+    def store_cached_measurements(self, cache):
+        try:
+            cache.store(
+                self.store.configs,
+                self.store.ys,
+                position_map=self.position_map,
+                redundant_ft=[int(i) for i in self.redundant_ft],
+                redundant_ft_names=self.redundant_ft_names,
+                alternative_ft=[int(i) for i in self.alternative_ft],
+                alternative_ft_names=self.alternative_ft_names,
+            )
+        except OSError as e:
+            print("Could not store measurement cache:", e)
+            return False
+        self.cache_folder = cache.folder
+        self.is_cached = True
+        return True
+
+    def find_fm_file(self):
+        for file in os.listdir(self.folder):
+            if self.fm_name in file.lower():
+                return os.path.join(self.folder, file)
+        return None
+
+    def find_measurements_file(self):
+        for file in os.listdir(self.folder):
+            lower_name = file.lower()
+            if (
+                self.measurements_file_name in lower_name
+                or self.measurements_file_name_csv in lower_name
+            ):
+                return os.path.join(self.folder, file)
+        return None
+
     def parse_fm(self):
         """Parse the feature model and build ``self.position_map``."""
-        top_files = os.listdir(self.folder)
-        root = None
-        for file in top_files:
-            if self.fm_name in file.lower():
-                tree = ET.parse(os.path.join(self.folder, file))
-                root = tree.getroot()
-                break
+        fm_file = self.find_fm_file()
+        root = ET.parse(fm_file).getroot() if fm_file is not None else None
 
         attribute_names = []
         for element in root.iter("configurationOption"):
@@ -181,6 +1040,26 @@ class ConfigSysProxy:
         self.update_prototype()
         return self.position_map
 
+    def get_feature_model(self):
+        """Read the options and constraints of the system's feature model."""
+        fm_file = self.find_fm_file()
+        if fm_file is None:
+            raise ValueError("No feature model found in {}".format(self.folder))
+        return FeatureModel.from_xml(fm_file)
+
+    def iter_valid_configs(self, block_size=65536, fixed=None):
+        """Yield all valid configurations of the feature model in blocks.
+
+        The blocks have the columns of ``position_map``, so they can be passed
+        to a model trained on the measurements, e.g. to ``predict_iter``.
+        ``fixed`` maps option names to the value they are restricted to. The
+        options removed while cleaning are dropped from the blocks, so
+        configurations repeat if the feature model lets such an option vary;
+        fix it to its measured value in that case.
+        """
+        space = self.get_feature_model().get_space(fixed=fixed)
+        return space.iter_blocks(block_size, columns=list(self.position_map))
+
     def update_prototype(self):
         self.prototype_config = list(0.0 for i in list(self.position_map.keys()))
 
@@ -192,61 +1071,244 @@ class ConfigSysProxy:
 
     def parse_configs(self):
         """Load configuration measurements from the configured folder."""
-        top_files = os.listdir(self.folder)
-        performance_map = None
-        for file in top_files:
-            file_candidate = os.path.join(self.folder, file)
-            if self.measurements_file_name in file.lower():
-                performance_map = self.parse_configs_xml(file_candidate)
-                break
-            elif self.measurements_file_name_csv in file.lower():
-                performance_map = self.parse_configs_csv(file_candidate)
-                break
-        if performance_map is None:
+        file = self.find_measurements_file()
+        if file is None:
             raise ValueError("No measurement files found in {}".format(self.folder))
-        return performance_map
-
-    def parse_configs_csv(self, file):
-        """Parse measurements stored in CSV format."""
-        df = pd.read_csv(file, sep=";")
-        print(df.head())
-        # print(df)
-        features = list(self.position_map.keys())
-        configs_pd = df[features]
-        configs = [tuple(x) for x in configs_pd.values.astype(float)]
-        if not self.attribute:
-            nfps = df.drop(features, axis=1)
-            col = list(nfps.columns.values)[0]
-        else:
-            col = self.attribute
-        ys_pd = df[col]
-        ys = np.array(ys_pd)
-        performance_map = {c: y for c, y in zip(configs, ys)}
-        return performance_map
-
-    def parse_configs_xml(self, file):
-        """Parse measurement files stored in the SPLC XML format."""
+        if self.measurements_file_name in os.path.basename(file).lower():
+            configs, ys = self.parse_configs_xml(file)
+            return ConfigStore.from_measurements(configs, ys)
+        configs, ys = self.parse_configs_csv(file, engine=self.csv_engine)
+        return ConfigStore.from_measurements(configs, ys)
+
+    def parse_configs_csv(self, file, chunk_rows=65536, engine="c"):
+        """Read measurements stored in CSV format column by column.
+
+        Only the option columns of the feature model and the performance
+        column are read, all with an explicit float dtype, so pandas neither
+        infers types nor creates Python objects per row. The file is read
+        ``chunk_rows`` rows at a time into a configuration matrix that is
+        allocated once after counting the lines, so files larger than the
+        memory available to pandas can be loaded.
+
+        ``engine`` is passed to ``pd.read_csv`` and has to read in chunks,
+        i.e. be ``"c"`` or ``"python"``.
+
+        Returns
+        -------
+        configs, ys : the configuration matrix and the performances
+        """
+        features = list(self.position_map)
+        header = list(pd.read_csv(file, sep=";", nrows=0).columns)
+        missing = [ft for ft in features if ft not in header]
+        if missing:
+            raise ValueError(
+                "Options {} of the feature model are missing in {}".format(
+                    missing, file
+                )
+            )
+        col = self.get_csv_attribute_column(header)
+        dtypes = {name: np.float64 for name in features + [col]}
+        max_rows = self.count_csv_rows(file)
+        chunks = pd.read_csv(
+            file,
+            sep=";",
+            usecols=list(dtypes),
+            dtype=dtypes,
+            engine=engine,
+            chunksize=chunk_rows,
+        )
+        configs = np.empty((max_rows, len(features)))
+        ys = np.empty(max_rows)
+        n_rows = 0
+        for chunk in chunks:
+            configs[n_rows : n_rows + len(chunk)] = chunk[features].to_numpy()
+            ys[n_rows : n_rows + len(chunk)] = chunk[col].to_numpy()
+            n_rows += len(chunk)
+        # blank lines are counted too; shrinking in place frees their rows
+        configs.resize((n_rows, len(features)), refcheck=False)
+        ys.resize(n_rows, refcheck=False)
+        return configs, ys
+
+    def get_csv_attribute_column(self, header):
+        """Return the CSV column holding the performance metric to model.
+
+        Without an explicit attribute, this is the first column that is
+        neither an option nor the root feature.
+        """
+        if self.attribute:
+            if self.attribute not in header:
+                raise ValueError("Attribute {} not found".format(self.attribute))
+            return self.attribute
+        for column in header:
+            if column not in self.position_map and column != "root":
+                return column
+        raise ValueError("No performance column found")
+
+    @staticmethod
+    def count_csv_rows(file, block_size=2**20):
+        """Return an upper bound of the data rows of a CSV file.
+
+        Counts the lines with a raw byte scan; blank lines are included.
+        """
+        n_lines = 0
+        last_byte = b"\n"
+        with open(file, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                n_lines += block.count(b"\n")
+                last_byte = block[-1:]
+        if last_byte != b"\n":
+            n_lines += 1
+        return max(n_lines - 1, 0)
+
+    def parse_configs_xml(self, file, chunk_rows=65536):
+        """Stream measurement files stored in the SPLC XML format.
+
+        Rows are read with ``iterparse`` and discarded once processed.
+        Selected options are written straight into the configuration matrix,
+        which is allocated once for an upper bound of the rows. Measurements are
+        converted and reduced to their medians in bulk, ``chunk_rows`` rows at
+        a time.
+
+        Returns
+        -------
+        configs, ys : the configuration matrix and the median performances
+        """
+        n_features = len(self.position_map)
+        skipped_features = set(self.redundant_ft_names + self.alternative_ft_names)
+        positions = {
+            ft: pos
+            for ft, pos in self.position_map.items()
+            if ft not in skipped_features
+        }
+        n_rows = self.count_xml_rows(file)
+        configs = np.zeros((n_rows, n_features))
+        ys = np.full(n_rows, np.nan)
+        row_id = 0
+        measurement_strs = []
+        measurement_counts = []
+        xml_attr_name = None
+        config_str, config_num_str, perf_str = None, None, None
         root = None
-        xml_attr_name = ""
-        tree = ET.parse(file)
-        root = tree.getroot()
-        row = next(root.iter("row"))
-        data = next(row.iter("data"))
+        for event, element in ET.iterparse(file, events=("start", "end")):
+            if root is None:
+                root = element
+            if event == "start":
+                continue
+            if element.tag == "data":
+                if xml_attr_name is None:
+                    xml_attr_name = self.get_xml_attr_name(element, file)
+                column = element.attrib[xml_attr_name]
+                if column == "Configuration" and config_str is None:
+                    config_str = element.text or ""
+                elif column == "Variable Features" and config_num_str is None:
+                    config_num_str = element.text or ""
+                elif perf_str is None and self.is_attribute_column(column):
+                    perf_str = (element.text or "").strip().strip(",")
+            elif element.tag == "row":
+                if perf_str is None:
+                    raise ValueError(
+                        "Could not find a performance value in row {} of {}. "
+                        "Consider specifying the attribute.".format(row_id, file)
+                    )
+                if row_id == n_rows:
+                    raise ValueError("{} has more rows than counted".format(file))
+                config = configs[row_id]
+                for raw_feature in config_str.split(","):
+                    feature = raw_feature.strip()
+                    if feature and feature in positions:
+                        config[positions[feature]] = 1.0
+                    elif feature and feature not in self.position_map:
+                        raise KeyError(feature)
+                if config_num_str:
+                    for raw_feature in config_num_str.split(","):
+                        if raw_feature.strip():
+                            num_feature, val = raw_feature.strip().split(";")
+                            if num_feature not in self.redundant_ft_names:
+                                config[self.position_map[num_feature]] = int(val)
+                row_id += 1
+                measurement_strs.append(perf_str)
+                measurement_counts.append(perf_str.count(",") + 1)
+                if len(measurement_strs) == chunk_rows:
+                    ys[row_id - chunk_rows : row_id] = self.get_medians(
+                        measurement_strs, measurement_counts, file
+                    )
+                    measurement_strs, measurement_counts = [], []
+                config_str, config_num_str, perf_str = None, None, None
+                root.clear()
+        if measurement_strs:
+            ys[row_id - len(measurement_strs) : row_id] = self.get_medians(
+                measurement_strs, measurement_counts, file
+            )
+        # the raw count also includes row tags in comments or CDATA sections
+        return configs[:row_id], ys[:row_id]
+
+    @staticmethod
+    def count_xml_rows(file, block_size=2**20):
+        """Count the ``row`` tags of an XML file with a raw byte scan.
+
+        Tags in comments or CDATA sections are counted too, so the count is an
+        upper bound of the ``row`` elements.
+        """
+        row_tag = re.compile(rb"<row[\s>/]")
+        n_rows = 0
+        tail = b""
+        with open(file, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                text = tail + block
+                n_rows += len(row_tag.findall(text))
+                # a tag split across blocks is completed by the next block
+                tail = text[-4:]
+        return n_rows
+
+    @staticmethod
+    def get_medians(measurement_strs, measurement_counts, file=None):
+        """Return the median of each comma-separated measurement string.
+
+        Raises a ValueError naming ``file`` if a measurement is not a number.
+        """
+        counts = np.array(measurement_counts, dtype=int)
+        if len(counts) == 0:
+            return np.zeros(0)
+        try:
+            values = np.array(",".join(measurement_strs).split(","), dtype=float)
+        except ValueError as e:
+            raise ValueError("Invalid measurement in {}: {}".format(file, e)) from e
+        if len(values) != counts.sum():
+            raise ValueError(
+                "Expected {} measurements in {}, found {}".format(
+                    counts.sum(), file, len(values)
+                )
+            )
+        if np.all(counts == counts[0]):
+            return np.median(values.reshape((len(counts), counts[0])), axis=1)
+        padded = np.full((len(counts), counts.max()), np.nan)
+        row_ids = np.repeat(np.arange(len(counts)), counts)
+        row_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        padded[row_ids, np.arange(len(values)) - row_starts] = values
+        return np.nanmedian(padded, axis=1)
+
+    @staticmethod
+    def get_xml_attr_name(data, file=None):
+        """Return the XML attribute that names the content of data nodes."""
         if "column" in data.attrib:
-            xml_attr_name = "column"
+            return "column"
         elif "columname" in data.attrib:
-            xml_attr_name = "columname"
-        else:
-            print("Could not find xml attribute that specifies content of node")
-            exit(7)
-
-        performance_map = {}
-        for row in root.iter("row"):
-            new_config = self.parse_config_str(xml_attr_name, row)
-            perf = self.get_attribute_val(xml_attr_name, row)
-            performance_map[tuple(np.array(new_config).astype(float))] = perf
+            return "columname"
+        raise ValueError(
+            "Could not find the XML attribute naming the data nodes of {}".format(file)
+        )
 
-        return performance_map
+    def is_attribute_column(self, column):
+        """Return True if ``column`` holds the performance metric to model."""
+        if not self.attribute:
+            return column in DEFAULT_ATTRIBUTES
+        return column == self.attribute
 
     def parse_config_str(self, xml_attr_name, xml_row):
         """Convert a configuration row from the XML file into a feature vector."""
@@ -295,13 +1357,7 @@ class ConfigSysProxy:
         """Return the performance metric encoded in a measurement row."""
         perf = None
         for data in row:
-            is_attribute = False
-            if not self.attribute and data.attrib[xml_attr_name] in DEFAULT_ATTRIBUTES:
-                is_attribute = True
-            else:
-                if data.attrib[xml_attr_name] == self.attribute:
-                    is_attribute = True
-            if is_attribute:
+            if self.is_attribute_column(data.attrib[xml_attr_name]):
                 measurements = list(float(m) for m in data.text.split(","))
                 perf = np.median(measurements)
                 break
@@ -320,25 +1376,83 @@ class ConfigSysProxy:
         basename = os.path.basename(os.path.normpath(self.folder))
         return basename
 
+    def get_query_constraints(self, query):
+        """Translate a partial assignment into ``(column id, value)`` pairs.
+
+        ``query`` is either a dict from option names to values or a sequence
+        with one value per option, in which None or NaN leave an option free.
+        """
+        if isinstance(query, dict):
+            return [(self.position_map[ft], val) for ft, val in query.items()]
+        values = np.asarray(query, dtype=float).ravel()
+        if len(values) != len(self.position_map):
+            raise ValueError(
+                "Query {} does not assign {} options".format(
+                    query, len(self.position_map)
+                )
+            )
+        col_ids = np.flatnonzero(~np.isnan(values))
+        return list(zip(col_ids.tolist(), values[col_ids].tolist()))
+
+    def match_query(self, query, out=None):
+        index = self.store.get_bitmap_index()
+        return index.match(self.get_query_constraints(query), out=out)
+
     def query(self, query):
-        n_cols = query.shape[1]
-        confs = np.array(self.all_configs.values())
-        match_list = []
-        n_constr = 0
-        for col_id, feature_val in zip(range(n_cols), query):
-            if feature_val is not None:
-                n_constr += 1
-                matches = confs[:, col_id] == feature_val
-                match_list.append(matches)
-        match_arr = np.vstack(match_list)
-        all_matched = np.sum(match_arr, axis=0) == n_constr
-        matched_conf_ids = np.nonzero(all_matched)
-        if len(matched_conf_ids) == 0:
-            chosen_match = None
-        else:
-            matched_confs = confs[matched_conf_ids]
-            chosen_match = matched_confs[0]
-        return chosen_match
+        """Return the first measured configuration matching ``query`` or None."""
+        row_ids = BitmapIndex.row_ids(self.match_query(query))
+        if len(row_ids) == 0:
+            return None
+        return tuple(self.store.configs[row_ids[0]].tolist())
+
+    def query_all(self, query):
+        """Return the configurations and performances matching ``query``."""
+        row_ids = BitmapIndex.row_ids(self.match_query(query))
+        return self.store.configs[row_ids], self.store.ys[row_ids]
+
+    def count(self, query):
+        return BitmapIndex.count(self.match_query(query))
+
+    def best_match(self, query):
+        """Return ``(performance, configuration)`` of the best match or None.
+
+        Like :meth:`get_global_opt`, the lowest performance value is best.
+        """
+        return self.get_best_of_rows(BitmapIndex.row_ids(self.match_query(query)))
+
+    def get_best_of_rows(self, row_ids):
+        if len(row_ids) == 0:
+            return None
+        best_id = row_ids[np.argmin(self.store.ys[row_ids])]
+        return self.store.ys[best_id], tuple(self.store.configs[best_id].tolist())
+
+    def iter_query_matches(self, queries):
+        bits = None
+        for query in queries:
+            bits = self.match_query(query, out=bits)
+            yield bits
+
+    def query_batch(self, queries):
+        """Answer :meth:`query_all` for each of ``queries``.
+
+        ``queries`` may also be a 2D array with NaN for free options.
+        """
+        return [
+            (self.store.configs[row_ids], self.store.ys[row_ids])
+            for row_ids in map(BitmapIndex.row_ids, self.iter_query_matches(queries))
+        ]
+
+    def count_batch(self, queries):
+        return np.array(
+            [BitmapIndex.count(bits) for bits in self.iter_query_matches(queries)],
+            dtype=int,
+        )
+
+    def best_match_batch(self, queries):
+        return [
+            self.get_best_of_rows(BitmapIndex.row_ids(bits))
+            for bits in self.iter_query_matches(queries)
+        ]
 
     def get_init(self):
         pass
@@ -349,120 +1463,227 @@ class ConfigSysProxy:
         if fname is None:
             fname = "measurements-cleared.csv"
         path = os.path.join(folder, fname)
-        df_configs = self.get_measurement_df()
-        df_root = pd.DataFrame(data=[1] * len(df_configs), columns=["root"])
-        df_configs = pd.concat([df_root, df_configs], axis=1)
-        conv_dict = {c: "int32" for c in list(self.position_map.keys())}
-        df_configs = df_configs.astype(conv_dict)
-        df_configs = df_configs.rename(columns={"<y>": "y"})
-        df_configs.to_csv(path, index=False, sep=";")
+        self.write_measurements(path, "csv", self.store, list(self.position_map))
         print("Stored measurement CSV file to", path)
+        self.write_removed_features(
+            folder, self.redundant_ft_names, self.alternative_ft_names
+        )
 
-        const_path = os.path.join(folder, "constant-features.txt")
-        alt_path = os.path.join(folder, "alternative-features.txt")
-        del_path = os.path.join(folder, "all-deleted-features.txt")
-        with open(const_path, "w") as the_file:
-            for ft in self.redundant_ft_names:
-                the_file.write("{}\n".format(ft))
-        with open(alt_path, "w") as the_file:
-            for ft in self.alternative_ft_names:
-                the_file.write("{}\n".format(ft))
-        with open(del_path, "w") as the_file:
-            for ft in self.redundant_ft_names:
-                the_file.write("{}\n".format(ft))
-            for ft in self.alternative_ft_names:
-                the_file.write("{}\n".format(ft))
+    def export_measurements(self, fmt="csv", folder=None, background=True):
+        """Export the cleaned measurements unless an identical export exists.
 
-    def remove_constant_features(self):
-        df_configs = self.get_all_config_df()
-        redundant_ft = []
-        redundant_ft_names = []
-        for i, col in enumerate(df_configs.columns):
-            # if len(configs[col].unique()) == 1 or col == "PS1K" or col == "CS16MB":
-            if len(df_configs[col].unique()) == 1:
-                redundant_ft.append(i)
-                redundant_ft_names.append(col)
-                df_configs.drop(col, inplace=True, axis=1)
-        new_pos_map = self.get_pos_map_from_df(df_configs)
-        conf_dict = {
-            tuple(row): y
-            for row, y in zip(
-                df_configs.values.tolist(), list(self.all_configs.values())
+        Writes ``measurements-cleared.<fmt>`` (``"csv"`` or the faster binary
+        ``"npz"``) and the lists of removed features to ``folder``, by default
+        the measurement folder. Files are replaced atomically, and the export
+        is skipped if the content hash recorded for an existing export
+        matches. With ``background``, the files are written on a writer thread
+        that is returned; :meth:`wait_for_export` joins it.
+        """
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(
+                "Unknown export format {}, use one of {}".format(
+                    fmt, self.EXPORT_FORMATS
+                )
             )
+        export_args = (
+            fmt,
+            self.folder if folder is None else folder,
+            self.store,
+            list(self.position_map),
+            list(self.redundant_ft_names),
+            list(self.alternative_ft_names),
+        )
+        if not background:
+            self.write_export(*export_args)
+            return None
+        self.wait_for_export()
+        self.export_thread = threading.Thread(
+            target=self.write_export, args=export_args, name="measurement-export"
+        )
+        self.export_thread.start()
+        return self.export_thread
+
+    def wait_for_export(self):
+        if self.export_thread is not None:
+            self.export_thread.join()
+            self.export_thread = None
+
+    def write_export(self, fmt, folder, store, ft_names, redundant, alternative):
+        path = os.path.join(folder, "measurements-cleared.{}".format(fmt))
+        hash_path = os.path.join(folder, ".measurements-cleared.{}.hash".format(fmt))
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(store.configs).data)
+        digest.update(np.ascontiguousarray(store.ys).data)
+        digest.update(json.dumps([ft_names, redundant, alternative]).encode())
+        content_hash = digest.hexdigest()
+        try:
+            if os.path.isfile(path) and os.path.isfile(hash_path):
+                with open(hash_path) as f:
+                    if f.read() == content_hash:
+                        return
+            self.write_measurements(path, fmt, store, ft_names)
+            self.write_removed_features(folder, redundant, alternative)
+            write_atomically(hash_path, lambda f: f.write(content_hash), mode="w")
+            print("Exported measurements to", path)
+        except OSError as e:
+            print("Could not export measurements:", e)
+
+    @staticmethod
+    def write_measurements(path, fmt, store, ft_names):
+        if fmt == "npz":
+            write_atomically(
+                path,
+                lambda f: np.savez(
+                    f, configs=store.configs, ys=store.ys, features=np.array(ft_names)
+                ),
+            )
+            return
+        df_configs = pd.DataFrame(store.configs.astype("int32"), columns=ft_names)
+        df_configs.insert(0, "root", 1)
+        df_configs["y"] = store.ys
+        write_atomically(
+            path,
+            lambda f: df_configs.to_csv(f, index=False, sep=";"),
+            mode="w",
+        )
+
+    @staticmethod
+    def write_removed_features(folder, redundant_ft_names, alternative_ft_names):
+        feature_lists = {
+            "constant-features.txt": redundant_ft_names,
+            "alternative-features.txt": alternative_ft_names,
+            "all-deleted-features.txt": redundant_ft_names + alternative_ft_names,
         }
-        self.position_map = new_pos_map
+        for fname, ft_names in feature_lists.items():
+            content = "".join("{}\n".format(ft) for ft in ft_names)
+            write_atomically(
+                os.path.join(folder, fname), lambda f: f.write(content), mode="w"
+            )
+
+    def clean_measurements(self):
+        """Remove constant and alternative features in a single pass.
+
+        Both detections read the parsed configuration matrix; the cleaned
+        matrix is materialized once at the end. Sets the same attributes as
+        :meth:`remove_constant_features` followed by
+        :meth:`remove_alternative_features`.
+        """
+        ft_names = list(self.position_map)
+        configs = self.store.configs
+        is_constant = find_constant_columns(configs)
+        self.redundant_ft = np.flatnonzero(is_constant).tolist()
+        self.redundant_ft_names = [ft_names[i] for i in self.redundant_ft]
+        varying_ids = np.flatnonzero(~is_constant)
+        varying_fts = [ft_names[i] for i in varying_ids]
+        self.alternative_ft_names = find_alternative_features(
+            configs, varying_fts, column_ids=varying_ids
+        )
+        self.alternative_ft = [
+            varying_fts.index(ft_name) for ft_name in self.alternative_ft_names
+        ]
+        alternative_fts = set(self.alternative_ft_names)
+        kept = [
+            (i, ft)
+            for i, ft in zip(varying_ids, varying_fts)
+            if ft not in alternative_fts
+        ]
+        self.store = self.store.keep_columns([i for i, _ in kept])
+        self.position_map = {ft: j for j, (_, ft) in enumerate(kept)}
+        self.update_prototype()
+
+    def remove_constant_features(self):
+        is_constant = find_constant_columns(self.store.configs)
+        redundant_ft = np.flatnonzero(is_constant).tolist()
+        redundant_ft_names = [list(self.position_map)[i] for i in redundant_ft]
+        kept_fts = [ft for ft in self.position_map if ft not in redundant_ft_names]
+        self.store = self.store.keep_columns([self.position_map[ft] for ft in kept_fts])
+        self.position_map = {ft: i for i, ft in enumerate(kept_fts)}
         self.update_prototype()
-        self.all_configs = conf_dict
         return redundant_ft, redundant_ft_names
 
     def get_measurement_df(self):
         configs = self.get_all_config_df()
-        config_attrs = pd.DataFrame(list(self.all_configs.values()), columns=["<y>"])
+        config_attrs = pd.DataFrame(self.store.ys, columns=["<y>"])
         df_configs = pd.concat([configs, config_attrs], axis=1)
         return df_configs
 
     def get_all_config_df(self):
-        configs = pd.DataFrame(
-            list(self.all_configs.keys()), columns=self.position_map.keys()
-        )
+        configs = pd.DataFrame(self.store.configs, columns=list(self.position_map))
         return configs
 
     def remove_alternative_features(self):
-        df_configs = self.get_all_config_df()
-        alternative_ft = []
-        alternative_ft_names = []
-        group_candidates = {}
-
-        for i, col in enumerate(df_configs.columns):
-            filter_on = df_configs[col] == 1
-            filter_off = df_configs[col] == 0
-            group_candidates[col] = []
-            for other_col in df_configs.columns:
-                if other_col != col:
-                    values_if_col_on = df_configs[filter_on][other_col].unique()
-                    if len(values_if_col_on) == 1 and values_if_col_on[0] == 0:
-                        # other feature is always off if col feature is on
-                        group_candidates[col].append(other_col)
-
-        G = nx.Graph()
-        for ft, alternative_candidates in group_candidates.items():
-            for candidate in alternative_candidates:
-                if ft in group_candidates[candidate]:
-                    G.add_edge(ft, candidate)
-
-        cliques_remaining = True
-        while cliques_remaining:
-            cliques_remaining = False
-            cliques = nx.find_cliques(G)
-            for clique in cliques:
-                # check if exactly one col is 1 in each row
-                sums_per_row = df_configs[clique].sum(axis=1).unique()
-                if len(sums_per_row) == 1 and sums_per_row[0] == 1.0:
-                    delete_ft = sorted(clique)[0]
-                    alternative_ft_names.append(delete_ft)
-                    df_configs.drop(delete_ft, inplace=True, axis=1)
-                    for c in clique:
-                        G.remove_node(c)
-                    cliques_remaining = True
-                    break
-
+        alternative_ft_names = find_alternative_features(
+            self.store.configs, list(self.position_map)
+        )
         alternative_ft = [
             self.position_map[ft_name] for ft_name in alternative_ft_names
         ]
-
-        new_pos_map = self.get_pos_map_from_df(df_configs)
-        conf_dict = {
-            tuple(row): y
-            for row, y in zip(
-                df_configs.values.tolist(), list(self.all_configs.values())
-            )
-        }
-        self.position_map = new_pos_map
+        kept_fts = [ft for ft in self.position_map if ft not in alternative_ft_names]
+        self.store = self.store.keep_columns([self.position_map[ft] for ft in kept_fts])
+        self.position_map = {ft: i for i, ft in enumerate(kept_fts)}
         self.update_prototype()
-        self.all_configs = conf_dict
         return alternative_ft, alternative_ft_names
 
 
+def read_lines_reversed(path, block_size=2**16):
+    """Yield the lines of a text file from the last to the first.
+
+    The file is read backwards in blocks, so finding something near its end
+    does not read the whole file. Lines are yielded without line breaks.
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        at_end = True
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            if at_end and lines[-1] == b"":
+                # the line break that ends the file
+                lines.pop()
+            at_end = False
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                yield line.rstrip(b"\r").decode()
+        if not at_end:
+            yield remainder.rstrip(b"\r").decode()
+
+
+def decode_sample_line(line):
+    """Return the selected options of a line of a SPLC t-wise sample file."""
+    conf_decoded = line.split(" ")[1][1:-1]
+    return [f for f in conf_decoded.split("%;%") if len(f) > 0 and f != "root"]
+
+
+def read_sample_set_features(path):
+    """Return the selected options of each configuration in a sample file."""
+    with open(path) as f:
+        return [decode_sample_line(line) for line in f if line.strip()]
+
+
+class LazySampleSets(Mapping):
+    """``{t: sample set}`` mapping that parses each sample set on first access."""
+
+    def __init__(self, repo, files):
+        self.repo = repo
+        self.files = files
+        self.loaded = {}
+
+    def __getitem__(self, t):
+        if t not in self.loaded:
+            features = read_sample_set_features(self.files[t])
+            self.loaded[t] = self.repo.get_sample_set(features)
+        return self.loaded[t]
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+
 class DistBasedRepo(ConfigSysProxy):
     PARENT_BASE_FOLDER = "SupplementaryWebsite"
     PERF_PRED_BASE_FOLDER = "PerformancePredictions"
@@ -489,7 +1710,18 @@ class DistBasedRepo(ConfigSysProxy):
     ]
 
     def __init__(
-        self, root, sys_name, attribute=None, val_set_size=0, val_set_rnd_seed=None
+        self,
+        root,
+        sys_name,
+        attribute=None,
+        val_set_size=0,
+        val_set_rnd_seed=None,
+        use_cache=False,
+        mmap_mode=None,
+        export=None,
+        cache_root=None,
+        fallback_cache_root=None,
+        csv_engine="c",
     ):
         self.root = self.get_common_root(root)
         self.sys_name = sys_name
@@ -497,14 +1729,23 @@ class DistBasedRepo(ConfigSysProxy):
         self.summary_folder = self.get_summary_folder()
         self.measurements_folder = self.get_measurements_folder()
 
-        super().__init__(self.measurements_folder, attribute)
-        self.sample_sets = self.parse_sample_sets()
+        super().__init__(
+            self.measurements_folder,
+            attribute,
+            use_cache=use_cache,
+            mmap_mode=mmap_mode,
+            export=export,
+            cache_root=cache_root,
+            fallback_cache_root=fallback_cache_root,
+            csv_engine=csv_engine,
+        )
+        self.sample_sets = LazySampleSets(self, self.find_t_wise_files())
 
     def get_train_eval_split(self, t):
         x_train = list(self.sample_sets[t].keys())
         y_train = list(self.sample_sets[t].values())
-        x_eval = list(self.all_configs.keys())
-        y_eval = list(self.all_configs.values())
+        x_eval = [tuple(row) for row in self.store.configs.tolist()]
+        y_eval = self.store.ys.tolist()
         return x_train, y_train, x_eval, y_eval
 
     def get_summary_folder(self):
@@ -529,58 +1770,86 @@ class DistBasedRepo(ConfigSysProxy):
             new_root = os.path.join(new_root, DistBasedRepo.PARENT_BASE_FOLDER)
         return new_root
 
-    def parse_sample_sets(self):
-        splc_lines = {}
+    def find_t_wise_files(self):
+        """Return the paths of the t-wise files in the summary folder by t."""
+        t_files = {}
         for filename in os.listdir(self.summary_folder):
             for t, t_name in DistBasedRepo.T_FILE_NAMES.items():
                 if t_name.lower() in filename.lower():
-                    abs_path = os.path.join(self.summary_folder, filename)
-                    with open(abs_path) as f:
-                        content = f.readlines()
-                        splc_lines[t] = content
-        splc_conf_sets = {}
-        for t, lines in splc_lines.items():
-            confs = [self.parse_line(line) for line in lines]
-            splc_conf_sets[t] = {conf: y for conf, y in confs}
-        return splc_conf_sets
+                    t_files[t] = os.path.join(self.summary_folder, filename)
+        return t_files
+
+    def load_sample_sets(self, ts=None, n_jobs=None):
+        """Parse the sample sets of ``ts`` (default: all) that are not loaded yet.
+
+        The files are read and decoded on a pool of ``n_jobs`` worker
+        processes; the configurations are then evaluated in batches.
+        """
+        sample_sets = self.sample_sets
+        ts = [
+            t
+            for t in (sample_sets.files if ts is None else ts)
+            if t not in sample_sets.loaded
+        ]
+        paths = [sample_sets.files[t] for t in ts]
+        if len(paths) > 1 and n_jobs != 1:
+            with ProcessPoolExecutor(n_jobs) as executor:
+                features = list(executor.map(read_sample_set_features, paths))
+        else:
+            features = [read_sample_set_features(path) for path in paths]
+        for t, t_features in zip(ts, features):
+            sample_sets.loaded[t] = self.get_sample_set(t_features)
+        return sample_sets
+
+    def get_sample_set(self, feature_sets):
+        confs = [tuple(self.get_conf_for_feature_set(fs)) for fs in feature_sets]
+        ys = self.eval(confs)
+        return {conf: y for conf, y in zip(confs, ys)}
+
+    def parse_sample_sets(self):
+        self.load_sample_sets(n_jobs=1)
+        return dict(self.sample_sets.loaded)
 
     def parse_logs_for_coeffs(self):
-        log_lines = {}
-        for filename in os.listdir(self.summary_folder):
-            for t, t_name in DistBasedRepo.T_FILE_NAMES.items():
-                if t_name.lower() in filename.lower():
-                    abs_path = os.path.join(self.summary_folder, filename)
-                    with open(abs_path) as f:
-                        content = f.readlines()
-                        log_lines[t] = content[-1]
+        """Return the coefficients of the final SPLC model per t.
+
+        Log files are read from their end up to the last finished analysis.
+        """
         splc_coeff_sets = {}
-        for t, lines in log_lines.items():
-            final_coeff_line = self.find_final_coeff_line(lines)
-            coeff_map = self.parse_coeffs(final_coeff_line)
-            splc_coeff_sets[t] = coeff_map
+        for t, path in self.find_t_wise_files().items():
+            final_coeff_line = self.find_final_coeff_line_reversed(
+                read_lines_reversed(path)
+            )
+            splc_coeff_sets[t] = self.parse_coeffs(final_coeff_line)
         return splc_coeff_sets
 
     def parse_line(self, line):
-        conf_decoded = line.split(" ")[1][1:-1]
-        feature_set = [
-            f for f in conf_decoded.split("%;%") if len(f) > 0 and f != "root"
-        ]
-        conf = tuple(self.get_conf_for_feature_set(feature_set))
+        conf = self.parse_line_config(line)
         y = self.eval(conf)
         return conf, y
 
+    def parse_line_config(self, line):
+        return tuple(self.get_conf_for_feature_set(decode_sample_line(line)))
+
     def find_final_coeff_line(self, lines):
-        rev_lines = lines[::-1]
-        final_line = None
-        for i, line in enumerate(rev_lines):
-            if "Analyze finished" in line:
-                final_line = rev_lines[i + 1]
-                break
-        return final_line
+        return self.find_final_coeff_line_reversed(reversed(lines))
+
+    @staticmethod
+    def find_final_coeff_line_reversed(rev_lines):
+        """Return the line before the last "Analyze finished" line, or None."""
+        analysis_finished = False
+        for line in rev_lines:
+            if analysis_finished:
+                return line
+            analysis_finished = "Analyze finished" in line
+        return None
 
-    def parse_coeffs(self, final_coeff_line):
-        df = pd.DataFrame(final_coeff_line, columns=DistBasedRepo.SPLC_COLUMNS)
-        model_str = df["Model"]
+    @staticmethod
+    def parse_coeffs(final_coeff_line):
+        fields = dict(
+            zip(DistBasedRepo.SPLC_COLUMNS, final_coeff_line.strip().split(";"))
+        )
+        model_str = fields["Model"]
         terms = model_str.split(" + ")
         coeff_map = {}
         for term in terms:
@@ -588,3 +1857,120 @@ class DistBasedRepo(ConfigSysProxy):
             coeff, ft = term_comps[0], tuple(term_comps[1:])
             coeff_map[ft] = float(coeff)
         return coeff_map
+
+
+def discover_systems(root):
+    """Return the names of all systems with measurements and SPLC summaries."""
+    common_root = DistBasedRepo.get_common_root(root)
+    measured = os.path.join(common_root, DistBasedRepo.MEASUREMENTS_BASE_FOLDER)
+    summarized = os.path.join(
+        common_root,
+        DistBasedRepo.PERF_PRED_BASE_FOLDER,
+        DistBasedRepo.SUMMARY_BASE_FOLDER,
+    )
+    return sorted(
+        name
+        for name in os.listdir(measured)
+        if os.path.isdir(os.path.join(measured, name))
+        and os.path.isdir(os.path.join(summarized, name))
+    )
+
+
+def build_measurement_cache(root, sys_name, attribute=None, fallback_root=None):
+    """Load a system once to fill its measurement cache.
+
+    If the cache cannot be written next to the measurements, e.g. in a
+    read-only corpus, the one in ``<fallback_root>/<sys_name>`` is read or
+    written instead. Nothing is exported next to the measurements.
+
+    Returns
+    -------
+    load_time : the seconds spent
+    cache_root : the root of the cache, None for the measurement folder
+    """
+    start = time.time()
+    fallback_cache_root = None
+    if fallback_root is not None:
+        fallback_cache_root = os.path.join(fallback_root, sys_name)
+    repo = DistBasedRepo(
+        root,
+        sys_name,
+        attribute,
+        use_cache=True,
+        fallback_cache_root=fallback_cache_root,
+    )
+    if not repo.is_cached:
+        raise OSError("Could not store the measurement cache of " + sys_name)
+    return time.time() - start, repo.cache_root
+
+
+def load_corpus(
+    root,
+    sys_names=None,
+    attribute=None,
+    n_jobs=None,
+    verbose=True,
+    fallback_root=None,
+):
+    """Load many systems of a SupplementaryWebsite tree concurrently.
+
+    Each system is parsed and cleaned on a pool of ``n_jobs`` worker processes,
+    which store the results in the system's binary measurement cache. The
+    parent then opens every system from its cache with memory-mapped arrays,
+    so no measurements are pickled between processes.
+
+    Systems whose cache cannot be written next to their measurements, e.g. in
+    a read-only corpus, are cached under ``fallback_root``, by default a
+    folder in the temporary directory. Later loads read them from there
+    without parsing, and they are memory-mapped from there as well. Their
+    repositories have a ``cache_root``, and they are reported if ``verbose``.
+
+    Returns
+    -------
+    repos : dict mapping system names to :class:`DistBasedRepo` instances
+    load_times : dict mapping system names to the seconds spent in the worker
+    """
+    if sys_names is None:
+        sys_names = discover_systems(root)
+    if fallback_root is None:
+        fallback_root = os.path.join(tempfile.gettempdir(), "bayesify-corpus-cache")
+    load_times = {}
+    cache_roots = {}
+    with ProcessPoolExecutor(n_jobs) as executor:
+        futures = {}
+        for sys_name in sys_names:
+            future = executor.submit(
+                build_measurement_cache, root, sys_name, attribute, fallback_root
+            )
+            futures[future] = sys_name
+        for future in as_completed(futures):
+            sys_name = futures[future]
+            try:
+                load_times[sys_name], cache_roots[sys_name] = future.result()
+            except Exception as e:
+                raise RuntimeError("Loading {} failed".format(sys_name)) from e
+            if verbose:
+                print(
+                    "[{}/{}] Loaded {} in {:.1f}s".format(
+                        len(load_times), len(sys_names), sys_name, load_times[sys_name]
+                    )
+                )
+    fallbacks = [sys_name for sys_name in sys_names if cache_roots[sys_name]]
+    if verbose and fallbacks:
+        print(
+            "Could not cache {} in the corpus, cached under {}".format(
+                ", ".join(fallbacks), fallback_root
+            )
+        )
+    repos = {
+        sys_name: DistBasedRepo(
+            root,
+            sys_name,
+            attribute,
+            use_cache=True,
+            mmap_mode="r",
+            cache_root=cache_roots[sys_name],
+        )
+        for sys_name in sys_names
+    }
+    return repos, load_times
@@ -0,0 +1,77 @@
+import numpy as np
+
+from bayesify.lasso import GramStatistics
+
+
+def get_gram_statistics(X, block_size=65536):
+    """Accumulate the Gram statistics of ``X`` block by block.
+
+    ``X`` may be an array, a memory-mapped array or an iterable of 2D blocks,
+    so that the statistics of a large store are gathered in one streaming pass.
+    """
+    blocks = (
+        (X[start : start + block_size] for start in range(0, len(X), block_size))
+        if hasattr(X, "shape")
+        else X
+    )
+    stats = None
+    for block in blocks:
+        block = np.asarray(block, dtype=float)
+        if stats is None:
+            stats = GramStatistics(block.shape[1])
+        stats.update(block, np.zeros(len(block)))
+    return stats
+
+
+def get_correlation_matrix(stats, center=True):
+    """Return the correlation matrix of the columns summarized in ``stats``.
+
+    With ``center=False``, the uncentered correlation (cosine similarity) of
+    the columns is returned. Columns without variance get NaN entries.
+    """
+    gram = stats.centered()[0] if center else stats.xx
+    scale = np.sqrt(np.clip(np.diag(gram), 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = gram / np.outer(scale, scale)
+    return corr
+
+
+def get_vifs(stats, center=False):
+    """Compute all variance inflation factors at once.
+
+    The VIFs are the diagonal of the inverse correlation matrix. A singular
+    matrix is inverted with the pseudo-inverse instead; columns that take part
+    in an exact linear dependence get an infinite VIF. The default
+    ``center=False`` regresses each column on the others without an intercept,
+    as statsmodels' ``variance_inflation_factor`` does on the raw design
+    matrix; ``center=True`` yields the VIFs of a model with intercept. Columns
+    without variance get NaN.
+    """
+    corr = get_correlation_matrix(stats, center=center)
+    valid = np.isfinite(np.diag(corr))
+    vifs = np.full(len(corr), np.nan)
+    if not valid.any():
+        return vifs
+    corr = corr[np.ix_(valid, valid)]
+    w, v = np.linalg.eigh(corr)
+    null_space = w <= len(w) * np.finfo(float).eps * w[-1]
+    if not null_space.any():
+        vifs[valid] = np.diag(np.linalg.inv(corr))
+        return vifs
+    # columns in an exact linear dependence have an infinite VIF, the others
+    # are unaffected by it
+    in_dependence = np.any(
+        np.abs(v[:, null_space]) > np.sqrt(np.finfo(float).eps), axis=1
+    )
+    inv_diag = np.diag(np.linalg.pinv(corr, hermitian=True))
+    vifs[valid] = np.where(in_dependence, np.inf, inv_diag)
+    return vifs
+
+
+def get_correlation_eigen(stats, center=True):
+    """Eigen-decompose the correlation matrix with ``eigh``.
+
+    Returns the eigenvalues in ascending order and the eigenvectors as columns.
+    """
+    corr = get_correlation_matrix(stats, center=center)
+    return np.linalg.eigh(np.nan_to_num(corr))
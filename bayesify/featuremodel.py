@@ -0,0 +1,357 @@
+from xml.etree import ElementTree as ET
+
+import numpy as np
+
+ROOT = "root"
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def satisfies(configs, clauses):
+    """Return a boolean mask of the rows of ``configs`` that satisfy ``clauses``."""
+    configs = np.asarray(configs) != 0
+    valid = np.ones(len(configs), dtype=bool)
+    for clause in clauses:
+        ids, signs = zip(*clause)
+        valid &= np.any(configs[:, ids] == np.array(signs), axis=1)
+    return valid
+
+
+class FeatureModel:
+    """Binary options of an SPL Conqueror feature model and their constraints.
+
+    The constraints are kept in conjunctive normal form: ``clauses`` is a list
+    of clauses, each a tuple of ``(option id, selected)`` literals of which at
+    least one must hold. Option ids index ``names``, the option names in the
+    order of ``ConfigSysProxy.position_map`` before cleaning, i.e. sorted and
+    without the root option, which is always selected.
+    """
+
+    def __init__(self, names, parents, clauses):
+        self.names = list(names)
+        self.parents = dict(parents)
+        self.clauses = list(clauses)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_xml(cls, path):
+        """Read the options and constraints of a ``featuremodel.xml``.
+
+        Translated constraints are
+
+        - a selected option implies its parent,
+        - ``impliedOptions``; an entry ``A | B`` implies one of A and B,
+        - ``excludedOptions``; an entry ``A | B`` excludes A and B,
+        - a non-optional option is selected with its parent. Non-optional
+          siblings that exclude each other form an alternative group, of
+          which exactly one is selected with the parent,
+        - ``booleanConstraints`` such as ``A | !B``; or-groups are written
+          as such clauses.
+        """
+        root = ET.parse(path).getroot()
+        options = {}
+        for element in root.iter("configurationOption"):
+            name = element.findtext("name").strip()
+            options[name] = {
+                "parent": (element.findtext("parent") or "").strip() or ROOT,
+                "optional": (element.findtext("optional") or "").strip().lower()
+                == "true",
+                "implied": cls.read_option_lists(element.find("impliedOptions")),
+                "excluded": cls.read_option_lists(element.find("excludedOptions")),
+            }
+        names = sorted(name for name in options if name != ROOT)
+        builder = ClauseBuilder(names)
+        for name in names:
+            option = options[name]
+            builder.add([(name, False), (option["parent"], True)])
+            for implied in option["implied"]:
+                builder.add([(name, False)] + [(other, True) for other in implied])
+            for excluded in option["excluded"]:
+                for other in excluded:
+                    builder.add([(name, False), (other, False)])
+            if option["optional"]:
+                continue
+            group = [name] + [
+                other
+                for excluded in option["excluded"]
+                for other in excluded
+                if other in options
+                and options[other]["parent"] == option["parent"]
+                and not options[other]["optional"]
+            ]
+            builder.add([(option["parent"], False)] + [(ft, True) for ft in group])
+        for constraint in root.iter("constraint"):
+            for clause in (constraint.text or "").split("&"):
+                literals = [part.strip(" ()") for part in clause.split("|")]
+                builder.add(
+                    [
+                        (literal.lstrip("!").strip(), not literal.startswith("!"))
+                        for literal in literals
+                        if literal
+                    ]
+                )
+        parents = {name: options[name]["parent"] for name in names}
+        return cls(names, parents, builder.clauses)
+
+    @staticmethod
+    def read_option_lists(element):
+        if element is None:
+            return []
+        option_lists = []
+        for options in element.iter("options"):
+            names = [name.strip() for name in (options.text or "").split("|")]
+            names = [name for name in names if name]
+            if names:
+                option_lists.append(names)
+        return option_lists
+
+    def is_valid(self, configs):
+        """Return a boolean mask of the rows of ``configs`` that are valid.
+
+        ``configs`` holds one column per option in the order of ``names``.
+        """
+        return satisfies(configs, self.clauses)
+
+    def get_space(self, fixed=None):
+        """Compile the valid configurations into a :class:`ConfigurationSpace`.
+
+        ``fixed`` optionally maps option names to the value (0 or 1) they are
+        restricted to.
+        """
+        clauses = list(self.clauses)
+        for name, value in (fixed or {}).items():
+            if name not in self.ids:
+                raise ValueError("Unknown option {}".format(name))
+            clauses.append(((self.ids[name], bool(value)),))
+        return ConfigurationSpace(self.names, clauses, self.get_order())
+
+    def get_order(self):
+        """Order options depth-first along the option tree.
+
+        Parents and children, and siblings of a group, end up next to each
+        other, which keeps the frontier of the compiled space narrow.
+        """
+        children = {}
+        for name in self.names:
+            children.setdefault(self.parents[name], []).append(name)
+        order = []
+        stack = list(reversed(children.get(ROOT, [])))
+        while stack:
+            name = stack.pop()
+            order.append(self.ids[name])
+            stack.extend(reversed(children.get(name, [])))
+        # options whose parent is missing from the model come last
+        placed = set(order)
+        order += [i for i in range(len(self.names)) if i not in placed]
+        return order
+
+
+class ClauseBuilder:
+    """Collect clauses over named options, resolving the root option."""
+
+    def __init__(self, names):
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.clauses = []
+        self.known = set()
+
+    def add(self, literals):
+        clause = set()
+        for name, selected in literals:
+            if name == ROOT:
+                if selected:
+                    # the root is always selected
+                    return
+                continue
+            if name not in self.ids:
+                raise ValueError("Unknown option {} in constraint".format(name))
+            clause.add((self.ids[name], selected))
+        if any((i, not selected) in clause for i, selected in clause):
+            return
+        clause = tuple(sorted(clause))
+        if not clause:
+            raise ValueError("The feature model has no valid configuration")
+        if clause not in self.known:
+            self.known.add(clause)
+            self.clauses.append(clause)
+
+
+class ConfigurationSpace:
+    """The valid configurations of a feature model, compiled for fast access.
+
+    The options are decided one after the other in ``order``. Partial
+    configurations that share the set of clauses still to be satisfied have
+    the same completions, so they are merged into one state of a layered
+    graph, as in a decision diagram. Counting the completions of every state
+    once makes it possible to count, rank and sample configurations without
+    enumerating them.
+
+    Configurations are numbered from 0 to ``count() - 1`` in lexicographic
+    order along ``order``, deselected before selected.
+    """
+
+    def __init__(self, names, clauses, order=None):
+        self.names = list(names)
+        self.clauses = list(clauses)
+        self.order = list(range(len(names))) if order is None else list(order)
+        n_vars = len(self.order)
+        position = {var: pos for pos, var in enumerate(self.order)}
+        starting = [[] for _ in range(n_vars)]
+        self.clause_signs = []
+        self.clause_last = []
+        for clause_id, clause in enumerate(clauses):
+            signs = {position[var]: selected for var, selected in clause}
+            self.clause_signs.append(signs)
+            self.clause_last.append(max(signs))
+            starting[min(signs)].append(clause_id)
+        self.transitions = []
+        states = {frozenset(): 0}
+        for level in range(n_vars):
+            next_states = {}
+            transitions = np.full((len(states), 2), -1, dtype=np.int64)
+            for state, state_id in states.items():
+                for value in (0, 1):
+                    child = self.get_next_state(state, starting[level], level, value)
+                    if child is not None:
+                        child_id = next_states.setdefault(child, len(next_states))
+                        transitions[state_id, value] = child_id
+            self.transitions.append(transitions)
+            states = next_states
+        self.counts = self.count_completions(len(states))
+
+    def get_next_state(self, state, starting, level, value):
+        """Return the clauses pending after deciding the option at ``level``.
+
+        Returns None if ``value`` violates a clause.
+        """
+        pending = []
+        for clause_id in list(state) + starting:
+            signs = self.clause_signs[clause_id]
+            if level in signs and signs[level] == bool(value):
+                continue
+            if self.clause_last[clause_id] == level:
+                return None
+            pending.append(clause_id)
+        return frozenset(pending)
+
+    def count_completions(self, n_final_states):
+        """Count the completions of each state and drop states without any."""
+        # all clauses are decided at the last level, so a final state is empty
+        counts = [np.ones(n_final_states, dtype=object)]
+        for transitions in reversed(self.transitions):
+            child_counts = np.append(counts[0], 0)
+            state_counts = child_counts[transitions].sum(axis=1)
+            transitions[child_counts[transitions] == 0] = -1
+            counts.insert(0, state_counts)
+        if len(counts[0]) == 0 or counts[0][0] == 0:
+            counts[0] = np.zeros(1, dtype=object)
+        self.total = int(counts[0][0])
+        if self.total <= INT64_MAX:
+            counts = [c.astype(np.int64) for c in counts]
+        # completions that deselect the option of the level, per state
+        self.n_deselected = [
+            np.append(child_counts, 0)[transitions[:, 0]]
+            for child_counts, transitions in zip(counts[1:], self.transitions)
+        ]
+        return counts
+
+    def count(self):
+        """Return the number of valid configurations as a Python int."""
+        return self.total
+
+    def is_valid(self, configs):
+        """Return a boolean mask of the rows of ``configs`` in the space."""
+        return satisfies(configs, self.clauses)
+
+    def get_column_ids(self, columns):
+        if columns is None:
+            return list(range(len(self.names)))
+        ids = {name: i for i, name in enumerate(self.names)}
+        return [ids[name] for name in columns]
+
+    def unrank(self, ranks, columns=None):
+        """Return the configurations with the given numbers as a float matrix.
+
+        ``columns`` selects and orders the option columns of the result by
+        name, e.g. ``list(proxy.position_map)`` of a cleaned
+        :class:`~bayesify.datahandler.ConfigSysProxy`; by default, all options
+        are returned in the order of ``names``.
+        """
+        if self.total > INT64_MAX:
+            raise ValueError("Configuration numbers do not fit into int64")
+        ranks = np.array(ranks, dtype=np.int64)
+        if np.any((ranks < 0) | (ranks >= self.total)):
+            raise IndexError("Configuration number out of range")
+        output_rows = {}
+        for row, column_id in enumerate(self.get_column_ids(columns)):
+            output_rows.setdefault(column_id, []).append(row)
+        # filled option by option, so the result is the transpose
+        selected = np.zeros((sum(map(len, output_rows.values())), len(ranks)))
+        is_selected = np.empty(len(ranks), dtype=bool)
+        single_state = np.zeros(len(ranks), dtype=np.int64)
+        state = single_state
+        n_levels = len(self.transitions)
+        for level, transitions in enumerate(self.transitions):
+            # layers with a single state need no per-row lookups
+            if len(transitions) == 1:
+                n_deselected = self.n_deselected[level][0]
+                children = transitions[0]
+            else:
+                n_deselected = self.n_deselected[level][state]
+                children = transitions[state].T
+            np.greater_equal(ranks, n_deselected, out=is_selected)
+            np.subtract(ranks, n_deselected, out=ranks, where=is_selected)
+            for row in output_rows.get(self.order[level], []):
+                selected[row] = is_selected
+            if level + 1 < n_levels and len(self.transitions[level + 1]) > 1:
+                state = np.where(is_selected, children[1], children[0])
+            else:
+                state = single_state
+        return selected.T
+
+    def iter_blocks(self, block_size=65536, start=0, stop=None, columns=None):
+        """Yield the valid configurations as float matrices of ``block_size`` rows.
+
+        Only one block is held in memory, so the blocks can be passed
+        straight to a batched prediction such as
+        :meth:`~bayesify.pairwise.PyroMCMCRegressor.predict_iter`. ``start``
+        and ``stop`` restrict the enumeration to a range of configuration
+        numbers, e.g. to split it between processes.
+        """
+        stop = self.total if stop is None else min(stop, self.total)
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            yield self.unrank(np.arange(block_start, block_stop), columns=columns)
+
+    def sample(self, n, seed=None, columns=None):
+        """Draw ``n`` distinct configurations uniformly at random.
+
+        Returns all configurations in random order if there are at most ``n``.
+        """
+        rndg = np.random.RandomState(seed)
+        n = min(n, self.total)
+        if self.total <= 4 * n:
+            return self.unrank(rndg.permutation(self.total)[:n], columns=columns)
+        if self.total > INT64_MAX:
+            # duplicates are practically impossible in such a space
+            return self.sample_sequentially(n, rndg, columns=columns)
+        ranks = np.zeros(0, dtype=np.int64)
+        while len(ranks) < n:
+            draws = rndg.randint(0, self.total, size=n - len(ranks), dtype=np.int64)
+            ranks = np.concatenate([ranks, draws])
+            _, first_ids = np.unique(ranks, return_index=True)
+            ranks = ranks[np.sort(first_ids)]
+        return self.unrank(ranks, columns=columns)
+
+    def sample_sequentially(self, n, rndg, columns=None):
+        """Draw ``n`` configurations option by option, with replacement."""
+        selected = np.zeros((n, len(self.names)), dtype=bool)
+        state = np.zeros(n, dtype=np.int64)
+        for level, transitions in enumerate(self.transitions):
+            counts = np.append(self.counts[level + 1], 0)
+            child = transitions[state]
+            n_selected = counts[child[:, 1]].astype(float)
+            p_selected = n_selected / self.counts[level][state].astype(float)
+            is_selected = rndg.rand(n) < p_selected
+            selected[:, self.order[level]] = is_selected
+            state = np.where(is_selected, child[:, 1], child[:, 0])
+        return selected[:, self.get_column_ids(columns)].astype(float)
@@ -0,0 +1,155 @@
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import lasso_path
+
+
+class GramStatistics:
+    """Sufficient statistics of a least-squares problem.
+
+    Keeps ``XᵀX``, ``Xᵀy`` and the first and second moments of ``X`` and ``y``
+    so that lasso problems (with intercept) can be solved without the design
+    matrix. Statistics of disjoint row sets can be added and subtracted.
+    """
+
+    def __init__(self, n_features):
+        self.n_samples = 0
+        self.x_sum = np.zeros(n_features)
+        self.y_sum = 0.0
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros(n_features)
+        self.yy = 0.0
+
+    def update(self, X, y):
+        """Add the rows of ``X`` (dense or scipy.sparse) and ``y``."""
+        y = np.asarray(y, dtype=float).ravel()
+        xx = X.T @ X
+        self.xx += xx.toarray() if sparse.issparse(xx) else xx
+        self.xy += np.asarray(X.T @ y).ravel()
+        self.x_sum += np.asarray(X.sum(axis=0)).ravel()
+        self.y_sum += float(y.sum())
+        self.yy += float(y @ y)
+        self.n_samples += len(y)
+        return self
+
+    def copy(self):
+        stats = GramStatistics(len(self.xy))
+        stats.n_samples = self.n_samples
+        stats.x_sum = self.x_sum.copy()
+        stats.y_sum = self.y_sum
+        stats.xx = self.xx.copy()
+        stats.xy = self.xy.copy()
+        stats.yy = self.yy
+        return stats
+
+    def __add__(self, other):
+        stats = self.copy()
+        stats.n_samples += other.n_samples
+        stats.x_sum += other.x_sum
+        stats.y_sum += other.y_sum
+        stats.xx += other.xx
+        stats.xy += other.xy
+        stats.yy += other.yy
+        return stats
+
+    def __sub__(self, other):
+        stats = self.copy()
+        stats.n_samples -= other.n_samples
+        stats.x_sum -= other.x_sum
+        stats.y_sum -= other.y_sum
+        stats.xx -= other.xx
+        stats.xy -= other.xy
+        stats.yy -= other.yy
+        return stats
+
+    def means(self):
+        return self.x_sum / self.n_samples, self.y_sum / self.n_samples
+
+    def centered(self):
+        """Return ``XᵀX``, ``Xᵀy`` and ``yᵀy`` of the mean-centered problem."""
+        x_mean, y_mean = self.means()
+        n = self.n_samples
+        gram = self.xx - n * np.outer(x_mean, x_mean)
+        xy = self.xy - n * x_mean * y_mean
+        yy = self.yy - n * y_mean**2
+        return gram, xy, yy
+
+    def squared_errors(self, coefs, x_offset, y_offset):
+        """Sum of squared residuals of linear models on these rows.
+
+        ``coefs`` has shape ``(n_features, n_models)``; each model predicts
+        ``y_offset + (x - x_offset) @ coef``.
+        """
+        intercepts = y_offset - x_offset @ coefs
+        sse = (
+            self.yy
+            - 2 * (self.xy @ coefs)
+            - 2 * intercepts * self.y_sum
+            + np.einsum("im,ij,jm->m", coefs, self.xx, coefs)
+            + 2 * intercepts * (self.x_sum @ coefs)
+            + self.n_samples * intercepts**2
+        )
+        return sse
+
+
+def gram_alpha_grid(stats, eps=1e-3, n_alphas=100):
+    """Return the descending alpha grid ``LassoCV`` would use for these data."""
+    _, xy, _ = stats.centered()
+    alpha_max = np.max(np.abs(xy)) / stats.n_samples
+    if alpha_max <= np.finfo(float).resolution:
+        return np.full(n_alphas, np.finfo(float).resolution)
+    alphas = np.logspace(np.log10(alpha_max * eps), np.log10(alpha_max), n_alphas)
+    return alphas[::-1]
+
+
+def gram_lasso_path(stats, alphas, coef_init=None, max_iter=5000, tol=1e-4):
+    """Solve the lasso for each of ``alphas`` using only ``stats``.
+
+    Returns the coefficients with shape ``(n_features, len(alphas))``. Along
+    the path, each solution warm-starts the next one; ``coef_init`` seeds the
+    first.
+    """
+    gram, xy, yy = stats.centered()
+    # With a precomputed Gram matrix, the coordinate descent solver only uses X
+    # for its shape and y for its squared norm.
+    x_shape_only = np.broadcast_to(np.zeros(1), (stats.n_samples, len(xy)))
+    y_norm = np.array([np.sqrt(max(yy, 0.0))])
+    if coef_init is not None:
+        coef_init = np.array(coef_init, dtype=float)
+    _, coefs, _ = lasso_path(
+        x_shape_only,
+        y_norm,
+        alphas=np.asarray(alphas, dtype=float),
+        precompute=np.ascontiguousarray(gram),
+        Xy=np.ascontiguousarray(xy),
+        coef_init=coef_init,
+        check_input=False,
+        max_iter=max_iter,
+        tol=tol,
+    )
+    return coefs
+
+
+def gram_lasso_cv(fold_stats, eps=1e-3, n_alphas=100, max_iter=5000, tol=1e-4):
+    """Cross-validated lasso on per-fold statistics, mirroring ``LassoCV``.
+
+    Each entry of ``fold_stats`` holds the statistics of one test fold. The
+    alpha with the lowest mean held-out MSE is refit on all folds.
+
+    Returns
+    -------
+    best_alpha, coef, alphas, mse_path
+    """
+    total = fold_stats[0].copy()
+    for stats in fold_stats[1:]:
+        total = total + stats
+    alphas = gram_alpha_grid(total, eps=eps, n_alphas=n_alphas)
+    mse_path = np.empty((len(fold_stats), len(alphas)))
+    for k, test_stats in enumerate(fold_stats):
+        train_stats = total - test_stats
+        coefs = gram_lasso_path(train_stats, alphas, max_iter=max_iter, tol=tol)
+        x_offset, y_offset = train_stats.means()
+        sse = test_stats.squared_errors(coefs, x_offset, y_offset)
+        mse_path[k] = sse / test_stats.n_samples
+    best_alpha = alphas[np.argmin(mse_path.mean(axis=0))]
+    coef = gram_lasso_path(total, [best_alpha], max_iter=max_iter, tol=tol)[:, 0]
+    return best_alpha, coef, alphas, mse_path
@@ -0,0 +1,268 @@
+import itertools
+
+import numpy as np
+
+
+class PseudoBooleanModel:
+    """Pairwise pseudo-Boolean function of binary options.
+
+    ``f(x) = base + Σ_i linear_i x_i + Σ_k pair_coefs_k x_a x_b`` for the pairs
+    ``(a, b)`` in ``pairs``. All coefficients have a leading axis of posterior
+    samples. The objective of a configuration is the mean of ``f`` over the
+    samples or, with ``quantile``, the given quantile of it.
+    """
+
+    def __init__(self, names, base, linear, pairs, pair_coefs, quantile=None):
+        self.names = list(names)
+        self.base = np.atleast_1d(np.asarray(base, dtype=float))
+        self.linear = np.asarray(linear, dtype=float).reshape(len(self.base), -1)
+        self.pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+        self.pair_coefs = np.asarray(pair_coefs, dtype=float).reshape(
+            len(self.base), len(self.pairs)
+        )
+        if quantile is not None and not 0 < quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        if quantile is None:
+            # the mean is linear in the coefficients, so one sample suffices
+            self.base = self.base.mean(keepdims=True)
+            self.linear = self.linear.mean(axis=0, keepdims=True)
+            self.pair_coefs = self.pair_coefs.mean(axis=0, keepdims=True)
+
+    @classmethod
+    def from_regressor(cls, reg, names, term_names=None, quantile=None):
+        """Build the model of a fitted :class:`~bayesify.pairwise.PyroMCMCRegressor`.
+
+        ``names`` are the options of the configurations to optimize, e.g. the
+        ``names`` of a :class:`~bayesify.featuremodel.ConfigurationSpace`.
+        ``term_names`` name the options of each model input, either as tuples
+        like P4Preprocessing's ``feature_names_out`` or as ``"a&b"`` strings;
+        by default, the regressor's ``rv_names`` are used. Options missing in
+        ``names`` raise a ValueError.
+        """
+        term_names = reg.rv_names if term_names is None else term_names
+        ids = {name: i for i, name in enumerate(names)}
+        base = np.asarray(reg.samples["base"], dtype=float).ravel()
+        coefs = np.asarray(reg.samples["coefs"], dtype=float).reshape(len(base), -1)
+        linear = np.zeros((len(base), len(ids)))
+        pair_coefs = {}
+        for term_id, term in enumerate(term_names):
+            options = term.split("&") if isinstance(term, str) else list(term)
+            unknown = [option for option in options if option not in ids]
+            if unknown:
+                raise ValueError("Unknown options {} in term {}".format(unknown, term))
+            term_ids = tuple(sorted({ids[option] for option in options}))
+            if len(term_ids) == 1:
+                linear[:, term_ids[0]] += coefs[:, term_id]
+            elif len(term_ids) == 2:
+                pair_coefs.setdefault(term_ids, np.zeros(len(base)))
+                pair_coefs[term_ids] += coefs[:, term_id]
+            else:
+                raise ValueError("Term {} has more than two options".format(term))
+        pairs = list(pair_coefs)
+        pair_coefs = np.array([pair_coefs[pair] for pair in pairs]).T
+        return cls(names, base, linear, pairs, pair_coefs, quantile=quantile)
+
+    def reduce(self, values):
+        """Reduce values of ``f`` with a leading sample axis to objectives."""
+        if self.quantile is None:
+            return values.mean(axis=0)
+        return np.quantile(values, self.quantile, axis=0)
+
+    def evaluate(self, X):
+        """Return the objective of each row of ``X``."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        values = self.base[:, None] + self.linear @ X.T
+        if len(self.pairs):
+            values += (
+                self.pair_coefs @ (X[:, self.pairs[:, 0]] * X[:, self.pairs[:, 1]]).T
+            )
+        return self.reduce(values)
+
+
+class OptimumSearch:
+    """Branch-and-bound search for the minimum of a model over a configuration space.
+
+    Options are decided in the order of the compiled
+    :class:`~bayesify.featuremodel.ConfigurationSpace`, whose transitions
+    only lead to partial configurations that can be completed, so the
+    search respects all feature-model constraints. A partial configuration is
+    bounded from below per sample by the value of its decided terms plus the
+    negative parts of the remaining linear gains and pair coefficients; for a
+    quantile objective, the quantile of these bounds bounds the quantile of
+    every completion.
+    """
+
+    def __init__(self, model, space):
+        if model.names != space.names:
+            raise ValueError("The model and the space must have the same options")
+        self.model = model
+        self.space = space
+        n_options = len(space.names)
+        self.order = np.array(space.order, dtype=int)
+        self.undecided = [self.order[level:] for level in range(n_options + 1)]
+        self.neighbors = [[] for _ in range(n_options)]
+        for pair_id, (a, b) in enumerate(model.pairs):
+            self.neighbors[a].append((b, pair_id))
+            self.neighbors[b].append((a, pair_id))
+        self.neighbors = [
+            (
+                np.array([other for other, _ in neighbors], dtype=int),
+                model.pair_coefs[:, [pair_id for _, pair_id in neighbors]],
+            )
+            for neighbors in self.neighbors
+        ]
+        # options without influence need no branching if both values lead to
+        # the same state
+        self.has_influence = np.any(model.linear != 0, axis=0)
+        self.has_influence[model.pairs.ravel()] = True
+        # bound of the pairs whose options are both undecided at each level
+        level_of = np.empty(n_options, dtype=int)
+        level_of[self.order] = np.arange(n_options)
+        self.pair_bounds = np.zeros((len(model.base), n_options + 1))
+        if len(model.pairs):
+            first_level = level_of[model.pairs].min(axis=1)
+            for level, coefs in zip(first_level, np.minimum(model.pair_coefs.T, 0)):
+                self.pair_bounds[:, : level + 1] += coefs[:, None]
+        self.best_value = np.inf
+        self.best_config = None
+        self.n_nodes = 0
+        self.exhausted = False
+
+    def offer(self, configs):
+        """Take the best valid configuration of ``configs`` as incumbent."""
+        configs = np.atleast_2d(np.asarray(configs, dtype=float))
+        configs = configs[self.space.is_valid(configs)]
+        if len(configs) == 0:
+            return
+        values = self.model.evaluate(configs)
+        best_id = int(np.argmin(values))
+        if values[best_id] < self.best_value:
+            self.best_value = float(values[best_id])
+            self.best_config = configs[best_id].copy()
+
+    def branch_and_bound(self, max_nodes=100000):
+        """Search until the optimum is proven or ``max_nodes`` nodes are visited.
+
+        Returns True if the incumbent is proven to be optimal.
+        """
+        self.n_nodes = 0
+        self.exhausted = False
+        self.branch(
+            0,
+            0,
+            self.model.base.copy(),
+            self.model.linear.copy(),
+            np.zeros(len(self.order)),
+            max_nodes,
+        )
+        return not self.exhausted
+
+    def branch(self, level, state, fixed, gains, config, max_nodes):
+        if level == len(self.order):
+            value = float(self.model.reduce(fixed))
+            if value < self.best_value:
+                self.best_value = value
+                self.best_config = config.copy()
+            return
+        # without an incumbent, the first path is completed beyond the budget
+        if self.n_nodes >= max_nodes:
+            self.exhausted = True
+            if self.best_config is not None:
+                return
+        self.n_nodes += 1
+        option = self.order[level]
+        children = self.space.transitions[level][state]
+        values = [value for value in (0, 1) if children[value] >= 0]
+        if (
+            len(values) == 2
+            and children[0] == children[1]
+            and not self.has_influence[option]
+        ):
+            values = [0]
+        candidates = []
+        for value in values:
+            child_fixed, child_gains = fixed, gains
+            if value:
+                child_fixed = fixed + gains[:, option]
+                others, coefs = self.neighbors[option]
+                if len(others):
+                    child_gains = gains.copy()
+                    child_gains[:, others] += coefs
+            undecided = self.undecided[level + 1]
+            bound = float(
+                self.model.reduce(
+                    child_fixed
+                    + np.minimum(child_gains[:, undecided], 0).sum(axis=1)
+                    + self.pair_bounds[:, level + 1]
+                )
+            )
+            candidates.append((bound, value, child_fixed, child_gains))
+        # the more promising child first, so good incumbents are found early
+        candidates.sort(key=lambda candidate: candidate[0])
+        for bound, value, child_fixed, child_gains in candidates:
+            if bound >= self.best_value:
+                continue
+            if self.exhausted and self.best_config is not None:
+                break
+            config[option] = value
+            self.branch(
+                level + 1,
+                children[value],
+                child_fixed,
+                child_gains,
+                config,
+                max_nodes,
+            )
+        config[option] = 0
+
+    def get_moves(self):
+        """Return the flips of single options and of options sharing a clause or term."""
+        n_options = len(self.order)
+        pairs = {tuple(pair) for pair in self.model.pairs.tolist()}
+        for clause in self.space.clauses:
+            pairs.update(itertools.combinations(sorted(i for i, _ in clause), 2))
+        moves = np.zeros((n_options + len(pairs), n_options), dtype=bool)
+        moves[np.arange(n_options), np.arange(n_options)] = True
+        for move, (a, b) in enumerate(sorted(pairs), start=n_options):
+            moves[move, [a, b]] = True
+        return moves
+
+    def local_search(self, max_steps=1000):
+        """Improve the incumbent by steepest descent over valid flips."""
+        moves = self.get_moves()
+        for _ in range(max_steps):
+            candidates = np.logical_xor(self.best_config != 0, moves)
+            candidates = candidates[self.space.is_valid(candidates)]
+            if len(candidates) == 0:
+                return
+            values = self.model.evaluate(candidates)
+            best_id = int(np.argmin(values))
+            if values[best_id] >= self.best_value:
+                return
+            self.best_value = float(values[best_id])
+            self.best_config = candidates[best_id].astype(float)
+
+
+def find_optimum(model, space, starts=None, max_nodes=100000):
+    """Find the configuration of ``space`` that minimizes ``model``.
+
+    ``starts`` are optional configurations, e.g. the best measured one, that
+    serve as first incumbents. Branch and bound visits at most ``max_nodes``
+    nodes; if it cannot prove optimality within them, the incumbent is
+    improved by a local search over valid single and pairwise flips.
+
+    Returns
+    -------
+    value, config, is_optimal : the objective, the configuration in the order
+    of ``space.names`` and whether it is proven to be optimal
+    """
+    if space.count() == 0:
+        raise ValueError("The configuration space is empty")
+    search = OptimumSearch(model, space)
+    if starts is not None:
+        search.offer(starts)
+    is_optimal = search.branch_and_bound(max_nodes)
+    if not is_optimal:
+        search.local_search()
+    return search.best_value, search.best_config, is_optimal
@@ -4,6 +4,8 @@ import datetime
 import itertools
 import string
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from math import sqrt
 import os
 import platform
@@ -11,9 +13,11 @@ import math
 from string import ascii_lowercase
 
 import arviz as az
+import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from scipy.stats import gamma
 import seaborn as sns
 from sklearn.base import BaseEstimator, RegressorMixin, TransformerMixin
@@ -29,7 +33,7 @@ from sklearn.preprocessing import MinMaxScaler
 
 from sklearn.metrics import mean_squared_error
 from sklearn.metrics import r2_score
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.pipeline import make_pipeline
 import bz2
 import pickle
@@ -38,14 +42,16 @@ import sys
 from xml.etree import ElementTree as ET
 
 import numpyro.distributions as dist
-from numpyro.infer import MCMC, NUTS, Predictive
+from numpyro.infer import MCMC, NUTS
 import numpyro
 import jax.numpy as jnp
 import jax
+from jax.experimental import sparse as jax_sparse
 from jax import random
 from pprint import pprint, pformat
 from sklearn.pipeline import make_pipeline
 from bayesify.datahandler import DistBasedRepo
+from bayesify.lasso import GramStatistics, gram_lasso_cv, gram_lasso_path
 from itertools import product, islice
 
 
@@ -63,6 +69,64 @@ def get_n_words(n_options):
     return list(islice(all_words(), n_options))
 
 
+def as_design_matrix(X):
+    """Return ``X`` as a 2D design matrix.
+
+    scipy.sparse inputs stay sparse (CSR or CSC); everything else is
+    converted to a dense 2D NumPy array.
+    """
+    if sparse.issparse(X):
+        return X if X.format in ("csr", "csc") else X.tocsr()
+    return np.atleast_2d(np.asarray(X))
+
+
+def to_jax_design_matrix(data):
+    """Convert a design matrix to a JAX array, using BCOO for sparse inputs."""
+    if isinstance(data, jax_sparse.BCOO):
+        return data
+    if sparse.issparse(data):
+        return jax_sparse.BCOO.from_scipy_sparse(data)
+    return jnp.array(data)
+
+
+def iter_blocks(X, block_size):
+    """Yield consecutive row blocks of at most ``block_size`` rows.
+
+    ``X`` may be an array, a memory-mapped array or a scipy.sparse matrix, which
+    are sliced without copying, or an iterable that already yields 2D blocks.
+    """
+    if not hasattr(X, "shape"):
+        yield from X
+        return
+    for start in range(0, X.shape[0], block_size):
+        yield X[start : start + block_size]
+
+
+def prefetch_blocks(blocks, prepare):
+    """Yield ``prepare(block)`` for each block.
+
+    The next block is prepared in a background thread while the caller
+    processes the current one, so at most two prepared blocks are alive.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = None
+        for block in blocks:
+            upcoming = executor.submit(prepare, block)
+            if pending is not None:
+                yield pending.result()
+            pending = upcoming
+        if pending is not None:
+            yield pending.result()
+
+
+# Posterior predictive samples are drawn for blocks of this many rows.
+SAMPLE_BLOCK_SIZE = 4096
+
+# In automatic mode, the lasso is solved on Gram statistics once the number
+# of rows is at least this multiple of the number of candidate terms.
+GRAM_LASSO_MIN_RATIO = 10
+
+
 class P4Preprocessing(TransformerMixin, BaseEstimator):
     """Preprocess configuration data for pairwise performance modeling.
 
@@ -70,7 +134,26 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
     optionally, generates interaction terms between influential features.  It
     mirrors the preprocessing used in the \*Mastering Uncertainty in Performance
     Estimation of Configurable Software Systems\* paper.
+
+    With ``cache_selection``, fitted selections are cached per fingerprint of
+    the data, the parameters and the fit arguments, so refitting on the same
+    data returns immediately. The cache is shared by all instances, which also
+    covers the clones made by grid searches, and holds the selected terms of
+    the ``SELECTION_CACHE_SIZE`` most recent fits. Fits in Gram mode are not
+    cached, since they also keep the fold statistics for :meth:`partial_fit`.
     """
+
+    SELECTION_CACHE_SIZE = 16
+    # the fitted attributes that transform needs, all others are not cached
+    CACHED_ATTRIBUTES = (
+        "feature_names",
+        "pos_map",
+        "interactions_possible",
+        "final_var_names",
+        "cost_ft_selection",
+    )
+    selection_cache = OrderedDict()
+
     def __init__(
         self,
         inters_only_between_influentials=True,
@@ -78,6 +161,11 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         t_wise=None,
         rnd_seed=0,
         verbose=False,
+        rescreen_fraction=0.5,
+        cv=3,
+        lasso_precompute="auto",
+        lasso_chunk_size=10000,
+        cache_selection=False,
     ):
         """Initialize the preprocessing step.
 
@@ -96,18 +184,37 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         verbose : bool, optional
             If True, the preprocessing will output additional information to the
             console.
+        rescreen_fraction : float, optional
+            Used by :meth:`partial_fit`. The lasso penalty is cross-validated
+            again once the number of rows added since the last screening
+            exceeds this fraction of the rows seen at that screening.
+        cv : int, optional
+            Number of cross-validation folds of the lasso feature selection.
+        lasso_precompute : bool or "auto", optional
+            If True, the cross-validated lasso is solved on per-fold Gram
+            statistics, which are accumulated in chunks of ``lasso_chunk_size``
+            rows without materializing the expanded design matrix. "auto" does
+            so for tall data sets with at least ``GRAM_LASSO_MIN_RATIO`` rows
+            per candidate term.
+        lasso_chunk_size : int, optional
+            Number of rows expanded to candidate terms at once in Gram mode.
+        cache_selection : bool, optional
+            If True, :meth:`fit` reuses and stores selections in the shared
+            selection cache.
+
+        Only parameters are stored here; everything else is set by
+        :meth:`fit` or :meth:`partial_fit`.
         """
-        self.pos_map = None
-        self.cost_ft_selection = None
-        self.final_var_names = None
-        self.interactions_possible = None
-        self.feature_names = None
         self.inters_only_between_influentials = inters_only_between_influentials
         self.prior_broaden_factor = prior_broaden_factor
         self.t_wise = t_wise
         self.rnd_seed = rnd_seed
         self.verbose = verbose
-        self.feature_names_out = None
+        self.rescreen_fraction = rescreen_fraction
+        self.cv = cv
+        self.lasso_precompute = lasso_precompute
+        self.lasso_chunk_size = lasso_chunk_size
+        self.cache_selection = cache_selection
 
     def fit(self, X, y, model_interactions=True, feature_names=None, pos_map=None):
         """Fit the preprocessing model to the data.
@@ -117,7 +224,7 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
 
         Parameters
         ----------
-        X : array-like
+        X : array-like or scipy.sparse matrix
             Training configurations.
         y : array-like
             Observed measurements for ``X``.
@@ -129,7 +236,64 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
             Mapping from feature names to column indices. When provided no names
             will be generated automatically.
         """
-        n_options = len(X[0])
+        X = as_design_matrix(X)
+        if self.cache_selection:
+            fingerprint = joblib.hash(
+                (X, y, self.get_params(), model_interactions, feature_names, pos_map)
+            )
+            if self.load_cached_selection(fingerprint):
+                self.print("Reusing the cached feature selection.")
+                return self
+
+        self.init_feature_space(X, model_interactions, feature_names, pos_map)
+        self.candidate_mapping = self.get_candidate_mapping()
+        self.lasso_fold_stats = None
+
+        start_ft_selection = time.time()
+        self.print("Starting feature and interaction selection.")
+        self.final_var_names, _, _ = self.get_influentials_from_lasso(X, y)
+        self.feature_names_out = list(self.final_var_names.keys())
+        assert self.final_var_names, (
+            "Lasso feature selection selected no options of interactions. "
+            "Hence, we cannot learn any influence!"
+        )
+        self.cost_ft_selection = time.time() - start_ft_selection
+        self.print(
+            "Feature selection with lasso took {}s".format(self.cost_ft_selection)
+        )
+        if self.cache_selection and self.lasso_fold_stats is None:
+            self.store_cached_selection(fingerprint)
+
+        return self
+
+    def load_cached_selection(self, fingerprint):
+        cache = P4Preprocessing.selection_cache
+        if fingerprint not in cache:
+            return False
+        cache.move_to_end(fingerprint)
+        vars(self).update(copy.deepcopy(cache[fingerprint]))
+        self.candidate_mapping = self.get_candidate_mapping()
+        self.lasso_fold_stats = None
+        self.feature_names_out = list(self.final_var_names.keys())
+        return True
+
+    def store_cached_selection(self, fingerprint):
+        cache = P4Preprocessing.selection_cache
+        cache[fingerprint] = copy.deepcopy(
+            {key: getattr(self, key) for key in self.CACHED_ATTRIBUTES}
+        )
+        while len(cache) > P4Preprocessing.SELECTION_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def clear_selection_cache():
+        P4Preprocessing.selection_cache.clear()
+
+    def init_feature_space(
+        self, X, model_interactions=True, feature_names=None, pos_map=None
+    ):
+        """Set option names and decide whether interactions are considered."""
+        n_options = X.shape[1]
         if feature_names:
             self.feature_names = feature_names
             self.pos_map = {opt: idx for idx, opt in enumerate(self.feature_names)}
@@ -144,30 +308,134 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
                 self.interactions_possible = self.t_wise > 1
                 self.print("Interactions possible because t =", self.t_wise)
             else:
-                self.interactions_possible = n_options < len(X)
+                self.interactions_possible = n_options < X.shape[0]
         else:
             self.interactions_possible = False
 
-        start_ft_selection = time.time()
-        self.print("Starting feature and interaction selection.")
-        self.final_var_names, _, _ = self.get_influentials_from_lasso(X, y)
+    def partial_fit(
+        self, X_new, y_new, model_interactions=True, feature_names=None, pos_map=None
+    ):
+        """Update the feature selection with newly measured configurations.
+
+        Instead of the data, the preprocessing keeps the Gram matrix and
+        ``Xᵀy`` of all candidate terms per cross-validation fold. Usually, the
+        lasso is re-solved at the previously selected penalty, warm-started
+        from the previous coefficients. Once enough new rows arrived (see
+        ``rescreen_fraction``), the penalty is cross-validated again over all
+        candidates.
+
+        The first call starts a new stream and fixes the candidate terms as
+        :meth:`fit` would for ``X_new``; ``model_interactions``,
+        ``feature_names`` and ``pos_map`` are only used there. A :meth:`fit`
+        in Gram mode (see ``lasso_precompute``) also starts a stream. Any other
+        :meth:`fit` keeps no fold statistics to update, so a ValueError is
+        raised; start a new stream on a fresh instance, e.g. a clone.
+
+        After each call, ``final_var_names`` holds the selected terms and
+        ``update_times`` the seconds spent per update.
+        """
+        start_update = time.time()
+        X_new = as_design_matrix(X_new)
+        y_new = np.asarray(y_new, dtype=float).ravel()
+        if getattr(self, "lasso_fold_stats", False) is None:
+            raise ValueError(
+                "The last fit kept no fold statistics to update. Fit with "
+                "lasso_precompute=True or partial_fit a fresh instance."
+            )
+        if not hasattr(self, "lasso_fold_stats"):
+            if len(y_new) < self.cv:
+                raise ValueError(
+                    "Need at least {} rows to start partial fitting.".format(self.cv)
+                )
+            self.init_feature_space(X_new, model_interactions, feature_names, pos_map)
+            self.candidate_mapping = self.get_candidate_mapping()
+            n_candidates = len(self.get_candidate_names())
+            self.lasso_fold_stats = [
+                GramStatistics(n_candidates) for _ in range(self.cv)
+            ]
+            self.lasso_alpha = None
+            self.lasso_coef = None
+            self.n_at_screen = 0
+            self.update_times = []
+        candidates_x = self.get_candidate_x(X_new)
+        n_seen = sum(stats.n_samples for stats in self.lasso_fold_stats)
+        fold_ids = (n_seen + np.arange(len(y_new))) % self.cv
+        for fold_id, stats in enumerate(self.lasso_fold_stats):
+            fold_rows = np.nonzero(fold_ids == fold_id)[0]
+            if len(fold_rows):
+                stats.update(candidates_x[fold_rows], y_new[fold_rows])
+        n_seen += len(y_new)
+
+        n_since_screen = n_seen - self.n_at_screen
+        if (
+            self.lasso_alpha is None
+            or n_since_screen > self.rescreen_fraction * self.n_at_screen
+        ):
+            self.print("Re-screening all candidate terms with", n_seen, "rows.")
+            self.lasso_alpha, self.lasso_coef, _, _ = gram_lasso_cv(
+                self.lasso_fold_stats
+            )
+            self.n_at_screen = n_seen
+        else:
+            total_stats = self.lasso_fold_stats[0]
+            for stats in self.lasso_fold_stats[1:]:
+                total_stats = total_stats + stats
+            self.lasso_coef = gram_lasso_path(
+                total_stats, [self.lasso_alpha], coef_init=self.lasso_coef
+            )[:, 0]
+
+        self.final_var_names = {
+            tuple(ft_inter.split()): c
+            for c, ft_inter in zip(self.lasso_coef, self.get_candidate_names())
+            if c != 0.0
+        }
         self.feature_names_out = list(self.final_var_names.keys())
-        assert self.final_var_names, (
-            "Lasso feature selection selected no options of interactions. "
-            "Hence, we cannot learn any influence!"
+        self.cost_ft_selection = time.time() - start_update
+        self.update_times.append(self.cost_ft_selection)
+        self.print("Lasso update took {}s".format(self.cost_ft_selection))
+        return self
+
+    def get_candidate_mapping(self, degree=2):
+        """Return the fitted mapping from options to candidate terms, if any."""
+        if not self.interactions_possible:
+            return None
+        poly_mapping = PolynomialFeatures(
+            degree, interaction_only=True, include_bias=False
         )
-        self.cost_ft_selection = time.time() - start_ft_selection
-        self.print(
-            "Feature selection with lasso took {}s".format(self.cost_ft_selection)
+        poly_mapping.fit(np.zeros((1, len(self.feature_names))))
+        return poly_mapping
+
+    def get_candidate_names(self):
+        if self.candidate_mapping is None:
+            return list(self.feature_names)
+        return list(
+            self.candidate_mapping.get_feature_names_out(
+                input_features=self.feature_names
+            )
         )
 
-        return self
+    def get_candidate_x(self, X):
+        if self.candidate_mapping is None:
+            return X
+        return self.candidate_mapping.transform(X)
 
     def transform(self, X):
-        """Transform ``X`` using the features selected during :meth:`fit`."""
-        rv_names, X = self.get_p4_train_data(X)
+        """Transform ``X`` using the features selected during :meth:`fit`.
+
+        Sparse inputs yield a sparse CSR design matrix.
+        """
+        rv_names, X = self.get_p4_train_data(as_design_matrix(X))
         return X
 
+    def transform_iter(self, X, block_size=10000):
+        """Transform ``X`` block by block.
+
+        Yields the transformed blocks of at most ``block_size`` rows, so memory
+        stays bounded by the block size even for memory-mapped inputs. The next
+        block is transformed while the current one is consumed.
+        """
+        yield from prefetch_blocks(iter_blocks(X, block_size), self.transform)
+
     def fit_transform(self, X, y=None, *fit_args, **fit_params):
         """Fit to the data and return the transformed design matrix."""
         if y is None:
@@ -183,11 +451,25 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         #     return X
 
     def transform_data_to_candidate_features(self, candidate, train_x):
-        """Map a candidate term specification to concrete feature values."""
+        """Map a candidate term specification to concrete feature values.
+
+        Sparse inputs yield a sparse CSR matrix.
+        """
+        train_x = as_design_matrix(train_x)
+        if sparse.issparse(train_x):
+            train_x = train_x.tocsc()
+            columns = []
+            for term in candidate:
+                idx = [self.pos_map[ft] for ft in term]
+                mapped_feature = train_x[:, idx[0]]
+                for i in idx[1:]:
+                    mapped_feature = mapped_feature.multiply(train_x[:, i])
+                columns.append(mapped_feature)
+            return sparse.hstack(columns, format="csr")
         mapped_features = []
         for term in candidate:
             idx = [self.pos_map[ft] for ft in term]
-            selected_cols = np.array(train_x)[:, idx]
+            selected_cols = train_x[:, idx]
             if len(idx) > 1:
                 mapped_feature = np.product(selected_cols, axis=1).ravel()
             else:
@@ -200,8 +482,8 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         if self.verbose:
             print(*args, **kwargs)
 
-    def generate_valid_combinations(self, first_stage_influential_ft, all_ft):
-        """Return all valid interaction pairs given the current dataset."""
+    def generate_valid_combinations(self, X, first_stage_influential_ft, all_ft):
+        """Return all valid interaction pairs given the configurations ``X``."""
         print_flush("Generating Interaction Terms")
         if self.inters_only_between_influentials:
             all_inter_pairs = list(
@@ -214,10 +496,21 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         valid_pairs = []
         print("Computing x values for", len(all_inter_pairs), "interactions")
         sys.stdout.flush()
+        x_np = as_design_matrix(X)
+        is_sparse = sparse.issparse(x_np)
+        if is_sparse:
+            # canonical columns, so equal columns have equal indices and data
+            x_np = x_np.tocsc(copy=True)
+            x_np.eliminate_zeros()
+            x_np.sort_indices()
         for a, b in all_inter_pairs:
             idx_a = self.pos_map[a]
             idx_b = self.pos_map[b]
-            x_np = self.x_shared.get_value()
+            if is_sparse:
+                is_non_constant = self.not_constant_term_sparse(x_np, idx_a, idx_b)
+                if is_non_constant:
+                    valid_pairs.append((a, b))
+                continue
             vals_a_np = np.array(list(x_np[:, idx_a]))
             vals_b_np = np.array(list(x_np[:, idx_b]))
             is_non_constant = self.not_constant_term_cheap(vals_a_np, vals_b_np, x_np)
@@ -258,6 +551,31 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
                 return True
         return False
 
+    def not_constant_term_sparse(self, train_set, idx_a, idx_b):
+        """Return True if the product of two columns is neither constant nor an option.
+
+        ``train_set`` is a CSC matrix without explicit zeros and with sorted
+        indices. Only options with as many non-zeros as the product are
+        compared to it.
+        """
+        vals_prod = train_set[:, idx_a].multiply(train_set[:, idx_b]).tocsc()
+        vals_prod.eliminate_zeros()
+        vals_prod.sort_indices()
+        if vals_prod.nnz == 0:
+            return False
+        if vals_prod.nnz == train_set.shape[0] and np.all(
+            vals_prod.data == vals_prod.data[0]
+        ):
+            return False
+        indptr = train_set.indptr
+        for i in np.flatnonzero(np.diff(indptr) == vals_prod.nnz):
+            col = slice(indptr[i], indptr[i + 1])
+            if np.array_equal(
+                train_set.indices[col], vals_prod.indices
+            ) and np.array_equal(train_set.data[col], vals_prod.data):
+                return False
+        return True
+
     def vector_inner_prod_slow(self, a, b, slice_size=1000):
         """Compute the element-wise product of ``a`` and ``b`` in slices."""
         length = len(a)
@@ -430,15 +748,27 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
 
     def get_p4_train_data(self, X=None):
         vars_and_biases = self.final_var_names
+        is_sparse = sparse.issparse(X)
+        if is_sparse:
+            X = X.tocsc()
+            columns = []
+        else:
+            # columns are read from X in place and written straight into the
+            # design matrix, so memory-mapped inputs are not copied
+            train_data = np.empty(
+                (X.shape[0], len(vars_and_biases)), dtype=X.dtype, order="F"
+            )
         rv_names = []
         inter_strs = []
-        columns = []
-        for var, _ in vars_and_biases.items():
+        for column_id, (var, _) in enumerate(vars_and_biases.items()):
             if len(var) == 1:
                 var_name = var[0]
                 idx_ft = self.pos_map[var_name]
                 vals_ft_np = X[:, idx_ft]
-                columns.append(vals_ft_np)
+                if is_sparse:
+                    columns.append(vals_ft_np)
+                else:
+                    train_data[:, column_id] = vals_ft_np
                 rv_names.append(var_name)
                 inter_str = "influence_{}".format(var_name)
                 inter_strs.append(inter_str)
@@ -449,13 +779,16 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
                 inter_combi_str = "{}&{}".format(a, b)
                 vals_a_np = X[:, idx_a]
                 vals_b_np = X[:, idx_b]
-                vals_prod = self.vector_inner_prod_slow(vals_a_np, vals_b_np)
+                if is_sparse:
+                    columns.append(vals_a_np.multiply(vals_b_np))
+                else:
+                    np.multiply(vals_a_np, vals_b_np, out=train_data[:, column_id])
 
-                columns.append(vals_prod)
                 rv_names.append(inter_combi_str)
                 inter_str = "influence_{}".format(inter_combi_str)
                 inter_strs.append(inter_str)
-        train_data = np.concatenate([c.reshape((-1, 1)) for c in columns], axis=1)
+        if is_sparse:
+            train_data = sparse.hstack(columns, format="csr")
         return rv_names, train_data
 
     def save_spectrum_fig(self, reg_dict_final, err_dict, rv_names):
@@ -582,11 +915,61 @@ class P4Preprocessing(TransformerMixin, BaseEstimator):
         transformed_x = self.get_p4_train_data(np.array(x))[1]
         return prediction_samples
 
+    def use_gram_lasso(self, n_samples):
+        """Decide whether the lasso is solved on Gram statistics."""
+        if self.lasso_precompute == "auto":
+            n_candidates = len(self.get_candidate_names())
+            return n_samples >= GRAM_LASSO_MIN_RATIO * n_candidates
+        return bool(self.lasso_precompute)
+
+    def get_influentials_from_gram(self, X, y):
+        """Cross-validated lasso selection on chunked per-fold Gram statistics.
+
+        Uses the same contiguous folds and alpha grid as ``LassoCV`` but never
+        holds more than ``lasso_chunk_size`` expanded rows in memory. Returns
+        the same triple as :meth:`get_influentials_from_lasso` with ``None``
+        in place of the fitted pipeline.
+        """
+        y = np.asarray(y, dtype=float).ravel()
+        n_candidates = len(self.get_candidate_names())
+        fold_stats = []
+        for _, test_idx in KFold(n_splits=self.cv).split(X):
+            stats = GramStatistics(n_candidates)
+            fold_start, fold_end = test_idx[0], test_idx[-1] + 1
+            for start in range(fold_start, fold_end, self.lasso_chunk_size):
+                end = min(start + self.lasso_chunk_size, fold_end)
+                stats.update(self.get_candidate_x(X[start:end]), y[start:end])
+            fold_stats.append(stats)
+        self.lasso_alpha, self.lasso_coef, _, _ = gram_lasso_cv(fold_stats)
+        self.lasso_fold_stats = fold_stats
+        self.n_at_screen = len(y)
+        self.update_times = []
+
+        inf_idx = np.flatnonzero(self.lasso_coef)
+        pruned_chunks = []
+        for start in range(0, len(y), self.lasso_chunk_size):
+            chunk_x = self.get_candidate_x(X[start : start + self.lasso_chunk_size])
+            pruned_chunks.append(chunk_x[:, inf_idx])
+        if sparse.issparse(X):
+            pruned_x = sparse.vstack(pruned_chunks, format="csr")
+        else:
+            pruned_x = np.concatenate(pruned_chunks)
+
+        ft_inters_and_influences = {
+            tuple(ft_inter.split()): c
+            for c, ft_inter in zip(self.lasso_coef, self.get_candidate_names())
+            if c != 0.0
+        }
+        return ft_inters_and_influences, None, pruned_x
+
     def get_influentials_from_lasso(self, X, y, degree=2):
-        train_x_2d = np.atleast_2d(X)
+        train_x_2d = as_design_matrix(X)
         train_y = y
+        if degree == 2 and self.use_gram_lasso(train_x_2d.shape[0]):
+            self.print("Solving the lasso path on Gram statistics.")
+            return self.get_influentials_from_gram(train_x_2d, train_y)
         lars = LassoCV(
-            cv=3,
+            cv=self.cv,
             positive=False,
             max_iter=5000,
         )  # .fit(train_x_2d, train_y)
@@ -777,6 +1160,7 @@ class PyroMCMCRegressor:
         mcmc_samples: int = 1000,
         mcmc_tune=1000,
         n_chains=1,
+        prediction_cache_size=0,
     ):
         """Create a new regressor.
 
@@ -788,17 +1172,26 @@ class PyroMCMCRegressor:
             Number of warm-up steps for the sampler.
         n_chains : int
             How many chains to run in parallel.
+        prediction_cache_size : int
+            Number of rows whose predictions :meth:`predict` keeps, see
+            :meth:`predict_cached`. 0 disables the cache.
         """
         self.error_prior = None
         self.infl_prior = None
         self.base_prior = None
         self.coef_ = None
         self.samples = None
+        self.posterior_moments = None
+        self.posterior_cov_factor = None
         # self.grammar = grammar
         self.mcmc_samples = mcmc_samples
         self.mcmc_tune = mcmc_tune
         self.n_chains = n_chains
         self.mcmc = None
+        self.prediction_cache_size = prediction_cache_size
+        self.prediction_cache = OrderedDict()
+        self.prediction_cache_hits = 0
+        self.prediction_cache_misses = 0
 
     def model(
         self,
@@ -817,7 +1210,7 @@ class PyroMCMCRegressor:
         self.error_prior = error_prior
         if y is not None:
             y = jnp.array(y)
-        data = jnp.array(data)
+        data = to_jax_design_matrix(data)
         base = numpyro.sample(
             "base",
             # dist.Normal(0, 1)  # dist.Normal(self.prior_root_mean, self.prior_root_std)
@@ -834,9 +1227,7 @@ class PyroMCMCRegressor:
             #     self.prior_coef_stdvs,
             # ),
         )
-        mat_infl = rnd_influences.reshape(-1, 1)
-        product = jnp.matmul(data, mat_infl).reshape(-1)
-        result = product + base
+        result = get_linear_prediction(data, base, rnd_influences)
         error_var = numpyro.sample(
             # "error", dist.Gamma(self.gamma_alpha, self.gamma_beta)
             "error",
@@ -844,7 +1235,9 @@ class PyroMCMCRegressor:
             error_prior,
         )
         with numpyro.plate("data_vectorized", len(result)):
-            obs = numpyro.sample("measurements", dist.Normal(result, error_var), obs=y)
+            obs = numpyro.sample(
+                "measurements", get_measurement_dist(result, error_var), obs=y
+            )
         return obs
 
     def fit(
@@ -886,7 +1279,7 @@ class PyroMCMCRegressor:
         )
         mcmc.run(
             rng_key,
-            X,
+            to_jax_design_matrix(X),
             y,
             base_prior=base_prior,
             infl_prior=coef_prior,
@@ -899,6 +1292,86 @@ class PyroMCMCRegressor:
         self.mcmc = mcmc
         self.update_coefs()
 
+    def refit(self, X, y, random_key=0, mcmc_samples=None, mcmc_tune=None):
+        """Refit to a grown training set, starting from the current posterior.
+
+        The priors of the last :meth:`fit` are kept, so the costly prior
+        spectrum is not recomputed. A new chain starts from the last state of
+        the previous one with its adapted step size and mass matrix and runs a
+        short warm-up of ``mcmc_tune`` steps, by default a quarter of the
+        regressor's ``mcmc_tune``, to adapt them to the new data. Falls back to
+        :meth:`fit` if the model is not fitted yet or ``X`` has another number
+        of columns.
+        """
+        if self.mcmc is None or X.shape[1] != len(self.rv_names):
+            self.fit(X, y, random_key=random_key, mcmc_samples=mcmc_samples)
+            return
+        last_state = self.mcmc.last_state
+        adapt_state = last_state.adapt_state
+        if self.mcmc.num_chains > 1:
+            # the kernel takes one step size and mass matrix for all chains
+            adapt_state = jax.tree_util.tree_map(lambda x: x[0], adapt_state)
+        # a new kernel, as the one of the last run keeps its potential bound to
+        # the data of that run
+        nuts_kernel = NUTS(
+            self.model,
+            step_size=float(adapt_state.step_size),
+            inverse_mass_matrix=adapt_state.inverse_mass_matrix,
+        )
+        mcmc = MCMC(
+            nuts_kernel,
+            num_samples=mcmc_samples if mcmc_samples else self.mcmc.num_samples,
+            num_warmup=mcmc_tune if mcmc_tune else max(self.mcmc_tune // 4, 1),
+            num_chains=self.mcmc.num_chains,
+        )
+        mcmc.run(
+            random.PRNGKey(random_key),
+            to_jax_design_matrix(X),
+            y,
+            init_params=last_state.z,
+            base_prior=self.base_prior,
+            infl_prior=self.infl_prior,
+            error_prior=self.error_prior,
+        )
+        self.samples = mcmc.get_samples()
+        self.mcmc = mcmc
+        self.update_coefs()
+
+    def get_posterior_moments(self):
+        """Return the posterior mean and covariance of ``(base, *coefs)``.
+
+        Also returns the posterior mean of the noise variance. A prediction
+        ``base + x @ coefs`` then has the mean ``[1, *x] @ mean`` and the
+        variance ``[1, *x] @ cov @ [1, *x]``, which scores many candidates in
+        one pass without drawing predictive samples.
+        """
+        if self.posterior_moments is None:
+            weights = np.column_stack(
+                [np.asarray(self.samples["base"]), np.asarray(self.samples["coefs"])]
+            ).astype(float)
+            noise_var = float(np.mean(np.asarray(self.samples["error"]) ** 2))
+            self.posterior_moments = (
+                weights.mean(axis=0),
+                np.atleast_2d(np.cov(weights, rowvar=False)),
+                noise_var,
+            )
+        return self.posterior_moments
+
+    def get_posterior_cov_factor(self):
+        """Return a factor ``F`` of the posterior covariance with ``F @ F.T == cov``.
+
+        Rows follow the order of :meth:`get_posterior_moments`. The covariance
+        of few draws may be singular, so the factor comes from its
+        eigendecomposition instead of a Cholesky decomposition.
+        """
+        if self.posterior_cov_factor is None:
+            _, cov, _ = self.get_posterior_moments()
+            eigenvalues, eigenvectors = np.linalg.eigh(cov)
+            self.posterior_cov_factor = eigenvectors * np.sqrt(
+                np.maximum(eigenvalues, 0)
+            )
+        return self.posterior_cov_factor
+
     def update_coefs(self):
         """
         Uses the current inferred trace to compute self.coef_ and self.coef_samples_
@@ -910,6 +1383,9 @@ class PyroMCMCRegressor:
             for i, varname in enumerate(self.rv_names)
         }
         relative_error_samples = np.array(self.samples["base"])
+        self.posterior_moments = None
+        self.posterior_cov_factor = None
+        self.prediction_cache.clear()
         self.coef_samples_ = {
             "root": root_samples,
             "influences": influence_dict,
@@ -1047,47 +1523,289 @@ class PyroMCMCRegressor:
             tuples.extend([("mcmc", rv_name, float(val)) for val in rv_samples.numpy()])
         return tuples
 
+    def get_draws(self, n_samples: int = None, rnd_key=0):
+        """Return ``n_samples`` posterior draws, all draws if it is not given.
+
+        More draws than available are drawn with replacement.
+        """
+        if not n_samples:
+            return self.samples
+        n_draws = len(self.samples["base"])
+        rng = np.random.RandomState(rnd_key)
+        draw_ids = rng.choice(n_draws, n_samples, replace=n_samples > n_draws)
+        return {name: values[draw_ids] for name, values in self.samples.items()}
+
     def _predict_samples(self, X, n_samples: int = None, rnd_key=0):
-        # Predictive(model_fast, guide=guide, num_samples=100,
-        # return_sites=("measurements",))
-        n = n_samples if n_samples else self.samples
-        prngkey = random.PRNGKey(rnd_key)
-        pred = Predictive(self.model, num_samples=n)
-        posterior_samples = pred(prngkey, X, None)
-        y_pred = posterior_samples["measurements"]
-        y_pred_np = np.array(y_pred)
-        return y_pred_np
-
-    def predict(self, X, n_samples: int = None, ci: float = None):
+        # samples the measurements site of the model for each draw with the
+        # model's own helpers; unlike numpyro's Predictive, this does not trace
+        # and compile the model anew on every call
+        draws = self.get_draws(n_samples, rnd_key)
+        y_mean = get_linear_prediction(
+            as_design_matrix(X),
+            np.asarray(draws["base"], dtype=float),
+            np.asarray(draws["coefs"], dtype=float),
+        )
+        # the sampling is compiled once per shape, so rows are sampled in
+        # blocks of SAMPLE_BLOCK_SIZE and the last block is padded to a power
+        # of two of at least 256 rows
+        error = jnp.asarray(draws["error"])[:, None]
+        y_pred = np.empty(y_mean.shape)
+        n_rows = y_mean.shape[1]
+        starts = range(0, n_rows, SAMPLE_BLOCK_SIZE)
+        keys = random.split(random.PRNGKey(rnd_key), max(len(starts), 1))
+        for key, start in zip(keys, starts):
+            block = y_mean[:, start : start + SAMPLE_BLOCK_SIZE]
+            n_block_rows = block.shape[1]
+            n_padded = max(1 << (n_block_rows - 1).bit_length(), 256)
+            block = np.pad(block, ((0, 0), (0, n_padded - n_block_rows)))
+            y_pred[:, start : start + n_block_rows] = sample_measurements(
+                key, block, error
+            )[:, :n_block_rows]
+        return y_pred
+
+    def predict_moments(self, X):
+        """
+        Returns the mean and standard deviation of the posterior predictive distribution of each row of ``X``.
+
+        Both follow from the sample moments of ``base``, ``coefs`` and ``error``
+        by the law of total variance: the variance of ``base + X @ coefs`` over
+        the draws plus the mean of the squared error. No samples are drawn per row.
+        """
+        X = as_design_matrix(X)
+        mean, _, noise_var = self.get_posterior_moments()
+        cov_factor = self.get_posterior_cov_factor()
+        y_mean = np.asarray(X @ mean[1:]).ravel() + mean[0]
+        projected = np.asarray(X @ cov_factor[1:]) + cov_factor[0]
+        y_var = np.einsum("ij,ij->i", projected, projected) + noise_var
+        return y_mean, np.sqrt(y_var)
+
+    def predict(
+        self,
+        X,
+        n_samples: int = None,
+        ci: float = None,
+        return_std=False,
+        mode="samples",
+    ):
         """
         Performs a prediction conforming to the sklearn interface.
 
         Parameters
         ----------
-        X : Array-like data
+        X : Array-like data or scipy.sparse matrix
         n_samples : number of posterior predictive samples to return for each prediction
         ci : value between 0 and 1 representing the desired confidence of returned confidence intervals. E.g., ci= 0.8 will generate 80%-confidence intervals
+        return_std : if True, the standard deviation of the posterior predictive distribution of each row is returned, too
+        mode : "samples" draws posterior predictive samples per row; "moments" computes the predictive mean and standard deviation with :meth:`predict_moments` and confidence intervals from a normal approximation, which is much cheaper and does not take n_samples
 
         Returns
         -------
          - a scalar if only x is specified
          - a set of posterior predictive samples of size n_samples if is given and n_samples > 0
          - a set of pairs, representing lower and upper bounds of confidence intervals for each prediction if ci is given
+         - a tuple of the above and the standard deviations if return_std is True
 
+        If the regressor has a ``prediction_cache_size``, dense inputs are
+        predicted through :meth:`predict_cached`.
         """
-        if not n_samples:
-            n_samples = 500
-            y_samples = self._predict_samples(X, n_samples=n_samples)
-            y_pred = np.mean(az.hdi(y_samples, hdi_prob=0.01), axis=1)
-        else:
-            y_samples = self._predict_samples(X, n_samples=n_samples)
-            if ci:
-                assert_ci(ci)
-                y_pred = az.hdi(y_samples, hdi_prob=ci)
+        if self.prediction_cache_size and not sparse.issparse(X):
+            return self.predict_cached(X, n_samples, ci, return_std, mode)
+        return self._predict(X, n_samples, ci, return_std, mode)
+
+    def _predict(self, X, n_samples, ci, return_std, mode):
+        if ci:
+            assert_ci(ci)
+        if mode == "moments":
+            if n_samples:
+                raise ValueError("Moments mode does not draw samples")
+            y_mean, y_std = self.predict_moments(X)
+            y_pred = get_normal_interval(y_mean, y_std, ci) if ci else y_mean
+        elif mode == "samples":
+            if not n_samples:
+                n_samples = 500
+                y_samples = self._predict_samples(X, n_samples=n_samples)
+                y_pred = np.mean(az.hdi(y_samples, hdi_prob=0.01), axis=1)
             else:
-                y_pred = y_samples
+                y_samples = self._predict_samples(X, n_samples=n_samples)
+                if ci:
+                    y_pred = az.hdi(y_samples, hdi_prob=ci)
+                else:
+                    y_pred = y_samples
+            y_std = y_samples.std(axis=0)
+        else:
+            raise ValueError("Unknown prediction mode {}".format(mode))
+        if return_std:
+            return y_pred, y_std
         return y_pred
 
+    def predict_cached(
+        self,
+        X,
+        n_samples: int = None,
+        ci: float = None,
+        return_std=False,
+        mode="samples",
+    ):
+        """
+        Predicts like :meth:`predict`, reusing the predictions of rows predicted before.
+
+        Each row's prediction is cached under the bytes of the row, bit-packed
+        for binary configurations, and the requested output kind, i.e. the
+        arguments besides ``X``. Only rows that miss the cache are predicted,
+        in one batch. The ``prediction_cache_size`` least recently used rows
+        are kept, and the cache is cleared whenever the posterior changes by
+        :meth:`fit` or :meth:`refit`. Repeated rows get the same samples, so the
+        cache pays off most for sampled predictions.
+        """
+        X = np.atleast_2d(np.asarray(as_design_matrix(X)))
+        kind = (X.shape[1], mode, n_samples or None, ci or None, bool(return_std))
+        # sampled outputs have one column per row, all others one row per row
+        is_samples = mode == "samples" and bool(n_samples) and not ci
+        keys = [(kind, row) for row in pack_rows(X)]
+        cache = self.prediction_cache
+        missing = {}
+        for row_id, key in enumerate(keys):
+            if key in cache:
+                cache.move_to_end(key)
+            else:
+                missing.setdefault(key, row_id)
+        self.prediction_cache_hits += len(keys) - len(missing)
+        self.prediction_cache_misses += len(missing)
+        if missing:
+            outputs = self._predict(
+                X[list(missing.values())], n_samples, ci, return_std, mode
+            )
+            outputs = list(outputs) if return_std else [outputs]
+            if is_samples:
+                outputs[0] = outputs[0].T
+            for i, key in enumerate(missing):
+                cache[key] = tuple(output[i] for output in outputs)
+        # read before evicting, so batches larger than the cache are complete
+        rows = [cache[key] for key in keys]
+        while len(cache) > self.prediction_cache_size:
+            cache.popitem(last=False)
+        outputs = [np.array(values) for values in zip(*rows)]
+        if is_samples:
+            outputs[0] = outputs[0].T
+        return tuple(outputs) if return_std else outputs[0]
+
+    def get_prediction_cache_stats(self):
+        """Return the hits and misses of the prediction cache and its size."""
+        return {
+            "hits": self.prediction_cache_hits,
+            "misses": self.prediction_cache_misses,
+            "size": len(self.prediction_cache),
+            "max_size": self.prediction_cache_size,
+        }
+
+    def predict_iter(
+        self,
+        X,
+        block_size=10000,
+        n_samples: int = 500,
+        ci: float = None,
+        mode="samples",
+    ):
+        """
+        Predicts ``X`` block by block, e.g., for all configurations of a system.
+
+        Parameters
+        ----------
+        X : Array-like data, memory-mapped array, scipy.sparse matrix or an iterable of 2D blocks
+        block_size : maximum number of rows predicted at once
+        n_samples : number of posterior predictive samples drawn per row
+        ci : value between 0 and 1 representing the desired confidence of returned confidence intervals
+        mode : "samples" or "moments", as in :meth:`predict`; with "moments", n_samples is ignored
+
+        Yields
+        -------
+        A dictionary per block with the predictive mean of each row under "mean"
+        and, if ci is given, lower and upper confidence bounds under "ci".
+        Only one block of samples is held in memory; the next block is read and
+        converted while the current one is predicted.
+
+        In "samples" mode, "mean" is the mean of the samples, not the point
+        estimate of :meth:`predict`, which is the midpoint of the 1%-HDI. For
+        skewed predictive distributions, the two differ.
+        """
+        if ci:
+            assert_ci(ci)
+        if mode == "moments":
+            for block in prefetch_blocks(iter_blocks(X, block_size), as_design_matrix):
+                y_mean, y_std = self.predict_moments(block)
+                summary = {"mean": y_mean}
+                if ci:
+                    summary["ci"] = get_normal_interval(y_mean, y_std, ci)
+                yield summary
+            return
+        if mode != "samples":
+            raise ValueError("Unknown prediction mode {}".format(mode))
+        prepared_blocks = prefetch_blocks(iter_blocks(X, block_size), as_design_matrix)
+        for block_id, block in enumerate(prepared_blocks):
+            y_samples = self._predict_samples(
+                block, n_samples=n_samples, rnd_key=block_id
+            )
+            summary = {"mean": y_samples.mean(axis=0)}
+            if ci:
+                summary["ci"] = az.hdi(y_samples, hdi_prob=ci)
+            yield summary
+
+    def predict_delta(
+        self,
+        X_a,
+        X_b,
+        n_samples: int = None,
+        ci: float = None,
+        mode="samples",
+        rnd_key=0,
+    ):
+        """
+        Predicts the performance differences between the rows of ``X_a`` and ``X_b``.
+
+        The difference ``X_a - X_b`` is formed once in design space and
+        multiplied with the posterior draws of the influences, so both sides of
+        a pair share the same draws and their correlation is kept; the base
+        cancels. The measurement noise is not included: the differences are
+        the ones of the expected performances.
+
+        Parameters
+        ----------
+        X_a, X_b : Array-like data or scipy.sparse matrices of the same shape, one pair per row
+        n_samples : number of posterior draws to use; by default all draws. More draws than available are drawn with replacement
+        ci : value between 0 and 1 representing the desired confidence of returned confidence intervals
+        mode : "samples" uses the posterior draws, "moments" the posterior mean and covariance of the influences, which costs one matrix product
+        rnd_key : seed for choosing the draws if ``n_samples`` is given
+
+        Returns
+        -------
+         - with mode="samples", difference samples of shape (n_samples, n_pairs), or lower and upper HDI bounds per pair if ci is given
+         - with mode="moments", the mean and standard deviation of each difference, or lower and upper bounds of the normal confidence interval if ci is given
+
+        """
+        if ci:
+            assert_ci(ci)
+        X_a, X_b = as_design_matrix(X_a), as_design_matrix(X_b)
+        if X_a.shape != X_b.shape:
+            raise ValueError(
+                "Shapes of X_a {} and X_b {} differ".format(X_a.shape, X_b.shape)
+            )
+        delta = X_a - X_b
+        if mode == "moments":
+            mean, _, _ = self.get_posterior_moments()
+            delta_mean = np.asarray(delta @ mean[1:]).ravel()
+            projected = np.asarray(delta @ self.get_posterior_cov_factor()[1:])
+            delta_std = np.sqrt(np.einsum("ij,ij->i", projected, projected))
+            if ci:
+                return get_normal_interval(delta_mean, delta_std, ci)
+            return delta_mean, delta_std
+        if mode != "samples":
+            raise ValueError("Unknown prediction mode {}".format(mode))
+        coef_samples = np.asarray(self.get_draws(n_samples, rnd_key)["coefs"])
+        delta_samples = np.asarray(delta @ coef_samples.T).T
+        if ci:
+            return az.hdi(delta_samples, hdi_prob=ci)
+        return delta_samples
+
     def coef_ci(self, ci: float):
         """
         Returns confidence intervals with custom confidence for p
@@ -1201,6 +1919,53 @@ def assert_ci(ci):
     assert 0 < ci < 1, "Confidence should be given 0 < ci < 1"
 
 
+def get_linear_prediction(X, base, coefs):
+    """Return ``base + X @ coefs`` of the regression model.
+
+    For a stack of draws, with ``base`` of shape ``(n_draws,)`` and ``coefs``
+    of shape ``(n_draws, n_terms)``, the result has shape ``(n_draws, n_rows)``.
+    """
+    coefs_2d = coefs.reshape(-1, coefs.shape[-1])
+    y_mean = (X @ coefs_2d.T).T + base.reshape(-1, 1)
+    return y_mean.reshape(base.shape + (X.shape[0],))
+
+
+def get_measurement_dist(y_mean, error):
+    """Return the distribution of measurements around ``y_mean``."""
+    return dist.Normal(y_mean, error)
+
+
+@jax.jit
+def sample_measurements(key, y_mean, error):
+    """Draw one measurement per entry of ``y_mean``."""
+    return get_measurement_dist(y_mean, error).sample(key)
+
+
+def pack_rows(X):
+    """Return one bytes key per row of ``X``, bit-packed if the row is binary.
+
+    The encoding only depends on the row itself, so a row gets the same key in
+    every batch. Packed keys are shorter than unpacked ones and never equal.
+    """
+    # adding 0.0 maps -0.0 to 0.0 so that equal rows get equal keys
+    X = np.ascontiguousarray(X, dtype=float) + 0.0
+    is_binary = np.all((X == 0) | (X == 1), axis=1)
+    keys = np.empty(len(X), dtype=object)
+    for row_ids, rows in (
+        (np.flatnonzero(is_binary), np.packbits(X[is_binary] != 0, axis=1)),
+        (np.flatnonzero(~is_binary), X[~is_binary]),
+    ):
+        row_type = np.dtype((np.void, rows.shape[1] * rows.itemsize))
+        keys[row_ids] = rows.view(row_type).ravel().tolist()
+    return keys.tolist()
+
+
+def get_normal_interval(mean, std, ci):
+    """Return the central ``ci`` interval of normal distributions as (n, 2) bounds."""
+    half_width = norm.ppf(0.5 + ci / 2) * std
+    return np.column_stack([mean - half_width, mean + half_width])
+
+
 class SaverHelper:
     def __init__(self, path, dpi=800, fig_pre="fig"):
         self.path = path
@@ -0,0 +1,76 @@
+"""Time of an active-learning step on a pool of a million candidates.
+
+Draws ``n_pool`` random configurations (default 10⁶) of 40 options, whose
+performance is a sparse pairwise function plus noise, fits P4Preprocessing
+and a PyroMCMCRegressor to 100 random measurements and runs ``n_steps``
+steps (default 3) with batches of 10. Each step scores the whole pool,
+chooses a diverse batch, measures it and refits incrementally.
+
+    PYTHONPATH=. python benchmarks/active_learning.py [n_pool] [n_steps]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bayesify.activelearning import ActiveLearner
+from bayesify.pairwise import P4Preprocessing, PyroMCMCRegressor
+
+N_OPTIONS = 40
+
+
+def make_oracle(seed=0):
+    rng = np.random.RandomState(seed)
+    linear = rng.randn(N_OPTIONS) * (rng.rand(N_OPTIONS) < 0.3) * 5
+    pairs = rng.choice(N_OPTIONS, size=(5, 2), replace=False)
+    pair_weights = rng.randn(5) * 5
+
+    def oracle(configs):
+        X = np.array(configs)
+        ys = 100 + X @ linear + (X[:, pairs[:, 0]] * X[:, pairs[:, 1]]) @ pair_weights
+        return (ys + rng.randn(len(ys)) * 0.1).tolist()
+
+    return oracle
+
+
+def main():
+    args = sys.argv[1:]
+    n_pool = int(float(args[0])) if args else 10**6
+    n_steps = int(args[1]) if len(args) > 1 else 3
+    pool = (np.random.RandomState(1).rand(n_pool, N_OPTIONS) < 0.5).astype(float)
+    learner = ActiveLearner(
+        PyroMCMCRegressor(mcmc_samples=500, mcmc_tune=500),
+        make_oracle(),
+        pool,
+        acquisition="ei",
+        preprocessing=P4Preprocessing(),
+        seed=0,
+    )
+    start = time.time()
+    learner.run(n_steps=0, initial_size=100)
+    print("initial fit:      {:8.2f}s".format(time.time() - start))
+    for _ in range(n_steps):
+        start = time.time()
+        scores = learner.score()
+        score_time = time.time() - start
+        start = time.time()
+        ids = learner.select_batch(10)
+        select_time = time.time() - start
+        start = time.time()
+        learner.measure(ids)
+        learner.fit()
+        print(
+            "score {} candidates: {:6.2f}s, select batch: {:6.2f}s, refit: {:6.2f}s, "
+            "{} terms, best {:.2f}".format(
+                len(scores),
+                score_time,
+                select_time,
+                time.time() - start,
+                len(learner.term_names),
+                min(learner.ys),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Time of the alternative-group detection for several hundred options.
+
+Generates configurations with free options and alternative groups and
+detects the groups with ``find_alternative_features``. With ``--legacy``, the
+former pairwise pandas implementation runs as well and both results are
+compared.
+
+    PYTHONPATH=. python benchmarks/alternative_groups.py [--legacy]
+"""
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from bayesify.datahandler import find_alternative_features
+
+N_ROWS = 5000
+OPTION_COUNTS = [100, 200, 400]
+
+
+def make_configs(n_options, n_rows=N_ROWS, seed=0):
+    rng = np.random.RandomState(seed)
+    columns = []
+    while len(columns) < n_options:
+        if rng.rand() < 0.5:
+            columns.append(rng.randint(0, 2, size=n_rows))
+        else:
+            group_size = rng.randint(2, 6)
+            choice = rng.randint(0, group_size, size=n_rows)
+            columns += [(choice == k).astype(int) for k in range(group_size)]
+    configs = np.array(columns[:n_options], dtype=float).T
+    names = ["opt{:03d}".format(i) for i in rng.permutation(n_options)]
+    return configs, names
+
+
+def legacy_find_alternative_features(configs, ft_names):
+    df_configs = pd.DataFrame(configs, columns=ft_names)
+    alternative_ft_names = []
+    group_candidates = {}
+    for col in df_configs.columns:
+        filter_on = df_configs[col] == 1
+        group_candidates[col] = []
+        for other_col in df_configs.columns:
+            if other_col != col:
+                values_if_col_on = df_configs[filter_on][other_col].unique()
+                if len(values_if_col_on) == 1 and values_if_col_on[0] == 0:
+                    group_candidates[col].append(other_col)
+    G = nx.Graph()
+    for ft, alternative_candidates in group_candidates.items():
+        for candidate in alternative_candidates:
+            if ft in group_candidates[candidate]:
+                G.add_edge(ft, candidate)
+    cliques_remaining = True
+    while cliques_remaining:
+        cliques_remaining = False
+        for clique in nx.find_cliques(G):
+            sums_per_row = df_configs[clique].sum(axis=1).unique()
+            if len(sums_per_row) == 1 and sums_per_row[0] == 1.0:
+                delete_ft = sorted(clique)[0]
+                alternative_ft_names.append(delete_ft)
+                df_configs.drop(delete_ft, inplace=True, axis=1)
+                for c in clique:
+                    G.remove_node(c)
+                cliques_remaining = True
+                break
+    return alternative_ft_names
+
+
+def timed(find, configs, names):
+    start = time.time()
+    result = find(configs, names)
+    return time.time() - start, result
+
+
+def main():
+    legacy = "--legacy" in sys.argv
+    print(
+        "{:>8} {:>8} {:>12} {:>12} {:>6}".format(
+            "options", "groups", "matrix [s]", "legacy [s]", "same"
+        )
+    )
+    for n_options in OPTION_COUNTS:
+        configs, names = make_configs(n_options)
+        t_new, found = timed(find_alternative_features, configs, names)
+        t_old, same = float("nan"), "-"
+        if legacy:
+            t_old, found_old = timed(legacy_find_alternative_features, configs, names)
+            same = str(found == found_old)
+        print(
+            "{:>8} {:>8} {:>12.3f} {:>12.3f} {:>6}".format(
+                n_options, len(found), t_new, t_old, same
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compile, count, sample and enumerate a large configuration space.
+
+Generates a feature model with optional options, nested children,
+alternative groups and cross-tree exclusions whose space holds about
+``n_configs`` valid configurations (default 10⁸). All configurations are
+enumerated block by block and scored with a random pairwise model to find
+the optimum, as a batched prediction would.
+
+    PYTHONPATH=. python benchmarks/config_space.py [n_configs]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bayesify.featuremodel import FeatureModel
+
+BLOCK_SIZE = 2**16
+
+
+def write_feature_model(folder, n_configs, seed=0):
+    rng = np.random.RandomState(seed)
+    options = []  # (name, parent, optional, excluded)
+    size = 1
+    while size < n_configs:
+        kind = rng.randint(3)
+        i = len(options)
+        if kind == 0:
+            options.append(("o{}".format(i), "root", True, []))
+            size *= 2
+        elif kind == 1:
+            # optional parent with an optional child
+            options.append(("p{}".format(i), "root", True, []))
+            options.append(("c{}".format(i), "p{}".format(i), True, []))
+            size *= 3
+        else:
+            group = ["g{}_{}".format(i, k) for k in range(rng.randint(2, 5))]
+            for name in group:
+                others = [other for other in group if other != name]
+                options.append((name, "root", False, others))
+            size *= len(group)
+    # cross-tree exclusions between free options
+    free = [name for name, parent, optional, _ in options if name[0] == "o"]
+    exclusions = set()
+    for _ in range(len(free) // 4):
+        a, b = rng.choice(free, 2, replace=False)
+        exclusions.add((a, b))
+    path = os.path.join(folder, "FeatureModel.xml")
+    with open(path, "w") as f:
+        f.write("<vm><binaryOptions>\n")
+        f.write("<configurationOption><name>root</name></configurationOption>\n")
+        for name, parent, optional, excluded in options:
+            excluded = excluded + [b for a, b in exclusions if a == name]
+            f.write(
+                "<configurationOption><name>{}</name><parent>{}</parent>"
+                "<excludedOptions>{}</excludedOptions><optional>{}</optional>"
+                "</configurationOption>\n".format(
+                    name,
+                    parent,
+                    "".join("<options>{}</options>".format(o) for o in excluded),
+                    optional,
+                )
+            )
+        f.write("</binaryOptions></vm>\n")
+    return path
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    n_configs = int(float(args[0])) if args else 10**8
+    with tempfile.TemporaryDirectory() as folder:
+        fm = FeatureModel.from_xml(write_feature_model(folder, n_configs))
+    start = time.time()
+    space = fm.get_space()
+    print(
+        "{} options, {} clauses, {} valid configurations".format(
+            len(fm.names), len(fm.clauses), space.count()
+        )
+    )
+    print("compile and count: {:8.2f}s".format(time.time() - start))
+
+    start = time.time()
+    samples = space.sample(10**5, seed=0)
+    print("10⁵ samples:       {:8.2f}s".format(time.time() - start))
+    assert fm.is_valid(samples).all()
+
+    rng = np.random.RandomState(1)
+    n = len(fm.names)
+    linear = rng.randn(n)
+    pairs = rng.randint(0, n, size=(n, 2))
+    pair_weights = rng.randn(n)
+    start = time.time()
+    score_time = 0.0
+    best, best_y = None, np.inf
+    for block in space.iter_blocks(BLOCK_SIZE):
+        score_start = time.time()
+        ys = block @ linear + (block[:, pairs[:, 0]] * block[:, pairs[:, 1]]) @ (
+            pair_weights
+        )
+        i = int(np.argmin(ys))
+        if ys[i] < best_y:
+            best, best_y = block[i], ys[i]
+        score_time += time.time() - score_start
+    print("enumerate:         {:8.2f}s".format(time.time() - start - score_time))
+    print("score:             {:8.2f}s".format(score_time))
+    print("optimum {:.3f}, valid: {}".format(best_y, bool(fm.is_valid([best])[0])))
+
+
+if __name__ == "__main__":
+    main()
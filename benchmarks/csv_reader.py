@@ -0,0 +1,122 @@
+"""Load time and peak memory of the measurements.csv reader.
+
+Generates a measurements.csv with ``n_rows`` rows (default 4·10⁶, about
+800 MB with 100 options; every row takes 200 bytes in the file and 800 bytes
+in the configuration matrix) and loads it in a child process, once with the
+chunked reader of ConfigSysProxy and, with ``--legacy``, once with the former
+reader that inferred the dtypes and built a dict of row tuples.
+
+    PYTHONPATH=. python benchmarks/csv_reader.py [n_rows] [--legacy]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bayesify.datahandler import ConfigSysProxy
+
+N_OPTIONS = 100
+BLOCK_ROWS = 100000
+
+
+def write_measurements(folder, n_rows, n_options=N_OPTIONS, seed=0):
+    rng = np.random.RandomState(seed)
+    names = ["opt{}".format(i) for i in range(n_options)]
+    with open(os.path.join(folder, "FeatureModel.xml"), "w") as f:
+        f.write("<vm><binaryOptions>\n")
+        for name in ["root"] + names:
+            f.write(
+                "<configurationOption><name>{}</name></configurationOption>\n".format(
+                    name
+                )
+            )
+        f.write("</binaryOptions></vm>\n")
+    with open(os.path.join(folder, "measurements.csv"), "wb") as f:
+        f.write(";".join(["root"] + names + ["performance"]).encode() + b"\n")
+        for start in range(0, n_rows, BLOCK_ROWS):
+            f.write(make_rows(rng, min(BLOCK_ROWS, n_rows - start), n_options))
+
+
+def make_rows(rng, n_rows, n_options):
+    """Render rows "1;<options>;<dddd.dd>" as bytes without Python loops."""
+    options = rng.randint(0, 2, size=(n_rows, n_options))
+    perf = rng.randint(100000, 1000000, size=n_rows)
+    perf_digits = perf[:, None] // 10 ** np.arange(5, -1, -1) % 10
+    rows = np.full((n_rows, 2 + 2 * n_options + 8), ord(";"), dtype=np.uint8)
+    rows[:, 0] = ord("1")
+    rows[:, 2 : 2 + 2 * n_options : 2] = ord("0") + options
+    perf_start = 2 + 2 * n_options
+    rows[:, perf_start : perf_start + 4] = ord("0") + perf_digits[:, :4]
+    rows[:, perf_start + 4] = ord(".")
+    rows[:, perf_start + 5 : perf_start + 7] = ord("0") + perf_digits[:, 4:]
+    rows[:, -1] = ord("\n")
+    return rows.tobytes()
+
+
+class ChunkedReader(ConfigSysProxy):
+    engine = "c"
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.fm_name = "featuremodel.xml"
+        self.attribute = None
+        self.redundant_ft_names = []
+        self.alternative_ft_names = []
+        self.position_map = self.parse_fm()
+
+    def read(self, file):
+        return self.parse_configs_csv(file, engine=self.engine)
+
+
+class LegacyReader(ChunkedReader):
+    def read(self, file):
+        df = pd.read_csv(file, sep=";")
+        features = list(self.position_map.keys())
+        configs = [tuple(x) for x in df[features].values.astype(float)]
+        col = list(df.drop(features, axis=1).columns.values)[0]
+        ys = np.array(df[col])
+        return {c: y for c, y in zip(configs, ys)}
+
+
+def load(reader_cls, folder, results):
+    start = time.time()
+    reader = reader_cls(folder)
+    reader.read(os.path.join(folder, "measurements.csv"))
+    elapsed = time.time() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((elapsed, peak_mb))
+
+
+def measure(reader_cls, folder):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=load, args=(reader_cls, folder, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("Loading failed in the child process")
+    elapsed, peak_mb = results.get()
+    return elapsed, peak_mb
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    n_rows = int(args[0]) if args else 4 * 10**6
+    readers = [("chunked", ChunkedReader)]
+    if "--legacy" in sys.argv:
+        readers.append(("legacy", LegacyReader))
+    with tempfile.TemporaryDirectory() as folder:
+        write_measurements(folder, n_rows)
+        size_mb = os.path.getsize(os.path.join(folder, "measurements.csv")) / 2**20
+        print("{} rows, {:.0f} MB".format(n_rows, size_mb))
+        for name, reader_cls in readers:
+            elapsed, peak_mb = measure(reader_cls, folder)
+            print("{:>10}: {:8.1f}s {:8.0f} MB peak RSS".format(name, elapsed, peak_mb))
+
+
+if __name__ == "__main__":
+    main()
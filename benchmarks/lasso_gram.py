@@ -0,0 +1,49 @@
+"""Fit time of the P4 lasso selection for growing n and a fixed number of options.
+
+Compares ``LassoCV`` on the expanded design matrix with the chunked Gram mode.
+
+    PYTHONPATH=. python benchmarks/lasso_gram.py
+"""
+import time
+import warnings
+
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+
+from bayesify.pairwise import P4Preprocessing
+
+N_OPTIONS = 20
+SIZES = [2000, 10000, 50000, 200000]
+
+
+def make_data(n, n_options=N_OPTIONS, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.randint(0, 2, size=(n, n_options)).astype(float)
+    coefs = rng.normal(size=n_options) * (rng.rand(n_options) < 0.3)
+    y = 10 + X @ coefs + 3 * X[:, 0] * X[:, 1] + rng.normal(scale=0.5, size=n)
+    return X, y
+
+
+def time_fit(X, y, precompute):
+    pre = P4Preprocessing(lasso_precompute=precompute)
+    start = time.time()
+    pre.fit(X, y)
+    return time.time() - start, pre.feature_names_out
+
+
+def main():
+    warnings.simplefilter("ignore", ConvergenceWarning)
+    print("{:>8} {:>12} {:>12} {:>10}".format("n", "LassoCV [s]", "Gram [s]", "same"))
+    for n in SIZES:
+        X, y = make_data(n)
+        t_cv, terms_cv = time_fit(X, y, False)
+        t_gram, terms_gram = time_fit(X, y, True)
+        print(
+            "{:>8} {:>12.3f} {:>12.3f} {:>10}".format(
+                n, t_cv, t_gram, str(terms_cv == terms_gram)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Search the optimum of a sparse pairwise model over a large configuration space.
+
+Generates a feature model as ``config_space.py`` does, with about
+``n_configs`` valid configurations (default 10⁶⁰, a few hundred options),
+and a random model with one linear coefficient per option and about one
+interaction per option. Branch and bound is compared with the best of
+10⁵ uniform samples, which is what scoring a sample would find. Spaces of
+about 50 options are solved to proven optimality; beyond that, the node
+budget ends the search and the local search improves the incumbent.
+
+    PYTHONPATH=. python benchmarks/optimum.py [n_configs] [max_nodes]
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bayesify.featuremodel import FeatureModel
+from bayesify.optimize import PseudoBooleanModel, find_optimum
+from config_space import write_feature_model
+
+
+def make_model(names, n_samples=100, seed=1):
+    rng = np.random.RandomState(seed)
+    n = len(names)
+    pairs = {tuple(sorted(rng.choice(n, 2, replace=False))) for _ in range(n)}
+    pairs = sorted(pairs)
+    return PseudoBooleanModel(
+        names,
+        rng.randn(n_samples) + 100,
+        rng.randn(n_samples, n) + rng.randn(n),
+        pairs,
+        rng.randn(n_samples, len(pairs)) * 0.5 + rng.randn(len(pairs)) * 0.5,
+    )
+
+
+def main():
+    args = sys.argv[1:]
+    n_configs = int(float(args[0])) if args else 10**60
+    max_nodes = int(float(args[1])) if len(args) > 1 else 10**5
+    with tempfile.TemporaryDirectory() as folder:
+        fm = FeatureModel.from_xml(write_feature_model(folder, n_configs))
+    space = fm.get_space()
+    model = make_model(fm.names)
+    print(
+        "{} options, {} interactions, {:.2e} valid configurations".format(
+            len(fm.names), len(model.pairs), float(space.count())
+        )
+    )
+
+    start = time.time()
+    samples = space.sample(10**5, seed=0)
+    sampled = model.evaluate(samples).min()
+    print("best of 10⁵ samples: {:10.3f} {:8.2f}s".format(sampled, time.time() - start))
+
+    start = time.time()
+    value, config, is_optimal = find_optimum(model, space, max_nodes=max_nodes)
+    print(
+        "branch and bound:    {:10.3f} {:8.2f}s optimal: {}, valid: {}".format(
+            value, time.time() - start, is_optimal, bool(fm.is_valid([config])[0])
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
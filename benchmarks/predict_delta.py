@@ -0,0 +1,47 @@
+"""Time of predicting performance differences of many configuration pairs.
+
+Fits a PyroMCMCRegressor with 1000 draws to 300 measurements of 40 options
+and predicts the differences of ``n_pairs`` random pairs (default 10⁴) by
+predicting both sides and subtracting the samples, and by ``predict_delta``
+with shared draws and with the analytic moments.
+
+    PYTHONPATH=. python benchmarks/predict_delta.py [n_pairs]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bayesify.pairwise import PyroMCMCRegressor
+
+N_OPTIONS = 40
+
+
+def main():
+    args = sys.argv[1:]
+    n_pairs = int(float(args[0])) if args else 10**4
+    rng = np.random.RandomState(0)
+    X = (rng.rand(300, N_OPTIONS) < 0.5).astype(float)
+    y = 100 + X @ (rng.randn(N_OPTIONS) * 5) + rng.randn(len(X))
+    reg = PyroMCMCRegressor(mcmc_samples=1000, mcmc_tune=500)
+    reg.fit(X, y)
+    X_a = (rng.rand(n_pairs, N_OPTIONS) < 0.5).astype(float)
+    X_b = (rng.rand(n_pairs, N_OPTIONS) < 0.5).astype(float)
+
+    timings = [
+        (
+            "predict both sides",
+            lambda: reg.predict(X_a, n_samples=1000) - reg.predict(X_b, n_samples=1000),
+        ),
+        ("predict_delta", lambda: reg.predict_delta(X_a, X_b)),
+        ("predict_delta ci", lambda: reg.predict_delta(X_a, X_b, ci=0.9)),
+        ("moments", lambda: reg.predict_delta(X_a, X_b, mode="moments")),
+    ]
+    for name, predict in timings:
+        start = time.time()
+        predict()
+        print("{:>20}: {:8.3f}s".format(name, time.time() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Time of point predictions with predictive samples and with moments.
+
+Fits a PyroMCMCRegressor with 1000 draws to 300 measurements of 40 options
+and predicts ``n_rows`` random configurations (default 10⁵), once from 500
+posterior predictive samples per row, which ``predict`` does by default,
+and once from the moments of the posterior.
+
+    PYTHONPATH=. python benchmarks/predict_moments.py [n_rows]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bayesify.pairwise import PyroMCMCRegressor
+
+N_OPTIONS = 40
+
+
+def main():
+    args = sys.argv[1:]
+    n_rows = int(float(args[0])) if args else 10**5
+    rng = np.random.RandomState(0)
+    X = (rng.rand(300, N_OPTIONS) < 0.5).astype(float)
+    y = 100 + X @ (rng.randn(N_OPTIONS) * 5) + rng.randn(len(X))
+    reg = PyroMCMCRegressor(mcmc_samples=1000, mcmc_tune=500)
+    reg.fit(X, y)
+    X_new = (rng.rand(n_rows, N_OPTIONS) < 0.5).astype(float)
+
+    start = time.time()
+    y_sampled, std_sampled = reg.predict(X_new, return_std=True)
+    print("samples: {:8.3f}s".format(time.time() - start))
+    start = time.time()
+    y_mean, y_std = reg.predict(X_new, return_std=True, mode="moments")
+    print("moments: {:8.3f}s".format(time.time() - start))
+    print(
+        "max difference of the means {:.3f}, of the standard deviations {:.3f}".format(
+            np.abs(y_sampled - y_mean).max(), np.abs(std_sampled - y_std).max()
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
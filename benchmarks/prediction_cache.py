@@ -0,0 +1,41 @@
+"""Time of repeated predictions on overlapping configuration sets.
+
+Fits a PyroMCMCRegressor to 300 measurements of 40 options and requests
+``n_requests`` point predictions (default 20) of 5000 configurations drawn
+from 20000 distinct ones, as a tuning service would, with and without a
+prediction cache.
+
+    PYTHONPATH=. python benchmarks/prediction_cache.py [n_requests]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bayesify.pairwise import PyroMCMCRegressor
+
+N_OPTIONS = 40
+
+
+def main():
+    args = sys.argv[1:]
+    n_requests = int(args[0]) if args else 20
+    rng = np.random.RandomState(0)
+    X = (rng.rand(300, N_OPTIONS) < 0.5).astype(float)
+    y = 100 + X @ (rng.randn(N_OPTIONS) * 5) + rng.randn(len(X))
+    reg = PyroMCMCRegressor(mcmc_samples=1000, mcmc_tune=500)
+    reg.fit(X, y)
+    configs = (rng.rand(20000, N_OPTIONS) < 0.5).astype(float)
+    requests = [configs[rng.choice(len(configs), 5000)] for _ in range(n_requests)]
+
+    for cache_size in (0, len(configs)):
+        reg.prediction_cache_size = cache_size
+        start = time.time()
+        for request in requests:
+            reg.predict(request)
+        print("cache size {:6d}: {:8.2f}s".format(cache_size, time.time() - start))
+    print(reg.get_prediction_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Time of the sampling strategies on millions of measured configurations.
+
+Generates ``n_rows`` distinct configurations (default 2·10⁶) of 40 options
+with alternative groups and draws ``n`` samples (default 1000) with each
+strategy of ``ConfigSysProxy.get_sample_ids``. ``t-wise`` covers all
+pairwise combinations and is not capped. ``choice`` is the former uniform
+sampler, which permuted all rows.
+
+    PYTHONPATH=. python benchmarks/sampling.py [n_rows] [n]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bayesify.datahandler import ConfigStore, ConfigSysProxy
+
+N_OPTIONS = 40
+
+
+def make_configs(n_rows, n_options=N_OPTIONS, seed=0):
+    rng = np.random.RandomState(seed)
+    columns = []
+    while len(columns) < n_options:
+        if rng.rand() < 0.7:
+            # options that are rarely selected make the distances skewed
+            columns.append(rng.rand(n_rows) < rng.uniform(0.05, 0.5))
+        else:
+            group_size = rng.randint(2, 5)
+            choice = rng.randint(0, group_size, size=n_rows)
+            columns += [choice == k for k in range(group_size)]
+    configs = np.array(columns[:n_options], dtype=float).T
+    return ConfigStore.from_measurements(configs, rng.rand(n_rows))
+
+
+class StoreProxy(ConfigSysProxy):
+    def __init__(self, store):
+        self.store = store
+
+
+def main():
+    args = sys.argv[1:]
+    n_rows = int(float(args[0])) if args else 2 * 10**6
+    n = int(args[1]) if len(args) > 1 else 1000
+    proxy = StoreProxy(make_configs(n_rows))
+    print("{} configurations, {} options".format(len(proxy.store), N_OPTIONS))
+    start = time.time()
+    np.random.RandomState(0).choice(len(proxy.store), n, replace=False)
+    print("{:>12}: {:8.2f}s".format("choice", time.time() - start))
+    for strategy in ConfigSysProxy.SAMPLING_STRATEGIES:
+        start = time.time()
+        size = None if strategy == "t-wise" else n
+        ids = (
+            proxy.get_t_wise_ids(t=2, seed=0)
+            if size is None
+            else proxy.get_sample_ids(size, strategy=strategy, seed=0)
+        )
+        elapsed = time.time() - start
+        distances = proxy.store.get_distances()[ids]
+        print(
+            "{:>12}: {:8.2f}s {:6d} samples, distances {}..{}, std {:.2f}".format(
+                strategy,
+                elapsed,
+                len(ids),
+                distances.min(),
+                distances.max(),
+                distances.std(),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
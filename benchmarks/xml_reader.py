@@ -0,0 +1,112 @@
+"""Load time and peak memory of the SPLC measurements.xml reader.
+
+Generates a measurements.xml with ``n_rows`` rows (default 10⁶) and loads it
+in a child process, once with the streaming reader of ConfigSysProxy and,
+with ``--legacy``, once with a full-tree ``ET.parse`` reader as it was used
+before.
+
+    PYTHONPATH=. python benchmarks/xml_reader.py [n_rows] [--legacy]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree as ET
+
+import numpy as np
+
+from bayesify.datahandler import ConfigSysProxy
+
+N_OPTIONS = 30
+
+
+def write_measurements(folder, n_rows, n_options=N_OPTIONS, seed=0):
+    rng = np.random.RandomState(seed)
+    names = ["opt{}".format(i) for i in range(n_options)]
+    with open(os.path.join(folder, "FeatureModel.xml"), "w") as f:
+        f.write("<vm><binaryOptions>\n")
+        for name in ["root"] + names:
+            f.write(
+                "<configurationOption><name>{}</name></configurationOption>\n".format(
+                    name
+                )
+            )
+        f.write("</binaryOptions></vm>\n")
+    with open(os.path.join(folder, "measurements.xml"), "w") as f:
+        f.write("<results>\n")
+        for start in range(0, n_rows, 10000):
+            block = rng.randint(0, 2, size=(min(10000, n_rows - start), n_options))
+            perfs = 100 + block @ rng.rand(n_options)
+            for row, perf in zip(block, perfs):
+                selected = ",".join(n for n, on in zip(names, row) if on)
+                f.write(
+                    '<row><data column="Configuration">{},</data>'
+                    '<data column="performance">{:.3f},{:.3f},{:.3f}</data>'
+                    "</row>\n".format(selected, perf, perf + 0.1, perf - 0.2)
+                )
+        f.write("</results>\n")
+
+
+class StreamingReader(ConfigSysProxy):
+    def __init__(self, folder):
+        self.folder = folder
+        self.fm_name = "featuremodel.xml"
+        self.attribute = None
+        self.redundant_ft_names = []
+        self.alternative_ft_names = []
+        self.position_map = self.parse_fm()
+
+    def read(self, file):
+        return self.parse_configs_xml(file)
+
+
+class LegacyReader(StreamingReader):
+    def read(self, file):
+        root = ET.parse(file).getroot()
+        performance_map = {}
+        for row in root.iter("row"):
+            config = self.parse_config_str("column", row)
+            perf = self.get_attribute_val("column", row)
+            performance_map[tuple(np.array(config).astype(float))] = perf
+        return performance_map
+
+
+def load(reader_cls, folder, results):
+    start = time.time()
+    reader = reader_cls(folder)
+    reader.read(os.path.join(folder, "measurements.xml"))
+    elapsed = time.time() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((elapsed, peak_mb))
+
+
+def measure(reader_cls, folder):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=load, args=(reader_cls, folder, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("Loading failed in the child process")
+    elapsed, peak_mb = results.get()
+    return elapsed, peak_mb
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    n_rows = int(args[0]) if args else 10**6
+    readers = [("streaming", StreamingReader)]
+    if "--legacy" in sys.argv:
+        readers.append(("ET.parse", LegacyReader))
+    with tempfile.TemporaryDirectory() as folder:
+        write_measurements(folder, n_rows)
+        size_mb = os.path.getsize(os.path.join(folder, "measurements.xml")) / 2**20
+        print("{} rows, {:.0f} MB".format(n_rows, size_mb))
+        for name, reader_cls in readers:
+            elapsed, peak_mb = measure(reader_cls, folder)
+            print("{:>10}: {:8.1f}s {:8.0f} MB peak RSS".format(name, elapsed, peak_mb))
+
+
+if __name__ == "__main__":
+    main()
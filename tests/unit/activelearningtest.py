@@ -0,0 +1,129 @@
+import itertools
+import unittest
+import numpy as np
+from scipy.stats import norm
+from bayesify.activelearning import (
+    ActiveLearner,
+    acquisition_scores,
+    predictive_moments,
+)
+
+
+class ConjugateRegressor:
+    """Bayesian linear regression with known noise, sampled like the MCMC model."""
+
+    def __init__(self, noise_sd=0.1, n_samples=4000):
+        self.noise_sd = noise_sd
+        self.n_samples = n_samples
+        self.n_fits = 0
+        self.n_refits = 0
+
+    def fit(self, X, y, random_key=0, feature_names=None):
+        self.n_fits += 1
+        self.feature_names = feature_names
+        design = np.column_stack([np.ones(len(y)), X])
+        precision = np.eye(design.shape[1]) + design.T @ design / self.noise_sd**2
+        cov = np.linalg.inv(precision)
+        mean = cov @ design.T @ y / self.noise_sd**2
+        rng = np.random.RandomState(random_key)
+        weights = rng.multivariate_normal(mean, cov, size=self.n_samples)
+        self.samples = {
+            "base": weights[:, 0],
+            "coefs": weights[:, 1:],
+            "error": np.full(self.n_samples, self.noise_sd),
+        }
+
+    def refit(self, X, y, random_key=0):
+        self.n_refits += 1
+        self.fit(X, y, random_key=random_key, feature_names=self.feature_names)
+        self.n_fits -= 1
+
+    def get_posterior_moments(self):
+        weights = np.column_stack([self.samples["base"], self.samples["coefs"]])
+        noise_var = np.mean(self.samples["error"] ** 2)
+        return weights.mean(axis=0), np.cov(weights, rowvar=False), noise_var
+
+
+class ActiveLearningTests(unittest.TestCase):
+    def test_moments_and_scores(self):
+        rng = np.random.RandomState(0)
+        weights = rng.randn(20000, 4) * [1, 0.5, 2, 0.1] + [3, 1, -1, 0]
+        X = rng.randint(0, 2, size=(50, 3)).astype(float)
+        samples = weights[:, 0][:, None] + weights[:, 1:] @ X.T
+        mean = weights.mean(axis=0)
+        cov = np.cov(weights, rowvar=False)
+        y_mean, y_var = predictive_moments(X, mean, np.linalg.cholesky(cov))
+        np.testing.assert_allclose(y_mean, samples.mean(axis=0))
+        np.testing.assert_allclose(y_var, samples.var(axis=0, ddof=1))
+
+        y_std = np.sqrt(y_var)
+        z = (2.5 - y_mean) / y_std
+        ei = (2.5 - y_mean) * norm.cdf(z) + y_std * norm.pdf(z)
+        np.testing.assert_allclose(
+            acquisition_scores("ei", y_mean, y_var, 0.1, best=2.5), ei
+        )
+        np.testing.assert_allclose(
+            acquisition_scores("ei", np.array([1.0, 3.0]), np.zeros(2), 0.1, 2.0),
+            [1.0, 0.0],
+        )
+        self.assertTrue(
+            np.all(
+                np.diff(
+                    acquisition_scores("information", np.zeros(3), np.arange(3.0), 1)
+                )
+                > 0
+            )
+        )
+        with self.assertRaises(ValueError):
+            acquisition_scores("ei", y_mean, y_var, 0.1)
+        with self.assertRaises(ValueError):
+            acquisition_scores("entropy", y_mean, y_var, 0.1)
+
+    def test_batch_is_diverse(self):
+        # 16 copies of each configuration: a batch of the highest variances
+        # would only hold copies of the most uncertain configuration
+        pool = np.repeat(np.array(list(itertools.product([0, 1], repeat=4))), 16, 0)
+        reg = ConjugateRegressor()
+        learner = ActiveLearner(reg, None, pool.astype(float), "variance", seed=0)
+        reg.fit(np.zeros((1, 4)), np.zeros(1))
+        batch = learner.select_batch(8)
+        self.assertEqual(len(set(batch.tolist())), 8)
+        top_variance = np.argsort(-learner.score())[:8]
+        self.assertEqual(len({tuple(c) for c in pool[top_variance].tolist()}), 1)
+        self.assertGreaterEqual(len({tuple(c) for c in pool[batch].tolist()}), 6)
+
+    def test_loop_finds_optimum(self):
+        rng = np.random.RandomState(1)
+        pool = rng.randint(0, 2, size=(5000, 8)).astype(float)
+        coefs = np.array([3, -2, 1, -4, 0.5, 2, -1, 0])
+        oracle_calls = []
+
+        def oracle(configs):
+            oracle_calls.append(len(configs))
+            return (10 + np.array(configs) @ coefs).tolist()
+
+        reg = ConjugateRegressor()
+        learner = ActiveLearner(
+            reg, oracle, pool, "ei", feature_names=list("abcdefgh"), seed=0
+        )
+        ids, ys = learner.run(n_steps=3, batch_size=5, initial_size=12)
+        self.assertEqual(oracle_calls, [12, 5, 5, 5])
+        self.assertEqual(len(set(ids.tolist())), 27)
+        self.assertTrue(learner.measured[ids].all())
+        self.assertEqual((reg.n_fits, reg.n_refits), (1, 3))
+        self.assertEqual(reg.feature_names[0], ("a",))
+        self.assertAlmostEqual(ys.min(), 10 + (pool @ coefs).min())
+        self.assertTrue(np.all(learner.score()[ids] == -np.inf))
+
+    def test_pool_exhaustion(self):
+        pool = np.eye(3)
+        learner = ActiveLearner(
+            ConjugateRegressor(), lambda configs: [1.0] * len(configs), pool
+        )
+        ids, ys = learner.run(n_steps=5, batch_size=2)
+        self.assertEqual(sorted(ids.tolist()), [0, 1, 2])
+        self.assertEqual(len(learner.step(2)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
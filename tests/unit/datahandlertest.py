@@ -0,0 +1,588 @@
+import itertools
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+import pandas as pd
+import networkx as nx
+from bayesify.datahandler import (
+    ConfigSysProxy,
+    ConfigStore,
+    DistBasedRepo,
+    MeasurementCache,
+    discover_systems,
+    find_alternative_features,
+    load_corpus,
+    read_lines_reversed,
+)
+
+# name: (parent, optional, implied options, excluded options)
+TOY_OPTIONS = {
+    "root": ("", False, [], []),
+    "A": ("root", True, [], []),
+    "B": ("root", True, ["A"], []),
+    "C": ("root", True, [], []),
+    "K": ("root", False, [], []),
+    "X1": ("root", False, [], ["X2", "X3"]),
+    "X2": ("root", False, [], ["X1", "X3"]),
+    "X3": ("root", False, [], ["X1", "X2"]),
+}
+
+
+class ConfigSysProxyTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = write_toy_system(self.tmp_dir.name)
+
+    def tearDown(self):
+        for thread in threading.enumerate():
+            if thread.name == "measurement-export":
+                thread.join()
+        self.tmp_dir.cleanup()
+
+    def test_cleaning(self):
+        proxy = ConfigSysProxy(self.folder)
+        self.assertEqual(proxy.redundant_ft_names, ["K"])
+        self.assertEqual(proxy.alternative_ft_names, ["X1"])
+        self.assertEqual(list(proxy.position_map), ["A", "B", "C", "X2", "X3"])
+
+    def test_single_pass_cleaning_matches_stepwise(self):
+        proxy = ConfigSysProxy(self.folder, use_cache=False)
+        stepwise = ConfigSysProxy(self.folder, use_cache=False)
+        stepwise.redundant_ft_names, stepwise.alternative_ft_names = [], []
+        stepwise.position_map = stepwise.parse_fm()
+        stepwise.store = stepwise.parse_configs()
+        redundant = stepwise.remove_constant_features()
+        alternative = stepwise.remove_alternative_features()
+        self.assertEqual(redundant, (proxy.redundant_ft, proxy.redundant_ft_names))
+        self.assertEqual(
+            alternative, (proxy.alternative_ft, proxy.alternative_ft_names)
+        )
+        self.assertEqual(stepwise.position_map, proxy.position_map)
+        np.testing.assert_array_equal(stepwise.store.configs, proxy.store.configs)
+
+    def test_columnar_store(self):
+        proxy = ConfigSysProxy(self.folder)
+        self.assertIsInstance(proxy.store, ConfigStore)
+        self.assertEqual(proxy.store.configs.shape, (18, 5))
+        self.assertTrue(proxy.store.configs.flags["C_CONTIGUOUS"])
+        self.assertEqual(len(proxy.all_configs), 18)
+        config, perf = next(iter(proxy.all_configs.items()))
+        self.assertEqual(proxy.all_configs[config], perf)
+        self.assertIn((0, 0, 0, 1, 0), proxy.all_configs)
+        self.assertNotIn((0, 1, 0, 1, 0), proxy.all_configs)
+
+    def test_eval(self):
+        proxy = ConfigSysProxy(self.folder)
+        self.assertEqual(
+            proxy.eval((1.0, 0.0, 1.0, 1.0, 0.0)), toy_perf(["A", "C", "X2"])
+        )
+        self.assertEqual(
+            proxy.eval([(0, 0, 0, 0, 0), (0, 0, 0, 0, 1)]),
+            [toy_perf(["X1"]), toy_perf(["X3"])],
+        )
+        with self.assertRaises(ValueError):
+            proxy.eval((0, 1, 0, 0, 0))
+
+    def test_random_points_and_opt(self):
+        proxy = ConfigSysProxy(self.folder)
+        points = proxy.get_random_points(5, seed=3)
+        self.assertEqual(points, proxy.get_random_points(5, seed=3))
+        self.assertEqual(len(set(points)), 5)
+        np.testing.assert_array_equal(
+            proxy.get_random_ids(2, seed=3),
+            np.random.RandomState(3).choice(len(proxy.store), 2, replace=False),
+        )
+        ids = proxy.get_random_ids(2, seed=3, by_rejection=True)
+        self.assertEqual(len(set(ids.tolist())), 2)
+        best_perf, best_conf = proxy.get_global_opt()
+        self.assertEqual(best_perf, toy_perf(["X1"]))
+        self.assertEqual(best_conf, (0.0, 0.0, 0.0, 0.0, 0.0))
+
+    def test_sampling_strategies(self):
+        proxy = ConfigSysProxy(self.folder)
+        configs = proxy.store.configs
+        for strategy in ConfigSysProxy.SAMPLING_STRATEGIES:
+            ids = proxy.get_sample_ids(6, strategy=strategy, seed=4)
+            self.assertLessEqual(len(ids), 6)
+            self.assertEqual(len(set(ids.tolist())), len(ids))
+            np.testing.assert_array_equal(
+                ids, proxy.get_sample_ids(6, strategy=strategy, seed=4)
+            )
+        ids = proxy.get_sample_ids(len(configs) + 1, strategy="diversified", seed=1)
+        self.assertEqual(sorted(ids.tolist()), list(range(len(configs))))
+        ids = proxy.get_sample_ids(3, strategy="distance", seed=2)
+        self.assertEqual(proxy.get_sample_ids(1, strategy="distance", seed=2), ids[:1])
+
+        for t in [1, 2]:
+            ids = proxy.get_t_wise_ids(t=t, seed=0)
+            combinations = {
+                c
+                for row in configs
+                for c in itertools.combinations(np.flatnonzero(row).tolist(), t)
+            }
+            covered = {
+                c
+                for row in configs[ids]
+                for c in itertools.combinations(np.flatnonzero(row).tolist(), t)
+            }
+            self.assertEqual(covered, combinations)
+        # options are covered by configurations selecting as few as possible
+        ids = proxy.get_t_wise_ids(t=1, seed=0)
+        self.assertEqual(proxy.store.get_distances()[ids].tolist(), [1, 2, 1, 1, 1])
+        with self.assertRaises(ValueError):
+            proxy.get_sample_ids(3, strategy="grid")
+
+    def test_eval_batch(self):
+        proxy = ConfigSysProxy(self.folder)
+        X = [(0, 0, 0, 0, 1), (0, 1, 0, 0, 0), (1, 1, 1, 1, 0)]
+        ys, unknown = proxy.eval_batch(X)
+        self.assertEqual(unknown.tolist(), [False, True, False])
+        self.assertEqual(ys[0], toy_perf(["X3"]))
+        self.assertTrue(np.isnan(ys[1]))
+        self.assertEqual(ys[2], toy_perf(["A", "B", "C", "X2"]))
+        with self.assertRaises(ValueError):
+            proxy.eval_batch([(0, 0, 0, 0)])
+        with self.assertRaises(ValueError):
+            proxy.eval([(0, 0, 0, 0, 1), (0, 1, 0, 0, 0)])
+
+    def test_eval_batch_with_hash_collisions(self):
+        proxy = ConfigSysProxy(self.folder)
+        configs = proxy.store.configs
+        with mock.patch.object(
+            ConfigStore,
+            "hash_rows",
+            side_effect=lambda rows: np.zeros(len(rows), dtype=np.uint64),
+        ):
+            proxy.store.hash_index = None
+            ys, unknown = proxy.eval_batch(configs[::-1])
+            self.assertIsNone(proxy.store.lookup((0, 1, 0, 0, 0)))
+        self.assertFalse(unknown.any())
+        np.testing.assert_array_equal(ys, proxy.store.ys[::-1])
+
+    def test_dist_based_repo_sample_sets(self):
+        root = self.tmp_dir.name
+        write_toy_system(os.path.join(root, "MeasuredPerformanceValues"))
+        summary = os.path.join(root, "PerformancePredictions", "Summary", "toy")
+        os.makedirs(summary)
+        with open(os.path.join(summary, "twise_t1.txt"), "w") as f:
+            f.write('0 "root%;%K%;%X1%;%" 0\n1 "root%;%A%;%C%;%K%;%X3%;%" 0\n')
+        with open(os.path.join(summary, "twise_t2.txt"), "w") as f:
+            f.write('0 "root%;%B%;%A%;%K%;%X2%;%" 0\n')
+        repo = DistBasedRepo(root, "toy")
+        self.assertEqual(sorted(repo.sample_sets), [1, 2])
+        self.assertEqual(repo.sample_sets.loaded, {})
+        self.assertEqual(
+            repo.sample_sets[1],
+            {
+                (0.0, 0.0, 0.0, 0.0, 0.0): toy_perf(["X1"]),
+                (1.0, 0.0, 1.0, 0.0, 1.0): toy_perf(["A", "C", "X3"]),
+            },
+        )
+        self.assertEqual(list(repo.sample_sets.loaded), [1])
+
+        parallel = DistBasedRepo(root, "toy")
+        parallel.load_sample_sets(n_jobs=2)
+        self.assertEqual(parallel.sample_sets.loaded[1], repo.sample_sets[1])
+        self.assertEqual(
+            parallel.sample_sets.loaded[2],
+            {(1.0, 1.0, 0.0, 1.0, 0.0): toy_perf(["A", "B", "X2"])},
+        )
+
+    def test_load_corpus(self):
+        root = os.path.join(self.tmp_dir.name, "SupplementaryWebsite")
+        for name in ["sys_a", "sys_b", "unsummarized"]:
+            write_toy_system(os.path.join(root, "MeasuredPerformanceValues"), name)
+        for name in ["sys_a", "sys_b"]:
+            os.makedirs(os.path.join(root, "PerformancePredictions", "Summary", name))
+        self.assertEqual(discover_systems(self.tmp_dir.name), ["sys_a", "sys_b"])
+        with mock.patch("builtins.print"):
+            repos, load_times = load_corpus(self.tmp_dir.name, n_jobs=2)
+        self.assertEqual(sorted(repos), ["sys_a", "sys_b"])
+        self.assertEqual(sorted(load_times), ["sys_a", "sys_b"])
+        reference = ConfigSysProxy(self.folder, use_cache=False)
+        for repo in repos.values():
+            self.assertTrue(repo.store.is_memory_mapped)
+            np.testing.assert_array_equal(repo.store.configs, reference.store.configs)
+            self.assertEqual(repo.position_map, reference.position_map)
+
+    def test_load_read_only_corpus(self):
+        root = os.path.join(self.tmp_dir.name, "SupplementaryWebsite")
+        write_toy_system(os.path.join(root, "MeasuredPerformanceValues"), "sys_a")
+        os.makedirs(os.path.join(root, "PerformancePredictions", "Summary", "sys_a"))
+        fallback_root = os.path.join(self.tmp_dir.name, "fallback")
+        store = MeasurementCache.store
+
+        def store_outside_corpus(cache, *args, **kwargs):
+            if cache.folder.startswith(root):
+                raise PermissionError("read-only corpus")
+            return store(cache, *args, **kwargs)
+
+        read_only = mock.patch.object(
+            MeasurementCache, "store", autospec=True, side_effect=store_outside_corpus
+        )
+        with read_only, mock.patch("builtins.print") as print_mock:
+            repos, _ = load_corpus(
+                self.tmp_dir.name, n_jobs=1, fallback_root=fallback_root
+            )
+        repo = repos["sys_a"]
+        self.assertEqual(repo.cache_root, os.path.join(fallback_root, "sys_a"))
+        self.assertTrue(repo.store.is_memory_mapped)
+        self.assertIn(
+            mock.call(
+                "Could not cache sys_a in the corpus, cached under " + fallback_root
+            ),
+            print_mock.call_args_list,
+        )
+        self.assertEqual(
+            sorted(os.listdir(repo.folder)), ["FeatureModel.xml", "measurements.xml"]
+        )
+
+        # the workers are forked, so they do not parse either
+        with read_only, mock.patch("builtins.print"), mock.patch.object(
+            ConfigSysProxy, "parse_configs", side_effect=RuntimeError
+        ):
+            repos, _ = load_corpus(
+                self.tmp_dir.name, n_jobs=1, fallback_root=fallback_root
+            )
+        self.assertEqual(repos["sys_a"].cache_root, repo.cache_root)
+
+    def test_coefficients_from_log_end(self):
+        log = os.path.join(self.tmp_dir.name, "log.txt")
+        model_line = "3;10.5 * root + 2.0 * A + -1.5 * B * C;0.1;0.2"
+        with open(log, "w") as f:
+            f.write("Analyze finished\n" + "noise\n" * 5000)
+            f.write(model_line + "\nAnalyze finished\nbye\n")
+        final_line = DistBasedRepo.find_final_coeff_line_reversed(
+            read_lines_reversed(log, block_size=16)
+        )
+        self.assertEqual(final_line, model_line)
+        coeffs = DistBasedRepo.parse_coeffs(final_line)
+        self.assertEqual(coeffs, {("root",): 10.5, ("A",): 2.0, ("B", "C"): -1.5})
+
+    def test_query(self):
+        proxy = ConfigSysProxy(self.folder)
+        self.assertEqual(proxy.count({"A": 1}), 12)
+        self.assertEqual(proxy.count([None, 1, 1, None, None]), 3)
+        self.assertEqual(proxy.count({"B": 1, "A": 0}), 0)
+        self.assertEqual(proxy.count({"A": 2}), 0)
+        self.assertEqual(proxy.query({"B": 1, "A": 0}), None)
+        self.assertIn(proxy.query({"B": 1, "X3": 1}), proxy.all_configs)
+        configs, ys = proxy.query_all({"C": 1, "X2": 1})
+        self.assertEqual(len(configs), 3)
+        self.assertTrue(np.all(configs[:, [2, 3]] == 1))
+        self.assertEqual(ys.tolist(), [proxy.all_configs[tuple(c)] for c in configs])
+        self.assertEqual(
+            proxy.best_match({"A": 1}), (toy_perf(["A"]), (1.0, 0.0, 0.0, 0.0, 0.0))
+        )
+        self.assertTrue(proxy.may_ft_occur_together(["B", "X3"]))
+        self.assertFalse(proxy.may_ft_occur_together(["X2", "X3"]))
+
+    def test_query_batch_matches_scan(self):
+        proxy = ConfigSysProxy(self.folder)
+        rng = np.random.RandomState(0)
+        queries = rng.randint(0, 2, size=(50, 5)).astype(float)
+        queries[rng.rand(50, 5) < 0.6] = np.nan
+        configs, ys = proxy.store.configs, proxy.store.ys
+        matches = [np.all((configs == q) | np.isnan(q), axis=1) for q in queries]
+        np.testing.assert_array_equal(
+            proxy.count_batch(queries), [m.sum() for m in matches]
+        )
+        for (matched, matched_ys), m in zip(proxy.query_batch(queries), matches):
+            np.testing.assert_array_equal(matched, configs[m])
+            np.testing.assert_array_equal(matched_ys, ys[m])
+        for best, m in zip(proxy.best_match_batch(queries), matches):
+            self.assertEqual(best is None, not m.any())
+            if best is not None:
+                self.assertEqual(best[0], ys[m].min())
+
+    def test_default_writes_nothing(self):
+        proxy = ConfigSysProxy(self.folder)
+        proxy.wait_for_export()
+        self.assertFalse(proxy.is_cached)
+        self.assertEqual(
+            sorted(os.listdir(self.folder)), ["FeatureModel.xml", "measurements.xml"]
+        )
+
+    def test_measurement_cache(self):
+        cold = ConfigSysProxy(self.folder, use_cache=True)
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(self.folder, MeasurementCache.FOLDER_NAME, "manifest.json")
+            )
+        )
+        with mock.patch.object(ConfigSysProxy, "parse_configs") as parse_configs:
+            warm = ConfigSysProxy(self.folder, use_cache=True)
+        parse_configs.assert_not_called()
+        np.testing.assert_array_equal(warm.store.configs, cold.store.configs)
+        np.testing.assert_array_equal(warm.store.ys, cold.store.ys)
+        self.assertEqual(warm.position_map, cold.position_map)
+        self.assertEqual(warm.redundant_ft_names, cold.redundant_ft_names)
+        self.assertEqual(warm.alternative_ft, cold.alternative_ft)
+        self.assertEqual(warm.eval((1, 0, 1, 1, 0)), toy_perf(["A", "C", "X2"]))
+
+    def test_measurement_cache_read_only(self):
+        cold = ConfigSysProxy(self.folder, use_cache=True)
+        measurements = os.path.join(self.folder, "measurements.xml")
+        os.utime(measurements, ns=(0, 0))
+        with mock.patch.object(
+            MeasurementCache, "write_manifest", side_effect=PermissionError
+        ), mock.patch.object(ConfigSysProxy, "parse_configs") as parse_configs:
+            warm = ConfigSysProxy(self.folder, use_cache=True)
+        parse_configs.assert_not_called()
+        np.testing.assert_array_equal(warm.store.ys, cold.store.ys)
+
+    def test_measurement_cache_invalidation(self):
+        ConfigSysProxy(self.folder, use_cache=True)
+        with mock.patch.object(
+            ConfigSysProxy, "parse_configs", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                ConfigSysProxy(self.folder, use_cache=True, attribute="performance")
+        measurements = os.path.join(self.folder, "measurements.xml")
+        with open(measurements) as f:
+            content = f.read()
+        with open(measurements, "w") as f:
+            f.write(content.replace(">9.5,10.0,10.1<", ">19.5,20.0,20.1<"))
+        proxy = ConfigSysProxy(self.folder, use_cache=True)
+        self.assertEqual(proxy.eval((0, 0, 0, 1, 0)), toy_perf(["X2"]))
+        self.assertEqual(proxy.eval((0, 0, 0, 0, 0)), 20.0)
+
+    def test_parse_xml_without_attribute(self):
+        with self.assertRaisesRegex(ValueError, "measurements.xml"):
+            ConfigSysProxy(self.folder, attribute="energy", use_cache=False)
+
+    def test_parse_xml_with_commented_rows(self):
+        proxy = ConfigSysProxy(self.folder, use_cache=False, export=None)
+        proxy.redundant_ft_names, proxy.alternative_ft_names = [], []
+        proxy.position_map = proxy.parse_fm()
+        measurements = os.path.join(self.folder, "measurements.xml")
+        expected_configs, expected_ys = proxy.parse_configs_xml(measurements)
+        with open(measurements) as f:
+            content = f.read()
+        with open(measurements, "w") as f:
+            f.write(content.replace("<results>", "<results><!-- <row> <row/> -->"))
+        configs, ys = proxy.parse_configs_xml(measurements, chunk_rows=5)
+        np.testing.assert_array_equal(configs, expected_configs)
+        np.testing.assert_array_equal(ys, expected_ys)
+        self.assertEqual(len(ys), 18)
+
+    def test_export(self):
+        proxy = ConfigSysProxy(self.folder, export="csv")
+        proxy.wait_for_export()
+        csv_path = os.path.join(self.folder, "measurements-cleared.csv")
+        with open(csv_path) as f:
+            self.assertEqual(f.readline().strip(), "root;A;B;C;X2;X3;y")
+        with mock.patch.object(ConfigSysProxy, "write_measurements") as write:
+            ConfigSysProxy(self.folder, export="csv").wait_for_export()
+        write.assert_not_called()
+
+        proxy.export_measurements("npz", background=False)
+        with np.load(os.path.join(self.folder, "measurements-cleared.npz")) as data:
+            np.testing.assert_array_equal(data["configs"], proxy.store.configs)
+            np.testing.assert_array_equal(data["ys"], proxy.store.ys)
+            self.assertEqual(data["features"].tolist(), list(proxy.position_map))
+        with self.assertRaises(ValueError):
+            proxy.export_measurements("xlsx")
+        self.assertFalse([f for f in os.listdir(self.folder) if f.endswith(".tmp")])
+
+    def test_csv_measurements(self):
+        from_xml = ConfigSysProxy(self.folder, use_cache=False, export=None)
+        csv_folder = os.path.join(self.tmp_dir.name, "toy_csv")
+        os.makedirs(csv_folder)
+        os.rename(
+            os.path.join(self.folder, "FeatureModel.xml"),
+            os.path.join(csv_folder, "FeatureModel.xml"),
+        )
+        options = [o for o in TOY_OPTIONS if o != "root"]
+        lines = ["root;" + ";".join(options) + ";performance;note"]
+        for selected in toy_valid_configs():
+            row = ["1"] + [str(int(o in selected)) for o in options]
+            lines.append(";".join(row + [str(toy_perf(selected)), "n/a"]))
+        with open(os.path.join(csv_folder, "measurements.csv"), "w") as f:
+            f.write("\n".join(lines) + "\n\n")
+
+        with mock.patch(
+            "bayesify.datahandler.pd.read_csv", wraps=pd.read_csv
+        ) as read_csv:
+            proxy = ConfigSysProxy(
+                csv_folder, use_cache=False, export=None, csv_engine="python"
+            )
+        self.assertEqual(read_csv.call_args.kwargs["engine"], "python")
+        self.assertEqual(list(proxy.position_map), list(from_xml.position_map))
+        np.testing.assert_array_equal(proxy.store.configs, from_xml.store.configs)
+        np.testing.assert_array_equal(proxy.store.ys, from_xml.store.ys)
+        proxy.position_map = proxy.parse_fm()
+        configs, ys = proxy.parse_configs_csv(
+            os.path.join(csv_folder, "measurements.csv"), chunk_rows=2, engine="c"
+        )
+        self.assertEqual(configs.shape, (len(lines) - 1, len(options)))
+        self.assertTrue(configs.flags.owndata)
+        perfs = [float(line.split(";")[-2]) for line in lines[1:]]
+        self.assertEqual(ys.tolist(), perfs)
+
+    def test_valid_configs_of_feature_model(self):
+        proxy = ConfigSysProxy(self.folder, use_cache=False, export=None)
+        blocks = list(proxy.iter_valid_configs(block_size=5))
+        self.assertEqual([len(block) for block in blocks], [5, 5, 5, 3])
+        valid = np.vstack(blocks)
+        self.assertEqual(
+            sorted(map(tuple, valid.tolist())),
+            sorted(map(tuple, proxy.store.configs.tolist())),
+        )
+        _, unknown = proxy.eval_batch(valid)
+        self.assertFalse(unknown.any())
+
+    def test_find_optimum_of_model(self):
+        proxy = ConfigSysProxy(self.folder, use_cache=False, export=None)
+        reg = SimpleNamespace(
+            samples={
+                "base": np.array([10.0]),
+                "coefs": np.array([[2, -3, 1, -4, 4.5, 1]]),
+            },
+            rv_names=["A", "B", "X2", "A&C", "C", "X3"],
+        )
+        value, config, is_optimal = proxy.find_optimum(reg)
+        self.assertTrue(is_optimal)
+        self.assertEqual(value, 9.0)
+        self.assertEqual(config, (1.0, 1.0, 0.0, 0.0, 0.0))
+        self.assertIn(config, proxy.all_configs)
+        _, fixed_config, _ = proxy.find_optimum(reg, fixed={"B": 0})
+        self.assertEqual(fixed_config, (0.0, 0.0, 0.0, 0.0, 0.0))
+
+    def test_export_disabled(self):
+        ConfigSysProxy(self.folder, use_cache=False, export=None)
+        self.assertEqual(
+            sorted(os.listdir(self.folder)), ["FeatureModel.xml", "measurements.xml"]
+        )
+
+    def test_memory_mapped_store(self):
+        in_memory = ConfigSysProxy(self.folder, use_cache=False)
+        self.assertFalse(in_memory.store.is_memory_mapped)
+        for _ in range(2):
+            proxy = ConfigSysProxy(self.folder, use_cache=True, mmap_mode="r")
+            self.assertTrue(proxy.store.is_memory_mapped)
+            np.testing.assert_array_equal(proxy.store.configs, in_memory.store.configs)
+        self.assertEqual(
+            proxy.get_random_points(4, seed=1), in_memory.get_random_points(4, seed=1)
+        )
+        configs, ys = proxy.get_random_samples(4, seed=1)
+        self.assertEqual(proxy.eval([tuple(c) for c in configs]), ys.tolist())
+        self.assertEqual(proxy.eval((0, 0, 0, 0, 1)), toy_perf(["X3"]))
+        for block, block_ys in proxy.store.iter_blocks(block_size=5):
+            self.assertTrue(np.shares_memory(block, proxy.store.configs))
+            self.assertEqual(len(block), len(block_ys))
+        with self.assertRaises(ValueError):
+            ConfigSysProxy(self.folder, use_cache=False, mmap_mode="r")
+
+
+class ConfigStoreTests(unittest.TestCase):
+    def test_duplicates_merge_like_dict(self):
+        configs = [(0, 1), (1, 0), (0, 1), (1, 1)]
+        ys = [1.0, 2.0, 3.0, 4.0]
+        store = ConfigStore.from_measurements(configs, ys)
+        expected = dict(zip(configs, ys))
+        self.assertEqual(store.configs.tolist(), [list(c) for c in expected])
+        self.assertEqual(store.ys.tolist(), list(expected.values()))
+        self.assertEqual(store.lookup((1.0, 1.0)), 2)
+        self.assertIsNone(store.lookup((0.0, 0.0)))
+
+    def test_medians_of_varying_measurement_counts(self):
+        medians = ConfigSysProxy.get_medians(["1,2,3", "4,5", "7"], [3, 2, 1])
+        np.testing.assert_allclose(medians, [2.0, 4.5, 7.0])
+        for strs, counts in [(["1,2", "x"], [2, 1]), (["1,2", "3"], [1, 1])]:
+            with self.assertRaisesRegex(ValueError, "measurements.xml"):
+                ConfigSysProxy.get_medians(strs, counts, "measurements.xml")
+
+
+class CleaningTests(unittest.TestCase):
+    def test_find_alternative_features(self):
+        rng = np.random.RandomState(4)
+        group = np.eye(3)[rng.randint(0, 3, size=40)]
+        pair = np.eye(2)[rng.randint(0, 2, size=40)]
+        columns = {
+            "m": group[:, 0],
+            "b": group[:, 1],
+            "z": group[:, 2],
+            "f": rng.randint(0, 2, size=40),
+            "q": pair[:, 0],
+            "c": pair[:, 1],
+            "dup": group[:, 1],
+            "never": np.zeros(40),
+        }
+        configs = np.array(list(columns.values()), dtype=float).T
+        # {m, b, z} and {m, dup, z} are both alternative groups, but only one
+        # of them can be removed; the one of the lower column positions is
+        self.assertEqual(find_alternative_features(configs, list(columns)), ["b", "c"])
+        varying_ids = np.arange(len(columns) - 1)
+        varying_fts = list(columns)[:-1]
+        with mock.patch(
+            "bayesify.datahandler.nx.find_cliques", wraps=nx.find_cliques
+        ) as find_cliques:
+            self.assertEqual(
+                find_alternative_features(configs, varying_fts, column_ids=varying_ids),
+                ["b", "c"],
+            )
+        find_cliques.assert_called_once()
+
+
+def toy_valid_configs():
+    for a, b, c in itertools.product([0, 1], repeat=3):
+        if b and not a:
+            continue
+        for alternative in ["X1", "X2", "X3"]:
+            yield ["K", alternative] + [ft for ft, on in zip("ABC", (a, b, c)) if on]
+
+
+def toy_perf(selected):
+    y = 10.0 + 2 * ("A" in selected) + 3 * ("B" in selected)
+    y += 1.5 * ("C" in selected) + 4 * ("X2" in selected) + ("X3" in selected)
+    y += 2 * ("A" in selected and "C" in selected)
+    return y
+
+
+def write_toy_system(root, name="toy"):
+    folder = os.path.join(root, name)
+    os.makedirs(folder, exist_ok=True)
+    lines = ['<vm name="{}">'.format(name), "  <binaryOptions>"]
+    for option, (parent, optional, implied, excluded) in TOY_OPTIONS.items():
+        lines += [
+            "    <configurationOption>",
+            "      <name>{}</name>".format(option),
+            "      <outputString>{}</outputString>".format(option),
+            "      <parent>{}</parent>".format(parent),
+            "      <impliedOptions>{}</impliedOptions>".format(
+                "".join("<options>{}</options>".format(o) for o in implied)
+            ),
+            "      <excludedOptions>{}</excludedOptions>".format(
+                "".join("<options>{}</options>".format(o) for o in excluded)
+            ),
+            "      <optional>{}</optional>".format(optional),
+            "    </configurationOption>",
+        ]
+    lines += ["  </binaryOptions>", "  <numericOptions />", "</vm>"]
+    with open(os.path.join(folder, "FeatureModel.xml"), "w") as f:
+        f.write("\n".join(lines))
+
+    lines = ["<results>"]
+    for selected in toy_valid_configs():
+        y = toy_perf(selected)
+        lines += [
+            "  <row>",
+            '    <data column="Configuration">{},</data>'.format(",".join(selected)),
+            '    <data column="performance">{},{},{}</data>'.format(
+                y - 0.5, y, y + 0.1
+            ),
+            "  </row>",
+        ]
+    lines.append("</results>")
+    with open(os.path.join(folder, "measurements.xml"), "w") as f:
+        f.write("\n".join(lines))
+    return folder
+
+
+if __name__ == "__main__":
+    unittest.main()
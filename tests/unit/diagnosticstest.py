@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from statsmodels.stats.outliers_influence import variance_inflation_factor
+from bayesify.diagnostics import get_correlation_eigen, get_gram_statistics, get_vifs
+
+
+class DiagnosticsTests(unittest.TestCase):
+    def test_vifs_match_statsmodels(self):
+        X = get_X()
+        expected = [variance_inflation_factor(X, i) for i in range(X.shape[1])]
+        np.testing.assert_allclose(get_vifs(get_gram_statistics(X)), expected)
+
+    def test_centered_vifs_match_regression_with_intercept(self):
+        X = get_X()
+        with_intercept = np.hstack([np.ones((len(X), 1)), X])
+        expected = [
+            variance_inflation_factor(with_intercept, i)
+            for i in range(1, with_intercept.shape[1])
+        ]
+        np.testing.assert_allclose(
+            get_vifs(get_gram_statistics(X), center=True), expected
+        )
+
+    def test_streaming_and_collinear_columns(self):
+        X = get_X()
+        X = np.hstack([X, X[:, [0]] + X[:, [1]]])
+        stats = get_gram_statistics(X, block_size=7)
+        np.testing.assert_allclose(stats.xx, X.T @ X)
+        vifs = get_vifs(stats)
+        self.assertTrue(np.all(np.isinf(vifs[[0, 1, 5]])))
+        with np.errstate(divide="ignore"):
+            expected = [variance_inflation_factor(X, i) for i in [2, 3, 4]]
+        np.testing.assert_allclose(vifs[[2, 3, 4]], expected)
+
+    def test_eigen_analysis(self):
+        X = get_X()
+        w, v = get_correlation_eigen(get_gram_statistics(X))
+        corr = np.corrcoef(X, rowvar=False)
+        np.testing.assert_allclose(w, np.linalg.eigvalsh(corr), atol=1e-12)
+        np.testing.assert_allclose(corr @ v, v * w, atol=1e-12)
+
+
+def get_X():
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 2, size=(100, 5)).astype(float)
+    X[:, 4] = X[:, 0] * X[:, 1]
+    return X
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import itertools
+import os
+import tempfile
+import unittest
+import numpy as np
+from bayesify.featuremodel import ConfigurationSpace, FeatureModel
+
+# name: (parent, optional, implied options, excluded options)
+OPTIONS = {
+    "root": ("", False, [], []),
+    "A": ("root", True, [], []),
+    "B": ("A", True, ["C | D"], []),
+    "C": ("root", True, [], []),
+    "D": ("root", True, [], ["E"]),
+    "E": ("root", True, [], []),
+    "K": ("root", False, [], []),
+    "X1": ("root", False, [], ["X2", "X3"]),
+    "X2": ("root", False, [], ["X1", "X3"]),
+    "X3": ("root", False, [], ["X1", "X2"]),
+}
+CONSTRAINTS = ["C | E | !A"]
+
+
+class FeatureModelTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fm = FeatureModel.from_xml(write_feature_model(self.tmp_dir.name))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_constraints(self):
+        self.assertEqual(
+            self.fm.names, ["A", "B", "C", "D", "E", "K", "X1", "X2", "X3"]
+        )
+        expected = [
+            config
+            for config in itertools.product([0, 1], repeat=len(self.fm.names))
+            if is_valid(dict(zip(self.fm.names, config)))
+        ]
+        all_configs = np.array(list(itertools.product([0, 1], repeat=9)))
+        valid = all_configs[self.fm.is_valid(all_configs)]
+        self.assertEqual(sorted(map(tuple, valid.tolist())), expected)
+
+        space = self.fm.get_space()
+        self.assertEqual(space.count(), len(expected))
+        enumerated = np.vstack(list(space.iter_blocks(block_size=4)))
+        self.assertEqual(sorted(map(tuple, enumerated.astype(int).tolist())), expected)
+        fixed = self.fm.get_space(fixed={"A": 1, "X1": 0})
+        self.assertEqual(
+            fixed.count(), sum(1 for c in expected if c[0] == 1 and c[6] == 0)
+        )
+
+    def test_ranks_and_columns(self):
+        space = self.fm.get_space()
+        configs = space.unrank(np.arange(space.count()))
+        # numbered in lexicographic order along the space's option order
+        ordered = configs[:, space.order].astype(int).tolist()
+        self.assertEqual(ordered, sorted(ordered))
+        block = next(space.iter_blocks(block_size=5, start=3, columns=["X2", "A"]))
+        np.testing.assert_array_equal(block, configs[3:8][:, [7, 0]])
+        with self.assertRaises(IndexError):
+            space.unrank([space.count()])
+
+    def test_sampling(self):
+        space = self.fm.get_space()
+        samples = space.sample(10, seed=1)
+        self.assertEqual(len({tuple(s) for s in samples.tolist()}), 10)
+        self.assertTrue(np.all(self.fm.is_valid(samples)))
+        np.testing.assert_array_equal(samples, space.sample(10, seed=1))
+        self.assertEqual(len(space.sample(1000, seed=1)), space.count())
+
+
+class LargeSpaceTests(unittest.TestCase):
+    def test_counting_without_enumeration(self):
+        # 40 pairs of options, each pair with three valid assignments
+        names = ["o{:02d}".format(i) for i in range(80)]
+        clauses = [((i, False), (i + 1, False)) for i in range(0, 80, 2)]
+        space = ConfigurationSpace(names, clauses)
+        self.assertEqual(space.count(), 3**40)
+        fm = FeatureModel(names, {name: "root" for name in names}, clauses)
+        samples = space.sample(100, seed=0)
+        self.assertTrue(np.all(fm.is_valid(samples)))
+
+        space = ConfigurationSpace(names[:34], clauses[:17])
+        self.assertEqual(space.count(), 3**17)
+        samples = space.sample(1000, seed=0)
+        self.assertEqual(len({tuple(s) for s in samples.tolist()}), 1000)
+        last = space.unrank([space.count() - 1])
+        np.testing.assert_array_equal(last[0], np.tile([1.0, 0.0], 17))
+
+
+def is_valid(config):
+    if config["B"] and not config["A"]:
+        return False
+    if config["B"] and not (config["C"] or config["D"]):
+        return False
+    if config["D"] and config["E"]:
+        return False
+    if config["A"] and not (config["C"] or config["E"]):
+        return False
+    return config["K"] == 1 and config["X1"] + config["X2"] + config["X3"] == 1
+
+
+def write_feature_model(folder):
+    lines = ['<vm name="fm">', "  <binaryOptions>"]
+    for option, (parent, optional, implied, excluded) in OPTIONS.items():
+        lines += [
+            "    <configurationOption>",
+            "      <name>{}</name>".format(option),
+            "      <parent>{}</parent>".format(parent),
+            "      <impliedOptions>{}</impliedOptions>".format(
+                "".join("<options>{}</options>".format(o) for o in implied)
+            ),
+            "      <excludedOptions>{}</excludedOptions>".format(
+                "".join("<options>{}</options>".format(o) for o in excluded)
+            ),
+            "      <optional>{}</optional>".format(optional),
+            "    </configurationOption>",
+        ]
+    lines += ["  </binaryOptions>", "  <booleanConstraints>"]
+    lines += ["    <constraint>{}</constraint>".format(c) for c in CONSTRAINTS]
+    lines += ["  </booleanConstraints>", "</vm>"]
+    path = os.path.join(folder, "FeatureModel.xml")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from sklearn.linear_model import LassoCV
+from sklearn.model_selection import KFold
+from bayesify.lasso import GramStatistics, gram_lasso_cv
+
+
+class GramLassoTests(unittest.TestCase):
+    def test_statistics_add_and_subtract(self):
+        X, y = get_X_y()
+        total = GramStatistics(X.shape[1]).update(X, y)
+        head = GramStatistics(X.shape[1]).update(X[:40], y[:40])
+        tail = GramStatistics(X.shape[1]).update(X[40:], y[40:])
+        np.testing.assert_allclose((head + tail).xx, total.xx)
+        np.testing.assert_allclose((total - head).xy, tail.xy)
+        self.assertEqual((total - head).n_samples, tail.n_samples)
+
+    def test_cv_matches_lasso_cv(self):
+        X, y = get_X_y()
+        lasso_cv = LassoCV(cv=3, max_iter=5000).fit(X, y)
+        fold_stats = [
+            GramStatistics(X.shape[1]).update(X[test_idx], y[test_idx])
+            for _, test_idx in KFold(n_splits=3).split(X)
+        ]
+        alpha, coef, alphas, mse_path = gram_lasso_cv(fold_stats)
+        np.testing.assert_allclose(alphas, lasso_cv.alphas_)
+        np.testing.assert_allclose(mse_path.T, lasso_cv.mse_path_, rtol=1e-6)
+        self.assertAlmostEqual(alpha, lasso_cv.alpha_)
+        np.testing.assert_allclose(coef, lasso_cv.coef_, atol=1e-8)
+
+
+def get_X_y():
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 2, size=(120, 8)).astype(float)
+    y = 3 + X @ rng.normal(size=8) + 2 * X[:, 0] * X[:, 1] + rng.normal(size=120)
+    return X, y
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import itertools
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from bayesify.featuremodel import ConfigurationSpace
+from bayesify.optimize import OptimumSearch, PseudoBooleanModel, find_optimum
+
+
+class OptimumSearchTests(unittest.TestCase):
+    def test_optimum_matches_enumeration(self):
+        for seed in range(5):
+            space, model = get_space_and_model(seed)
+            configs = space.unrank(np.arange(space.count()))
+            value, config, is_optimal = find_optimum(model, space)
+            self.assertTrue(is_optimal)
+            self.assertAlmostEqual(value, model.evaluate(configs).min())
+            self.assertTrue(space.is_valid([config])[0])
+            self.assertAlmostEqual(model.evaluate(config)[0], value)
+
+    def test_quantile_objective(self):
+        space, model = get_space_and_model(0, n_samples=50, quantile=0.9)
+        configs = space.unrank(np.arange(space.count()))
+        value, config, is_optimal = find_optimum(model, space)
+        self.assertTrue(is_optimal)
+        self.assertAlmostEqual(value, model.evaluate(configs).min())
+
+    def test_node_budget_and_local_search(self):
+        space, model = get_space_and_model(1)
+        start = space.unrank([space.count() - 1])
+        value, config, is_optimal = find_optimum(
+            model, space, starts=start, max_nodes=1
+        )
+        self.assertFalse(is_optimal)
+        self.assertTrue(space.is_valid([config])[0])
+        self.assertLessEqual(value, model.evaluate(start)[0])
+
+        search = OptimumSearch(model, space)
+        self.assertFalse(search.branch_and_bound(max_nodes=1))
+        self.assertTrue(space.is_valid([search.best_config])[0])
+
+    def test_model_from_regressor(self):
+        rng = np.random.RandomState(0)
+        reg = SimpleNamespace(
+            samples={"base": rng.randn(20), "coefs": rng.randn(20, 3)},
+            rv_names=["a", "b&c", "c"],
+        )
+        model = PseudoBooleanModel.from_regressor(reg, ["c", "b", "a"])
+        X = np.array(list(itertools.product([0, 1], repeat=3)), dtype=float)
+        c, b, a = X.T
+        expected = reg.samples["base"][:, None] + reg.samples["coefs"] @ np.array(
+            [a, b * c, c]
+        )
+        np.testing.assert_allclose(model.evaluate(X), expected.mean(axis=0))
+        model = PseudoBooleanModel.from_regressor(
+            reg, ["c", "b", "a"], term_names=[("a",), ("b", "c"), ("c",)], quantile=0.2
+        )
+        np.testing.assert_allclose(
+            model.evaluate(X), np.quantile(expected, 0.2, axis=0)
+        )
+        with self.assertRaises(ValueError):
+            PseudoBooleanModel.from_regressor(reg, ["a", "b"])
+
+
+def get_space_and_model(seed, n_options=12, n_samples=1, quantile=None):
+    rng = np.random.RandomState(seed)
+    names = ["o{}".format(i) for i in range(n_options)]
+    clauses = set()
+    while len(clauses) < n_options:
+        ids = rng.choice(n_options, rng.randint(2, 4), replace=False)
+        clauses.add(tuple(sorted((int(i), bool(rng.rand() < 0.6)) for i in ids)))
+    space = ConfigurationSpace(names, sorted(clauses), rng.permutation(n_options))
+    pairs = [
+        pair for pair in itertools.combinations(range(n_options), 2) if rng.rand() < 0.3
+    ]
+    model = PseudoBooleanModel(
+        names,
+        rng.randn(n_samples),
+        rng.randn(n_samples, n_options),
+        pairs,
+        rng.randn(n_samples, len(pairs)),
+        quantile=quantile,
+    )
+    return space, model
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
+import joblib
+import numpy as np
 import seaborn as sns
 import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.linear_model import Lasso, LinearRegression
 from sklearn.pipeline import make_pipeline
 from bayesify.pairwise import PyroMCMCRegressor, P4Preprocessing
 import arviz as az
@@ -11,6 +19,39 @@ class PreProcessingTests(unittest.TestCase):
     def test_constructor(self):
         P4Preprocessing()
 
+    def test_constructor_only_stores_params(self):
+        pre = P4Preprocessing(cv=4)
+        self.assertEqual(vars(pre), pre.get_params())
+        self.assertEqual(clone(pre).get_params(), pre.get_params())
+
+    def test_repeated_fit_uses_selection_cache(self):
+        X, feature_names, y = get_X_y()
+        P4Preprocessing.clear_selection_cache()
+        cached = P4Preprocessing(lasso_precompute=False, cache_selection=True)
+        first = clone(cached).fit(X, y)
+        with mock.patch.object(
+            P4Preprocessing,
+            "get_influentials_from_lasso",
+            autospec=True,
+            return_value=(first.final_var_names, None, None),
+        ) as lasso_selection:
+            second = clone(cached).fit(X, y)
+            lasso_selection.assert_not_called()
+            P4Preprocessing(lasso_precompute=False).fit(X, y)
+            lasso_selection.assert_called_once()
+        self.assertEqual(first.final_var_names, second.final_var_names)
+        self.assertEqual(
+            joblib.hash(first.final_var_names), joblib.hash(second.final_var_names)
+        )
+
+        gram = P4Preprocessing(lasso_precompute=True, cache_selection=True)
+        gram.fit(X, y)
+        refit = clone(gram).fit(X, y)
+        self.assertIsNotNone(refit.lasso_fold_stats)
+        np.testing.assert_array_equal(refit.transform(X), gram.transform(X))
+        for state in P4Preprocessing.selection_cache.values():
+            self.assertEqual(set(state), set(P4Preprocessing.CACHED_ATTRIBUTES))
+
     def test_preprocessing_fit(self):
         X, feature_names, y = get_X_y()
         pre = P4Preprocessing()
@@ -33,6 +74,59 @@ class PreProcessingTests(unittest.TestCase):
         )
         return new_X
 
+    def test_partial_fit_matches_lasso(self):
+        X, feature_names, y = get_X_y()
+        X = X.astype(float)
+        pre = P4Preprocessing()
+        for start in range(0, len(y), 60):
+            pre.partial_fit(X[start : start + 60], y[start : start + 60])
+        self.assertEqual(len(pre.update_times), 5)
+        self.assertEqual(pre.n_at_screen, 240)
+        lasso = Lasso(alpha=pre.lasso_alpha, max_iter=5000)
+        lasso.fit(pre.get_candidate_x(X), y)
+        np.testing.assert_allclose(lasso.coef_, pre.lasso_coef, atol=1e-4)
+        self.assertEqual(pre.transform(X).shape[1], len(pre.feature_names_out))
+
+    def test_partial_fit_rescreens_only_on_growth(self):
+        X, feature_names, y = get_X_y()
+        pre = P4Preprocessing(rescreen_fraction=0.5)
+        pre.partial_fit(X[:200], y[:200])
+        alpha = pre.lasso_alpha
+        pre.partial_fit(X[200:], y[200:])
+        self.assertEqual(alpha, pre.lasso_alpha)
+        self.assertEqual(pre.n_at_screen, 200)
+        self.assertTrue(pre.final_var_names)
+
+    def test_partial_fit_after_fit(self):
+        X, feature_names, y = get_X_y()
+        gram = P4Preprocessing(lasso_precompute=True).fit(X[:200], y[:200])
+        gram.partial_fit(X[200:], y[200:])
+        self.assertEqual(sum(s.n_samples for s in gram.lasso_fold_stats), len(y))
+        pre = P4Preprocessing(lasso_precompute=False).fit(X[:200], y[:200])
+        selected = pre.final_var_names
+        with self.assertRaises(ValueError):
+            pre.partial_fit(X[200:], y[200:])
+        self.assertEqual(pre.final_var_names, selected)
+
+    def test_transform_iter_matches_transform(self):
+        X, feature_names, y = get_X_y()
+        pre = P4Preprocessing().fit(X, y)
+        blocks = list(pre.transform_iter(X, block_size=50))
+        self.assertEqual(len(blocks), 5)
+        np.testing.assert_allclose(np.concatenate(blocks), pre.transform(X))
+
+    def test_gram_lasso_matches_lasso_cv(self):
+        X, feature_names, y = get_X_y()
+        pre_cv = P4Preprocessing(lasso_precompute=False).fit(X, y)
+        pre_gram = P4Preprocessing(lasso_precompute=True, lasso_chunk_size=50)
+        pre_gram.fit(X, y)
+        self.assertEqual(pre_cv.feature_names_out, pre_gram.feature_names_out)
+        np.testing.assert_allclose(
+            list(pre_cv.final_var_names.values()),
+            list(pre_gram.final_var_names.values()),
+            rtol=1e-6,
+        )
+
 
 class PWLearnerTests(unittest.TestCase):
     def test_constructor(self):
@@ -62,6 +156,123 @@ class PWLearnerTests(unittest.TestCase):
             "Did not get requested number of posterior predictive samples!",
         )
 
+    def test_prediction_moments(self):
+        X, feature_names, y = get_X_y()
+        reg = train_quick_model()
+        y_mean, y_std = reg.predict(X, return_std=True, mode="moments")
+        self.assertEqual(y_mean.shape, (len(X),))
+        y_samples = reg.predict(X, n_samples=20000)
+        tolerance = 5 * y_std / np.sqrt(len(y_samples))
+        self.assertTrue(np.all(np.abs(y_mean - y_samples.mean(axis=0)) < tolerance))
+        np.testing.assert_allclose(y_std, y_samples.std(axis=0), rtol=0.05)
+        _, sampled_std = reg.predict(X, return_std=True)
+        np.testing.assert_allclose(sampled_std, y_std, rtol=0.25)
+
+        bounds = reg.predict(X, ci=0.9, mode="moments")
+        self.assertEqual(bounds.shape, (len(X), 2))
+        np.testing.assert_allclose(bounds.mean(axis=1), y_mean)
+        sample_bounds = np.quantile(y_samples, [0.05, 0.95], axis=0).T
+        np.testing.assert_allclose(bounds, sample_bounds, rtol=0.1, atol=0.1)
+        summary = next(reg.predict_iter(X, ci=0.9, mode="moments"))
+        np.testing.assert_allclose(summary["ci"], bounds)
+        with self.assertRaises(ValueError):
+            reg.predict(X, n_samples=10, mode="moments")
+
+    def test_prediction_cache(self):
+        X, feature_names, y = get_X_y()
+        X = X.astype(float)
+        reg = train_quick_model()
+        reg.prediction_cache_size = 150
+        y_mean = reg.predict(X[:100], mode="moments")
+        np.testing.assert_allclose(
+            y_mean, reg._predict(X[:100], None, None, False, "moments")
+        )
+        with mock.patch.object(reg, "_predict", wraps=reg._predict) as predict:
+            overlapping = reg.predict(X[50:150], mode="moments")
+            self.assertEqual(len(predict.call_args[0][0]), 50)
+        np.testing.assert_allclose(overlapping[:50], y_mean[50:])
+        stats = reg.get_prediction_cache_stats()
+        self.assertEqual(
+            (stats["hits"], stats["misses"], stats["size"]), (50, 150, 150)
+        )
+
+        samples = reg.predict(X[:20], n_samples=30)
+        self.assertEqual(samples.shape, (30, 20))
+        np.testing.assert_array_equal(
+            reg.predict(X[10:20], n_samples=30), samples[:, 10:]
+        )
+        bounds, y_std = reg.predict(X[:20], n_samples=30, ci=0.9, return_std=True)
+        self.assertEqual((bounds.shape, y_std.shape), ((20, 2), (20,)))
+        self.assertEqual(reg.get_prediction_cache_stats()["size"], 150)
+
+        reg.refit(X, y, mcmc_samples=50)
+        self.assertEqual(reg.get_prediction_cache_stats()["size"], 0)
+        self.assertFalse(np.allclose(reg.predict(X[:100], mode="moments"), y_mean))
+
+        # binary rows get the same keys in batches with non-binary rows
+        binary = (X[:10] > np.median(X, axis=0)).astype(float)
+        reg.predict(np.vstack([binary, X[:1]]), mode="moments")
+        with mock.patch.object(reg, "_predict", wraps=reg._predict) as predict:
+            reg.predict(binary, mode="moments")
+        predict.assert_not_called()
+
+    def test_predict_iter_memmap(self):
+        X, feature_names, y = get_X_y()
+        reg = train_quick_model()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "configs.npy")
+            np.save(path, X.astype(float))
+            X_mapped = np.load(path, mmap_mode="r")
+            summaries = list(reg.predict_iter(X_mapped, block_size=100, ci=0.9))
+        self.assertEqual(len(summaries), 3)
+        means = np.concatenate([summary["mean"] for summary in summaries])
+        bounds = np.concatenate([summary["ci"] for summary in summaries])
+        self.assertEqual(means.shape, (len(X),))
+        self.assertEqual(bounds.shape, (len(X), 2))
+        self.assertTrue(np.all(bounds[:, 0] <= bounds[:, 1]))
+        first_samples = reg._predict_samples(X[:100].astype(float), n_samples=500)
+        np.testing.assert_allclose(means[:100], first_samples.mean(axis=0))
+
+    def test_refit_and_posterior_moments(self):
+        X, feature_names, y = get_X_y()
+        reg = train_quick_model()
+        mean, cov, noise_var = reg.get_posterior_moments()
+        self.assertEqual(mean.shape, (len(feature_names) + 1,))
+        self.assertEqual(cov.shape, (len(feature_names) + 1,) * 2)
+        self.assertGreater(noise_var, 0)
+        design = np.column_stack([np.ones(len(X)), X])
+        samples = reg.samples["base"][:, None] + reg.samples["coefs"] @ X.T.astype(
+            float
+        )
+        np.testing.assert_allclose(design @ mean, samples.mean(axis=0), rtol=1e-4)
+        reg.refit(X, y, random_key=1, mcmc_samples=50)
+        self.assertEqual(len(reg.samples["base"]), 50)
+        self.assertIsNot(reg.get_posterior_moments()[1], cov)
+        # the priors are kept, so the shift shows in the error, not the base
+        reg.refit(X, y + 100, random_key=2, mcmc_samples=50)
+        self.assertGreater(reg.get_posterior_moments()[2], 100 * noise_var)
+
+    def test_predict_delta(self):
+        X, feature_names, y = get_X_y()
+        X = X.astype(float)
+        reg = train_quick_model()
+        X_a, X_b = X[:60], X[60:120]
+        deltas = reg.predict_delta(X_a, X_b)
+        expected = reg.samples["coefs"] @ (X_a - X_b).T
+        np.testing.assert_allclose(deltas, expected, rtol=1e-5, atol=1e-8)
+        self.assertEqual(reg.predict_delta(X_a, X_b, n_samples=250).shape, (250, 60))
+        np.testing.assert_array_equal(reg.predict_delta(X_a, X_a), 0)
+
+        mean, std = reg.predict_delta(X_a, sparse.csr_matrix(X_b), mode="moments")
+        np.testing.assert_allclose(mean, deltas.mean(axis=0), rtol=1e-4, atol=1e-6)
+        np.testing.assert_allclose(std, deltas.std(axis=0, ddof=1), rtol=1e-3)
+        bounds = reg.predict_delta(X_a, X_b, ci=0.9, mode="moments")
+        self.assertEqual(bounds.shape, (60, 2))
+        self.assertTrue(np.all(bounds[:, 0] <= mean) and np.all(mean <= bounds[:, 1]))
+        self.assertEqual(reg.predict_delta(X_a, X_b, ci=0.9).shape, (60, 2))
+        with self.assertRaises(ValueError):
+            reg.predict_delta(X_a, X_b[:10])
+
     def test_coefs_ci(self):
         reg = train_quick_model()
         coefs_50 = reg.coef_ci(0.5)
@@ -90,6 +301,88 @@ class PipelineTests(unittest.TestCase):
         pipeline = make_pipeline(preproc, reg)
         pipeline.fit(X, y)
 
+    def test_pipeline_memory_caches_preprocessing(self):
+        X, _, y = get_X_y()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            memory = joblib.Memory(cache_dir, verbose=0)
+            pipeline = make_pipeline(
+                P4Preprocessing(), LinearRegression(), memory=memory
+            )
+            pipeline.fit(X, y)
+            selection = pipeline[0].final_var_names
+            pipeline.set_params(linearregression__fit_intercept=False)
+            with mock.patch.object(P4Preprocessing, "fit") as preproc_fit:
+                pipeline.fit(X, y)
+            preproc_fit.assert_not_called()
+            self.assertEqual(selection, pipeline[0].final_var_names)
+
+
+class SparseInputTests(unittest.TestCase):
+    def test_sparse_preprocessing_matches_dense(self):
+        X, _, y = get_X_y()
+        X = X.astype(float)
+        pre_dense = P4Preprocessing().fit(X, y)
+        pre_sparse = P4Preprocessing().fit(sparse.csr_matrix(X), y)
+        self.assertEqual(
+            list(pre_dense.final_var_names), list(pre_sparse.final_var_names)
+        )
+        X_dense = pre_dense.transform(X)
+        X_sparse = pre_sparse.transform(sparse.csc_matrix(X))
+        self.assertTrue(sparse.issparse(X_sparse))
+        np.testing.assert_allclose(X_dense, X_sparse.toarray())
+
+    def test_sparse_candidate_features_match_dense(self):
+        X, feature_names, y = get_X_y()
+        X = X.astype(float)
+        pre = P4Preprocessing().fit(X, y, feature_names=feature_names)
+        candidate = [("total_bill",), ("sex_Male", "size"), ("smoker_Yes", "size")]
+        # pairs with smoker_No are constant, a binary option with itself
+        # duplicates the option
+        all_ft = feature_names + ["smoker_No"]
+        X_dup = np.hstack([X, 1.0 - X[:, [2]]])
+        pre.pos_map["smoker_No"] = 4
+        pre.inters_only_between_influentials = False
+        with mock.patch.object(
+            sparse.csc_matrix, "toarray", side_effect=AssertionError
+        ), mock.patch.object(sparse.csr_matrix, "toarray", side_effect=AssertionError):
+            mapped = pre.transform_data_to_candidate_features(
+                candidate, sparse.csr_matrix(X)
+            )
+            valid = pre.generate_valid_combinations(
+                sparse.csr_matrix(X_dup), feature_names, all_ft
+            )
+        self.assertTrue(sparse.issparse(mapped))
+        np.testing.assert_allclose(
+            mapped.toarray(), pre.transform_data_to_candidate_features(candidate, X)
+        )
+        self.assertEqual(
+            valid, pre.generate_valid_combinations(X_dup, feature_names, all_ft)
+        )
+        self.assertIn(("sex_Male", "smoker_Yes"), valid)
+        self.assertIn(("size", "size"), valid)
+        self.assertNotIn(("smoker_Yes", "smoker_No"), valid)
+        self.assertNotIn(("sex_Male", "sex_Male"), valid)
+
+    def test_sparse_prediction_matches_dense(self):
+        X, feature_names, y = get_X_y()
+        X = X.astype(float)
+        reg = train_quick_model()
+        y_dense = reg.predict(X, n_samples=20)
+        y_sparse = reg.predict(sparse.csr_matrix(X), n_samples=20)
+        np.testing.assert_allclose(y_dense, y_sparse, rtol=1e-4, atol=1e-4)
+
+    def test_sparse_fitting(self):
+        X, feature_names, y = get_X_y()
+        reg = PyroMCMCRegressor()
+        reg.fit(
+            sparse.csr_matrix(X.astype(float)),
+            y,
+            mcmc_samples=100,
+            mcmc_tune=200,
+            feature_names=feature_names,
+        )
+        self.assertIsNotNone(reg.coef_)
+
 
 def train_quick_model():
     X, feature_names, y = get_X_y()